@@ -1,8 +1,17 @@
-import sqlite3
+import threading
+import time
 import numpy as np
 from collections import Counter
-from scipy.spatial.distance import cosine, euclidean, mahalanobis
+from scipy.spatial.distance import mahalanobis
 import logging
+from sklearn.covariance import LedoitWolf
+
+try:
+    from backend.fingerprints import FingerprintMatrix, DISTANCE_METRICS, l1_normalize, pairwise_distances, permutation_similarities
+    from backend.analysis_sources import SqliteSource
+except ImportError:
+    from fingerprints import FingerprintMatrix, DISTANCE_METRICS, l1_normalize, pairwise_distances, permutation_similarities
+    from analysis_sources import SqliteSource
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -17,79 +26,78 @@ except ImportError:
     logger.warning("ruptures library not found. using fallback for change point detection.")
 
 class Analyzer:
-    def __init__(self, db_path):
-        self.db_path = db_path
-        self._global_vocab = None # Cache for global top words (dimensions)
+    def __init__(self, source, bucket="day"):
+        # An EventSource (analysis_sources.py); a path means a sqlite file
+        self.source = SqliteSource(source) if isinstance(source, str) else source
+        # Country x word (x day) counts; vectors and distances are sliced from it
+        self.matrix = FingerprintMatrix(bucket)
+        self._refresh_lock = threading.Lock()
+        self._distance_cache = {} # (data version, metric, vocab size) -> (countries, matrix)
+        self._covariance = None # Shrinkage covariance fit, see _get_covariance
 
-    def _get_connection(self):
-        return sqlite3.connect(self.db_path)
+    def _refresh_matrix(self):
+        """
+        Fold events added since the last call into the fingerprint matrix (one
+        aggregation over the new ids), up to the source's commit-safe watermark.
+        If retention removed events since, the matrix is rebuilt from scratch.
+        """
+        # Serialized: concurrent requests must not fold the same id range twice
+        with self._refresh_lock:
+            matrix = self.matrix
+            epoch = self.source.retention_version()
+            if epoch != matrix.epoch:
+                matrix = FingerprintMatrix(matrix.bucket)
+                matrix.epoch = epoch
+            max_id = self.source.max_event_id(matrix.last_id)
+            if max_id is not None and max_id > matrix.last_id:
+                rows = self.source.aggregate(matrix.last_id, max_id, matrix.bucket)
+                matrix.add_counts(rows, last_id=max_id)
+            # A rebuild is swapped in whole; readers of the old matrix keep it
+            self.matrix = matrix
+        return matrix
+
+    @staticmethod
+    def _data_version(matrix):
+        """Identifies the events a matrix was built from, the same in every process."""
+        return f"{matrix.epoch}.{matrix.last_id}"
 
     def _get_global_vocab(self, limit=100):
         """Get top N global errors to serve as vector dimensions."""
-        if self._global_vocab:
-            return self._global_vocab
-            
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT word, COUNT(*) as cnt 
-            FROM error_events 
-            GROUP BY word 
-            ORDER BY cnt DESC 
-            LIMIT ?
-        ''', (limit,))
-        vocab = [row[0] for row in cursor.fetchall()]
-        conn.close()
-        self._global_vocab = vocab
-        return vocab
+        matrix = self._refresh_matrix()
+        return [matrix.words[i] for i in matrix.top_words(limit)]
 
     def _get_vector(self, country_code=None, time_start=None, time_end=None, vocab=None):
-        """Construct a frequency vector for a country (or global if None)."""
+        """
+        Construct a frequency vector for a country (or global if None).
+        Time bounds apply at the matrix bucket granularity (whole days).
+        """
         if not vocab:
             vocab = self._get_global_vocab()
-            
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        
-        query = "SELECT word, COUNT(*) as cnt FROM error_events WHERE 1=1"
-        params = []
-        
+        matrix = self._refresh_matrix()
+        # Words outside the matrix get a zero column
+        known = [i for i, word in enumerate(vocab) if word in matrix.word_index]
+        cols = [matrix.word_index[vocab[i]] for i in known]
+
         if country_code:
-            query += " AND country_code = ?"
-            params.append(country_code)
-            
-        if time_start:
-            query += " AND timestamp >= ?"
-            params.append(time_start)
-            
-        if time_end:
-            query += " AND timestamp <= ?"
-            params.append(time_end)
-            
-        query += " GROUP BY word"
-        
-        cursor.execute(query, params)
-        counts = dict(cursor.fetchall())
-        conn.close()
-        
-        # Build vector based on fixed vocab dimensions
-        vector = np.array([counts.get(word, 0) for word in vocab], dtype=float)
+            values = matrix.country_vector(country_code, cols, time_start, time_end, normalize=False)
+        else:
+            values = matrix.global_vector(cols, time_start, time_end, normalize=False)
+        vector = np.zeros(len(vocab))
+        vector[known] = values
         
         # Normalize (L1 norm -> probability distribution)
-        total = np.sum(vector)
-        if total > 0:
-            vector = vector / total
-            
-        return vector
+        return l1_normalize(vector)
 
     def get_fingerprint_metrics(self, country_code):
         """
         T6.1 Fingerprint Distance Metric.
         Compare country's error distribution to global distribution.
         """
-        vocab = self._get_global_vocab()
-        v_global = self._get_vector(vocab=vocab) # Global vector
-        v_country = self._get_vector(country_code=country_code, vocab=vocab)
+        matrix = self._refresh_matrix()
+        cols = matrix.top_words()
+        vocab = [matrix.words[i] for i in cols]
+        v_global = matrix.global_vector(cols) # Global vector
+        v_country = matrix.country_vector(country_code, cols)
         
         if np.sum(v_country) == 0:
             return {"error": "Not enough data for country"}
@@ -97,12 +105,10 @@ class Analyzer:
         # Metrics
         # Cosine Distance (1 - similarity)
         # Euclidean Distance
-        # Mahalanobis requires covariance matrix, simplifying to Cityblock (Manhattan) for now as proxy or implementing logic if needed. 
-        # For Mahalanobis, we need a dataset of vectors to compute covariance. We only have 2 vectors here. 
-        # We'll stick to Cosine and Euclidean as primary.
-        
-        dist_cosine = cosine(v_global, v_country)
-        dist_euclidean = euclidean(v_global, v_country)
+        # Mahalanobis against the covariance of all country x month fingerprints
+        dist_cosine, dist_euclidean = (d[0] for d in matrix.distances_to(v_country, v_global))
+        cov = self._get_covariance(len(cols))
+        dist_mahalanobis = mahalanobis(v_country, v_global, cov["precision"]) if cov["precision"] is not None else None
         
         # Top distinctive words (where country freq > global freq)
         diff = v_country - v_global
@@ -115,81 +121,109 @@ class Analyzer:
         return {
             "cosine_distance": float(dist_cosine),
             "euclidean_distance": float(dist_euclidean),
+            "mahalanobis_distance": float(dist_mahalanobis) if dist_mahalanobis is not None else None,
+            "covariance": {"samples": cov["samples"], "shrinkage": cov["shrinkage"]},
             "distinctive_features": distinctive_words,
             "vector_dim": len(vocab)
         }
 
-    def analyze_stability(self, country_code):
+    def _get_covariance(self, vocab_size=100, min_events=20):
         """
-        T6.2 Country Stability Test.
-        Compare 'Within' similarity (Odd vs Even days).
+        Ledoit-Wolf covariance of the country x month fingerprints (periods with at
+        least `min_events` errors) and its inverse, refitted only when the data
+        version changes. Shrinkage keeps it invertible even though the L1-normalized
+        fingerprints are collinear and there are few periods per dimension.
         """
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        
-        # Get all timestamps for the country
-        cursor.execute('''
-            SELECT id, timestamp 
-            FROM error_events 
-            WHERE country_code = ? 
-            ORDER BY timestamp
-        ''', (country_code,))
-        rows = cursor.fetchall()
-        conn.close()
-        
-        if len(rows) < 10:
+        matrix = self._refresh_matrix()
+        key = (self._data_version(matrix), vocab_size, min_events)
+        if self._covariance is None or self._covariance["key"] != key:
+            _, counts = matrix.period_counts(matrix.top_words(vocab_size))
+            samples = l1_normalize(counts[counts.sum(axis=1) >= min_events])
+            fit = {"key": key, "samples": len(samples), "precision": None, "shrinkage": None}
+            if len(samples) >= 2:
+                lw = LedoitWolf().fit(samples)
+                fit.update(precision=lw.precision_, shrinkage=float(lw.shrinkage_))
+            self._covariance = fit
+        return self._covariance
+
+    def get_distance_matrix(self, metric="cosine", vocab_size=100):
+        """
+        T6.1 between-country similarity: all-pairs distances of the country fingerprints.
+        Returns (country codes, n x n float32 matrix, data version); cached until new events arrive.
+        """
+        if metric not in DISTANCE_METRICS:
+            raise ValueError(f"Unknown metric: {metric}")
+        matrix = self._refresh_matrix()
+        version = self._data_version(matrix)
+        key = (version, metric, vocab_size)
+        if key not in self._distance_cache:
+            if any(k[0] != version for k in self._distance_cache):
+                self._distance_cache = {}
+            vectors = matrix.country_vectors(matrix.top_words(vocab_size))
+            # Countries with no error in the vocabulary have no distribution to compare
+            present = np.flatnonzero(vectors.sum(axis=1) > 0)
+            countries = [matrix.countries[i] for i in present]
+            dist = pairwise_distances(vectors[present], metric).astype(np.float32)
+            self._distance_cache[key] = (countries, dist)
+        countries, dist = self._distance_cache[key]
+        return countries, dist, version
+
+    def analyze_stability(self, country_code, permutations=1000, seed=None, workers=None, vocab_size=100):
+        """
+        T6.2 Country Stability Test (permutation test).
+        Stability: similarity (1 - cosine distance) between the halves of
+        `permutations` random half-splits of the country's events, with a 95% interval.
+        Distinctness: the country's events vs. an equal-size sample of the rest of
+        the world; under the null (country labels exchangeable) the pooled events are
+        re-split `permutations` times, and the p-value is the share of null
+        similarities at or below the observed one.
+        """
+        start = time.perf_counter()
+        matrix = self._refresh_matrix()
+        cols = matrix.top_words(vocab_size)
+        dim = len(cols)
+        events = matrix.country_events(country_code, cols)
+        n = len(events)
+        if n < 10:
              return {"status": "insufficient_data", "stability_score": 0}
 
-        # Split into two sets (random permutation or simple split)
-        # User mentioned "permutation test", but simple Odd/Even ID split is a good proxy for internal consistency
-        ids_a = [r[0] for i, r in enumerate(rows) if i % 2 == 0]
-        ids_b = [r[0] for i, r in enumerate(rows) if i % 2 != 0]
-        
-        vocab = self._get_global_vocab()
-        
-        # Helper to build vector from IDs
-        def get_vec_from_ids(ids):
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            ph = ','.join('?' * len(ids))
-            cursor.execute(f"SELECT word, COUNT(*) FROM error_events WHERE id IN ({ph}) GROUP BY word", ids)
-            counts = dict(cursor.fetchall())
-            conn.close()
-            vec = np.array([counts.get(w, 0) for w in vocab], dtype=float)
-            if np.sum(vec) > 0: vec /= np.sum(vec)
-            return vec
-
-        v_a = get_vec_from_ids(ids_a)
-        v_b = get_vec_from_ids(ids_b)
-        
-        # Stability = 1 - Cosine Distance between halves
-        # If perfectly stable, random halves should be identical distribution.
-        stability = 1.0 - cosine(v_a, v_b)
-        
-        return {
-            "stability_score": float(stability), # 0 to 1
-            "sample_size": len(rows),
-            "interpretation": "High" if stability > 0.9 else "Moderate" if stability > 0.7 else "Low"
+        rng = np.random.default_rng(seed)
+        split = permutation_similarities(events, dim, permutations, rng.integers(2**63), workers)
+
+        # Rest of the world over the same dimensions (+ out of vocabulary), sampled to the country's size
+        country_counts = np.bincount(events, minlength=dim + 1).astype(float)
+        rest = np.bincount(matrix.vocab_positions(cols), weights=matrix.global_counts(), minlength=dim + 1) - country_counts
+        result = {
+            "stability_score": float(split.mean()), # 0 to 1
+            "stability_ci": [float(q) for q in np.percentile(split, [2.5, 97.5])],
+            "sample_size": n,
+            "permutations": permutations,
+            "interpretation": "High" if split.mean() > 0.9 else "Moderate" if split.mean() > 0.7 else "Low"
         }
+        if rest.sum() > 0:
+            reference = np.repeat(np.arange(dim + 1), rng.multinomial(n, rest / rest.sum()))
+            a, b = country_counts[:dim], np.bincount(reference, minlength=dim + 1)[:dim].astype(float)
+            observed = float(a @ b / (np.linalg.norm(a) * np.linalg.norm(b) or 1.0))
+            null = permutation_similarities(np.concatenate([events, reference]), dim, permutations, rng.integers(2**63), workers)
+            result.update({
+                "similarity_to_rest": observed,
+                "null_distribution": {
+                    "mean": float(null.mean()),
+                    "std": float(null.std()),
+                    "ci": [float(q) for q in np.percentile(null, [2.5, 97.5])],
+                },
+                "p_value": float((1 + np.sum(null <= observed)) / (permutations + 1)),
+            })
+        result["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        return result
 
     def analyze_evolution(self, country_code):
         """
         T6.3 Time Evolution Analysis.
         Annual drift curve & Change point detection.
         """
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        
-        # Get daily counts
-        cursor.execute('''
-            SELECT strftime('%Y-%m-%d', timestamp) as day, COUNT(*) 
-            FROM error_events 
-            WHERE country_code = ? 
-            GROUP BY day 
-            ORDER BY day
-        ''', (country_code,))
-        daily_counts = cursor.fetchall()
-        conn.close()
+        # Daily counts: the country's rows of the fingerprint matrix
+        daily_counts = self._refresh_matrix().country_timeline(country_code)
         
         if not daily_counts:
             return {"status": "no_data"}
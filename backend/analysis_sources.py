@@ -0,0 +1,175 @@
+"""
+Event sources for the Analyzer.
+
+The Analyzer only needs a few things from the event store, all served from
+one long-lived connection or an in-memory snapshot:
+
+    max_event_id(known)                 watermark: newest id such that no event with a
+                                        lower or equal id can still appear; `known` when
+                                        nothing newer is there, None if it can't tell now
+    aggregate(after_id, upto_id, bucket) (country code, bucket label, word, count)
+                                        rows for the events in (after_id, upto_id]
+    retention_version()                 changes whenever events were removed, so
+                                        aggregates kept so far must be rebuilt
+
+Implementations:
+    PostgresSource  production store (dictionary-encoded error_events), through
+                    the DataStorage connection pool
+    ArrowSource     columnar snapshot (pyarrow Table or Parquet file) with
+                    id, country_code, word, timestamp columns
+    SqliteSource    flat error_events table in a sqlite file, for tests
+
+source_from_env() picks one from ANALYSIS_SOURCE ("postgres", "parquet:<path>",
+"sqlite:<path>"), defaulting to Postgres when the storage has a database.
+"""
+import os
+import sqlite3
+import threading
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+try:
+    from backend.fingerprints import BUCKET_FORMATS, bucket_width
+except ImportError:
+    from fingerprints import BUCKET_FORMATS, bucket_width
+
+class EventSource:
+    def max_event_id(self, known=0):
+        raise NotImplementedError
+
+    def aggregate(self, after_id, upto_id, bucket):
+        raise NotImplementedError
+
+    def retention_version(self):
+        return 0
+
+    def close(self):
+        pass
+
+class PostgresSource(EventSource):
+    # date_trunc unit and to_char format of each bucket granularity
+    BUCKETS = {"day": ("day", "YYYY-MM-DD"), "month": ("month", "YYYY-MM")}
+
+    # How long max_event_id() waits for inserts in flight before giving up for this call
+    LOCK_TIMEOUT = "2s"
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def max_event_id(self, known=0):
+        """
+        Ids come from one sequence but commit out of order: a loader may still
+        commit id 9 after id 10 is visible. So the new maximum is read under a
+        SHARE lock, which waits for the inserts in flight and holds off new ones
+        for this one read. Every id up to it is then committed (or rolled back),
+        and later inserts draw higher ids. The lock is only taken when there is
+        something newer than `known`; None if it could not be taken in time.
+        """
+        with self.storage.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT COALESCE(MAX(id), 0) FROM error_events")
+            if cursor.fetchone()[0] <= known:
+                conn.rollback()
+                return known
+            try:
+                cursor.execute(f"SET LOCAL lock_timeout = '{self.LOCK_TIMEOUT}'")
+                cursor.execute("LOCK TABLE error_events IN SHARE MODE")
+                cursor.execute("SELECT COALESCE(MAX(id), 0) FROM error_events")
+                max_id = cursor.fetchone()[0]
+                conn.commit()
+                return max_id
+            except Exception as e:
+                conn.rollback()
+                if getattr(e, "pgcode", None) == "55P03": # lock_not_available
+                    return None
+                raise
+
+    def retention_version(self):
+        with self.storage.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT COALESCE(MAX(id), 0) FROM error_events_retention")
+            return cursor.fetchone()[0]
+
+    def aggregate(self, after_id, upto_id, bucket):
+        unit, fmt = self.BUCKETS.get(bucket, self.BUCKETS["day"])
+        with self.storage.get_connection() as conn:
+            cursor = conn.cursor()
+            # Group on the ids, then decode the (far fewer) groups
+            cursor.execute('''
+                SELECT c.code, to_char(t.bucket, %s), w.word, t.cnt
+                FROM (
+                    SELECT country_id, date_trunc(%s, timestamp) AS bucket, word_id, COUNT(*) AS cnt
+                    FROM error_events
+                    WHERE id > %s AND id <= %s AND word_id IS NOT NULL
+                    GROUP BY 1, 2, 3
+                ) t
+                JOIN countries c ON c.country_id = t.country_id
+                JOIN words w ON w.word_id = t.word_id
+            ''', (fmt, unit, after_id, upto_id))
+            return cursor.fetchall()
+
+class ArrowSource(EventSource):
+    def __init__(self, table):
+        if pa is None:
+            raise ImportError("pyarrow is required for ArrowSource")
+        if isinstance(table, str):
+            table = pq.read_table(table, columns=["id", "country_code", "word", "timestamp"])
+        self.table = table
+
+    def max_event_id(self, known=0):
+        value = pc.max(self.table["id"]).as_py()
+        return value or 0
+
+    def aggregate(self, after_id, upto_id, bucket):
+        ids = self.table["id"]
+        t = self.table.filter(pc.and_(pc.greater(ids, after_id), pc.less_equal(ids, upto_id)))
+        bucket = bucket if bucket in BUCKET_FORMATS else "day"
+        ts = t["timestamp"]
+        if pa.types.is_timestamp(ts.type) or pa.types.is_date(ts.type):
+            labels = pc.strftime(ts, format=BUCKET_FORMATS[bucket])
+        else:
+            # ISO strings: the label is a prefix
+            labels = pc.utf8_slice_codeunits(ts.cast(pa.string()), 0, bucket_width(bucket))
+        grouped = pa.table({"country": t["country_code"], "bucket": labels, "word": t["word"]}) \
+            .group_by(["country", "bucket", "word"]).aggregate([([], "count_all")])
+        return list(zip(*(grouped[c].to_pylist() for c in ("country", "bucket", "word", "count_all"))))
+
+class SqliteSource(EventSource):
+    def __init__(self, path):
+        self.path = path
+        # One connection for the Analyzer's lifetime; calls may come from worker threads
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+
+    def max_event_id(self, known=0):
+        with self.lock:
+            return self.conn.execute("SELECT MAX(id) FROM error_events").fetchone()[0] or 0
+
+    def aggregate(self, after_id, upto_id, bucket):
+        with self.lock:
+            return self.conn.execute('''
+                SELECT country_code, strftime(?, timestamp), word, COUNT(*)
+                FROM error_events
+                WHERE id > ? AND id <= ?
+                GROUP BY 1, 2, 3
+            ''', (BUCKET_FORMATS.get(bucket, BUCKET_FORMATS["day"]), after_id, upto_id)).fetchall()
+
+    def close(self):
+        self.conn.close()
+
+def source_from_env(storage):
+    """EventSource named by ANALYSIS_SOURCE, or Postgres; None when there is nothing to analyze."""
+    spec = os.getenv("ANALYSIS_SOURCE", "postgres")
+    kind, _, path = spec.partition(":")
+    if kind == "parquet":
+        return ArrowSource(path)
+    if kind == "sqlite":
+        return SqliteSource(path)
+    if kind == "postgres":
+        return PostgresSource(storage) if storage.use_postgres else None
+    raise ValueError(f"Unknown ANALYSIS_SOURCE: {spec}")
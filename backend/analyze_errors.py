@@ -1,18 +1,23 @@
-import json
 import os
 from collections import Counter
 import pandas as pd
 
+try:
+    from backend.article_io import iter_articles
+except ImportError:
+    from article_io import iter_articles
+
 def analyze_errors():
-    input_file = os.path.join("data", "detected_errors.json")
+    # JSONL is the detector's default output; older runs wrote a JSON array
+    candidates = [os.path.join("data", "detected_errors.jsonl"), os.path.join("data", "detected_errors.json")]
+    input_file = next((p for p in candidates if os.path.exists(p) and os.path.getsize(p) > 0), None)
     
-    if not os.path.exists(input_file):
-        print(f"File {input_file} not found. Run detect_errors.py first.")
+    if input_file is None:
+        print(f"File {candidates[0]} not found. Run detect_errors.py first.")
         return
         
     print(f"Loading error data from {input_file}...")
-    with open(input_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    data = [article for _, article in iter_articles(input_file)]
         
     print(f"Loaded {len(data)} articles with errors.")
     
@@ -0,0 +1,79 @@
+"""
+Incremental readers for article files (JSONL or JSON arrays), shared by the
+detector, the dedup stage and the database sync.
+"""
+import json
+
+def iter_articles(path, start_offset=0, skip=0, chunk_size=1 << 20):
+    """
+    Incrementally read articles from a JSONL file or a JSON array file.
+    Yields (offset, article) where offset is the position to resume from
+    once this article has been handled: a byte offset for JSONL input,
+    the article count for JSON array input. Resuming a JSON array still
+    decodes every element before `skip`, so only JSONL is read incrementally.
+    """
+    if path.endswith(".jsonl"):
+        with open(path, 'rb') as f:
+            f.seek(start_offset)
+            while True:
+                line = f.readline()
+                if not line:
+                    break
+                offset = f.tell()
+                if not line.endswith(b"\n"):
+                    # Last line of a file that may still be written to: only a complete
+                    # JSON value is taken; a partial one is left for the next read
+                    try:
+                        article = json.loads(line)
+                    except json.JSONDecodeError:
+                        break
+                    yield offset, article
+                    break
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield offset, json.loads(line)
+                except json.JSONDecodeError as e:
+                    print(f"Skipping malformed line ending at byte {offset}: {e}")
+        return
+
+    # Chunked JSON array reader: decode one element at a time from a rolling buffer
+    decoder = json.JSONDecoder()
+    index = 0
+    with open(path, 'r', encoding='utf-8') as f:
+        buf = ""
+        pos = 0
+        started = False
+        eof = False
+        while True:
+            # Skip whitespace, separators and the opening bracket
+            while pos < len(buf) and (buf[pos].isspace() or buf[pos] == ',' or (buf[pos] == '[' and not started)):
+                if buf[pos] == '[':
+                    started = True
+                pos += 1
+            if pos < len(buf) and buf[pos] == ']':
+                return
+            if pos >= len(buf) or not started:
+                if eof:
+                    return
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buf = buf[pos:] + chunk
+                pos = 0
+                continue
+            try:
+                article, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                # Element spans the chunk boundary, read more
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buf = buf[pos:] + chunk
+                pos = 0
+                continue
+            pos = end
+            index += 1
+            if index > skip:
+                yield index, article
@@ -0,0 +1,154 @@
+"""
+Async read path for the FastAPI app.
+
+DataStorage (storage.py) stays the synchronous owner of the schema, the
+startup sync and the stats cache, and is what the scripts use. Request
+handlers go through AsyncStorage instead: an asyncpg pool whose
+connections cache prepared statements, so a request waiting on Postgres
+parks a coroutine rather than a threadpool worker.
+
+Pool sizing comes from the environment:
+    DB_POOL_MIN_SIZE (2), DB_POOL_MAX_SIZE (20), DB_COMMAND_TIMEOUT (30s),
+    DB_STATEMENT_CACHE_SIZE (100; set 0 behind pgbouncer in transaction mode)
+Requests beyond the pool size queue on acquire; health() reports how many
+and for how long.
+"""
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+
+try:
+    import asyncpg
+except ImportError:
+    asyncpg = None
+
+try:
+    from backend.queries import registry, error_row, encode_cursor, decode_cursor, ERROR_TRENDS, ERROR_CURVE, ERRORS_PAGE, ARTICLE_COUNT
+except ImportError:
+    from queries import registry, error_row, encode_cursor, decode_cursor, ERROR_TRENDS, ERROR_CURVE, ERRORS_PAGE, ARTICLE_COUNT
+
+class AsyncStorage:
+    def __init__(self, storage):
+        # NO-DB mode (or no asyncpg): fall back to the sync storage, off the event loop
+        self.storage = storage
+        self.pool = None
+        self.min_size = int(os.getenv("DB_POOL_MIN_SIZE", "2"))
+        self.max_size = int(os.getenv("DB_POOL_MAX_SIZE", "20"))
+        self.command_timeout = float(os.getenv("DB_COMMAND_TIMEOUT", "30"))
+        self.statement_cache_size = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+        self.counters = {"acquired": 0, "waiting": 0, "max_waiting": 0, "wait_seconds": 0.0, "max_wait_seconds": 0.0, "errors": 0}
+
+    async def open(self):
+        if not self.storage.use_postgres:
+            return
+        if asyncpg is None:
+            print("WARNING: asyncpg not installed, API queries run on the sync pool.")
+            return
+        self.pool = await asyncpg.create_pool(
+            dsn=self.storage.db_url,
+            min_size=self.min_size,
+            max_size=self.max_size,
+            command_timeout=self.command_timeout,
+            statement_cache_size=self.statement_cache_size,
+        )
+        print(f"Async PostgreSQL pool initialized ({self.min_size}-{self.max_size} connections).")
+
+    async def close(self):
+        if self.pool is not None:
+            await self.pool.close()
+            self.pool = None
+
+    @asynccontextmanager
+    async def connection(self):
+        """Pooled connection; tracks queueing for health(). asyncpg resets it on release."""
+        c = self.counters
+        c["waiting"] += 1
+        c["max_waiting"] = max(c["max_waiting"], c["waiting"])
+        start = time.perf_counter()
+        try:
+            conn = await self.pool.acquire()
+        finally:
+            c["waiting"] -= 1
+        waited = time.perf_counter() - start
+        c["acquired"] += 1
+        c["wait_seconds"] += waited
+        c["max_wait_seconds"] = max(c["max_wait_seconds"], waited)
+        try:
+            yield conn
+        except Exception:
+            c["errors"] += 1
+            raise
+        finally:
+            await self.pool.release(conn)
+
+    async def get_article_count(self):
+        if self.pool is None:
+            return await asyncio.to_thread(self.storage.get_article_count)
+        async with self.connection() as conn:
+            return int(await registry.fetchval(conn, ARTICLE_COUNT))
+
+    async def get_errors_page(self, limit=100, cursor=None):
+        """Same contract as DataStorage.get_errors_page."""
+        if self.pool is None:
+            return await asyncio.to_thread(self.storage.get_errors_page, limit, cursor)
+
+        after_id, = decode_cursor(cursor, 1) if cursor else (0,)
+        async with self.connection() as conn:
+            rows = [error_row(r) for r in await registry.fetch(conn, ERRORS_PAGE, after_id, limit)]
+        next_cursor = encode_cursor(rows[-1]["id"]) if len(rows) == limit else None
+        return rows, next_cursor
+
+    async def get_error_trends(self, hours=24, limit=10):
+        if self.pool is None:
+            return await asyncio.to_thread(self.storage.get_error_trends, hours, limit)
+        async with self.connection() as conn:
+            rows = await registry.fetch(conn, ERROR_TRENDS, hours, limit)
+        return [{"word": r[0], "count": int(r[1])} for r in rows]
+
+    async def get_error_curve(self, hours=24):
+        if self.pool is None:
+            return await asyncio.to_thread(self.storage.get_error_curve, hours)
+        async with self.connection() as conn:
+            rows = await registry.fetch(conn, ERROR_CURVE, hours)
+        return [{"time": str(r[0]), "count": int(r[1])} for r in rows]
+
+    async def query_metrics(self):
+        """Latency histograms of the registered queries, plus plan cache counters summed over the idle pooled connections."""
+        report = {"queries": registry.report()}
+        if self.pool is not None:
+            # Held together, so every acquire returns another connection; busy ones are not waited for
+            conns = []
+            try:
+                for _ in range(self.pool.get_idle_size()):
+                    try:
+                        conns.append(await self.pool.acquire(timeout=0.05))
+                    except asyncio.TimeoutError:
+                        break
+                caches = [await registry.plan_cache(conn) for conn in conns]
+            finally:
+                for conn in conns:
+                    await self.pool.release(conn)
+            report["plan_cache"] = registry.merge_plan_caches(caches)
+            report["plan_cache_sampled"] = {"connections": len(conns), "pool_size": self.pool.get_size()}
+        return report
+
+    def health(self):
+        """Pool size and acquire queueing, for /api/ops/metrics."""
+        if self.pool is None:
+            return {"backend": "sync"}
+        c = self.counters
+        return {
+            "backend": "asyncpg",
+            "size": self.pool.get_size(),
+            "idle": self.pool.get_idle_size(),
+            "min_size": self.pool.get_min_size(),
+            "max_size": self.pool.get_max_size(),
+            "statement_cache_size": self.statement_cache_size,
+            "acquired": c["acquired"],
+            "waiting": c["waiting"],
+            "max_waiting": c["max_waiting"],
+            "avg_wait_ms": round(1000 * c["wait_seconds"] / max(c["acquired"], 1), 3),
+            "max_wait_ms": round(1000 * c["max_wait_seconds"], 3),
+            "errors": c["errors"],
+        }
@@ -0,0 +1,238 @@
+"""
+Paginated GDELT backfill (2016 - present).
+
+The GDELT Doc API returns at most 250 records per artlist query, so the
+(time range x country) space is cut into windows using the
+startdatetime/enddatetime and sourcecountry filters. Windows that come back
+saturated are split in half until they fit or reach the minimum slice.
+
+Completed windows are recorded in an append-only ledger, so a restarted
+backfill never refetches a finished slice. A window whose article downloads
+partly failed is recorded as partial with the failed articles; the next run
+retries only those, and marks the window done once none remain. Extracted articles are appended to
+the raw article store (JSONL), which the streaming detector reads directly:
+
+    python backend/backfill.py --start 2016-01-01 --countries GBR,IND --slice-hours 24
+    python backend/detect_errors.py --stream --input data/raw_articles.jsonl
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+from datetime import datetime, timedelta, timezone
+
+try:
+    from backend.data import DATA
+    from backend.fetch_news import GDELT_API_URL, fetch_gdelt_news, ExtractionPipeline, HtmlCache, crawler_from_args, add_crawler_args
+except ImportError:
+    from data import DATA
+    from fetch_news import GDELT_API_URL, fetch_gdelt_news, ExtractionPipeline, HtmlCache, crawler_from_args, add_crawler_args
+
+GDELT_MAX_RECORDS = 250
+GDELT_TIME_FORMAT = "%Y%m%d%H%M%S"
+
+def gdelt_country(name):
+    """GDELT sourcecountry filter value: country name, lowercase, without spaces/punctuation."""
+    return re.sub(r"[^a-z]", "", name.lower())
+
+def make_window(country, start, end):
+    return {
+        "key": f"{country['code']}:{start.strftime(GDELT_TIME_FORMAT)}-{end.strftime(GDELT_TIME_FORMAT)}",
+        "country": country,
+        "start": start,
+        "end": end
+    }
+
+def plan_windows(start, end, countries, slice_hours=24):
+    """Yield one window per (country, time slice). Generated lazily: the full plan can be millions of windows."""
+    step = timedelta(hours=slice_hours)
+    t = start
+    while t < end:
+        t_end = min(t + step, end)
+        for country in countries:
+            yield make_window(country, t, t_end)
+        t = t_end
+
+def split_window(window):
+    mid = window["start"] + (window["end"] - window["start"]) / 2
+    mid = mid.replace(microsecond=0)
+    return [make_window(window["country"], window["start"], mid),
+            make_window(window["country"], mid, window["end"])]
+
+class WindowLedger:
+    """Append-only JSONL record of completed windows, and of the articles still to retry in partial ones."""
+
+    def __init__(self, path):
+        self.path = path
+        self.completed = set()
+        self.retries = {} # window key -> article metadata whose download failed
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue # Torn last line from a crash
+                    if entry.get("status") == "done":
+                        self.completed.add(entry["key"])
+                        self.retries.pop(entry["key"], None)
+                    elif entry.get("status") == "partial":
+                        self.retries[entry["key"]] = entry.get("retry", [])
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def is_done(self, key):
+        return key in self.completed
+
+    def pending(self, key):
+        """Articles left to retry in a partial window, or None if the window was never listed."""
+        return self.retries.get(key)
+
+    def _append(self, entry):
+        self._file.write(json.dumps({**entry, "completed_at": datetime.now(timezone.utc).isoformat()}) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def record(self, key, **fields):
+        self._append({"key": key, "status": "done", **fields})
+        self.completed.add(key)
+        self.retries.pop(key, None)
+
+    def record_partial(self, key, retry, **fields):
+        self._append({"key": key, "status": "partial", "retry": retry, **fields})
+        self.retries[key] = retry
+
+    def close(self):
+        self._file.close()
+
+class Backfill:
+    def __init__(self, crawler, extractor, ledger, store_path, api_url=GDELT_API_URL,
+                 min_slice=timedelta(hours=1), article_workers=16):
+        self.crawler = crawler
+        self.extractor = extractor
+        self.ledger = ledger
+        self.store_path = store_path
+        self.api_url = api_url
+        self.min_slice = min_slice
+        self.article_workers = article_workers
+        self.windows_done = 0
+        self.windows_partial = 0
+        self.articles_stored = 0
+
+    async def fetch_window(self, window):
+        """
+        Article metadata for one window, splitting it while GDELT's record cap is hit.
+        Returns None if any request failed, so the window is not marked done.
+        """
+        articles = await fetch_gdelt_news(
+            self.crawler,
+            query=f"sourcelang:eng sourcecountry:{gdelt_country(window['country']['name'])}",
+            max_records=GDELT_MAX_RECORDS,
+            api_url=self.api_url,
+            extra_params={
+                "startdatetime": window["start"].strftime(GDELT_TIME_FORMAT),
+                "enddatetime": window["end"].strftime(GDELT_TIME_FORMAT),
+                "sort": "DateAsc"
+            }
+        )
+        if articles is not None and len(articles) >= GDELT_MAX_RECORDS and window["end"] - window["start"] > self.min_slice:
+            merged = []
+            for half in split_window(window):
+                part = await self.fetch_window(half)
+                if part is None:
+                    return None
+                merged.extend(part)
+            return merged
+        return articles
+
+    async def process_window(self, window):
+        """(window, articles listed, extracted articles, articles whose download failed), or None."""
+        # A partial window only retries its failed downloads, the rest is already stored
+        metadata = self.ledger.pending(window["key"])
+        if metadata is None:
+            metadata = await self.fetch_window(window)
+            if metadata is None:
+                return None
+        articles = []
+        failed = []
+        async for processed in self.extractor.run(metadata, download_workers=self.article_workers, failed=failed):
+            processed["country"] = processed.get("country") or window["country"]["name"]
+            articles.append(processed)
+        return window, len(metadata), articles, failed
+
+    def store(self, articles):
+        """Append articles to the raw store; fsync before the window is marked done."""
+        with open(self.store_path, 'a', encoding='utf-8') as f:
+            for article in articles:
+                f.write(json.dumps(article, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    async def run(self, windows, concurrency=8):
+        pending = (w for w in windows if not self.ledger.is_done(w["key"]))
+        async for result in self.crawler.map(self.process_window, pending, workers=concurrency):
+            if result is None:
+                continue # Window failed; not in the ledger, so it is retried next run
+            window, found, articles, failed = result
+            self.store(articles)
+            self.articles_stored += len(articles)
+            if failed:
+                # Not done: the next run retries just these downloads
+                self.ledger.record_partial(window["key"], failed, found=found, stored=len(articles))
+                self.windows_partial += 1
+                continue
+            self.ledger.record(window["key"], found=found, stored=len(articles))
+            self.windows_done += 1
+            if self.windows_done % 50 == 0:
+                print(f"[backfill] {self.windows_done} windows, {self.articles_stored} articles stored")
+
+def parse_date(value):
+    return datetime.strptime(value, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+
+async def main(args):
+    countries = DATA["COUNTRIES"]
+    if args.countries:
+        wanted = set(args.countries.upper().split(","))
+        countries = [c for c in countries if c["code"] in wanted]
+
+    start = parse_date(args.start)
+    end = parse_date(args.end) if args.end else datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    os.makedirs(os.path.dirname(args.store) or ".", exist_ok=True)
+
+    ledger = WindowLedger(args.ledger)
+    backfill = None
+    print(f"Backfill {start:%Y-%m-%d} -> {end:%Y-%m-%d %H:%M} for {len(countries)} countries "
+          f"({args.slice_hours}h slices, {len(ledger.completed)} windows already done, {len(ledger.retries)} partial)")
+    try:
+        async with crawler_from_args(args) as crawler:
+            # One extraction process pool shared by all concurrent windows
+            cache = None if args.no_cache else HtmlCache(args.html_cache)
+            extractor = ExtractionPipeline(crawler, workers=args.extract_workers, cache=cache)
+            try:
+                backfill = Backfill(crawler, extractor, ledger, args.store, api_url=args.gdelt_url,
+                                    min_slice=timedelta(hours=args.min_slice_hours))
+                await backfill.run(plan_windows(start, end, countries, args.slice_hours), concurrency=args.window_concurrency)
+            finally:
+                extractor.close()
+    finally:
+        ledger.close()
+    if backfill:
+        print(f"Done: {backfill.windows_done} windows, {backfill.articles_stored} articles appended to {args.store}"
+              f" ({backfill.windows_partial} windows with failed downloads left for the next run)")
+
+if __name__ == "__main__":
+    if os.name == 'nt':
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+
+    parser = argparse.ArgumentParser(description="Time-sliced GDELT backfill into the raw article store")
+    parser.add_argument("--start", default="2016-01-01", help="YYYY-MM-DD (UTC)")
+    parser.add_argument("--end", help="YYYY-MM-DD (UTC), defaults to now")
+    parser.add_argument("--countries", help="Comma separated ISO3 codes (default: all)")
+    parser.add_argument("--slice-hours", type=int, default=24, help="Initial window length")
+    parser.add_argument("--min-slice-hours", type=float, default=1, help="Stop splitting saturated windows below this")
+    parser.add_argument("--window-concurrency", type=int, default=8, help="Windows processed concurrently")
+    parser.add_argument("--store", default=os.path.join("data", "raw_articles.jsonl"), help="Raw article store (JSONL)")
+    parser.add_argument("--ledger", default=os.path.join("data", "backfill_ledger.jsonl"), help="Completed window ledger")
+    parser.add_argument("--gdelt-url", default=GDELT_API_URL)
+    add_crawler_args(parser)
+    asyncio.run(main(parser.parse_args()))
@@ -2,6 +2,11 @@ import csv
 import os
 from wordfreq import top_n_list, word_frequency
 
+try:
+    from backend.spell_checker import build_index
+except ImportError:
+    from spell_checker import build_index
+
 def build_symspell_dictionary():
     """
     Convert OEWN CSV vocabulary to SymSpell dictionary format (term count).
@@ -80,6 +85,11 @@ def build_symspell_dictionary():
     with open(output_txt, 'w', encoding='utf-8') as f:
         for lemma, count in lemma_counts.items():
             f.write(f"{lemma} {count}\n")
+
+    # 4. Precompile the SymSpell index (keyed by dictionary hash + parameters)
+    print("Precompiling SymSpell index...")
+    index_path = build_index(output_txt)
+    print(f"Index written to {index_path}")
             
     print("Done.")
 
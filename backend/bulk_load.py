@@ -0,0 +1,268 @@
+"""
+Bulk loader for error_events.
+
+Rows are streamed in bounded batches: each batch is serialized to CSV, sent with
+COPY FROM STDIN into a temporary text staging table, then resolved into the
+words/articles dictionaries and id-encoded error_events (schema.py) with
+ON CONFLICT (event_key, timestamp) DO NOTHING. Every event carries a
+deterministic event_key, so loading the same detection output twice is a no-op.
+Memory stays proportional to one batch, not to the whole payload.
+"""
+import csv
+import hashlib
+import io
+import os
+import time
+
+try:
+    from psycopg2.extras import execute_values
+except ImportError:
+    execute_values = None
+
+try:
+    from backend.article_io import iter_articles
+    from backend.partitions import ensure_partitions_for_table
+    from backend.schema import STAGE_COLUMNS, STAGE_SCHEMA, resolve_staged
+except ImportError:
+    from article_io import iter_articles
+    from partitions import ensure_partitions_for_table
+    from schema import STAGE_COLUMNS, STAGE_SCHEMA, resolve_staged
+
+def event_key(article, index, word):
+    """Natural key of the index-th error of an article."""
+    source = article.get("url") or f"{article.get('title', '')}|{article.get('date', '')}|{article.get('country', '')}"
+    return hashlib.sha1(f"{source}|{index}|{word}".encode('utf-8')).hexdigest()
+
+def article_event_rows(article, countries_map):
+    """Staging rows (STAGE_COLUMNS order) for one detected article."""
+    c_name = article.get("country", "Unknown")
+    meta = countries_map.get(c_name)
+    c_code = meta["code"] if meta else "UNK"
+    # Undated articles are staged without a timestamp; resolve_staged() gives them
+    # their article's first-load time, so replays produce the same (event_key, timestamp)
+    ts = article.get("scraped_at") or article.get("date")
+    title = article.get("title", "")
+    a_key = article_key(article)
+
+    for i, err in enumerate(article.get("errors", [])):
+        word = err.get("word", "").lower()
+        yield (
+            c_code,
+            c_name,
+            word,
+            err.get("suggestion") or None,
+            ts,
+            err.get("context", ""),
+            title,
+            event_key(article, i, word),
+            a_key
+        )
+
+class BulkLoader:
+    def __init__(self, conn, batch_size=50_000):
+        self.conn = conn
+        self.batch_size = batch_size
+        self.rows = 0
+        self.inserted = 0
+        self.seconds = 0.0
+
+    def _copy_batch(self, cursor, batch):
+        buf = io.StringIO()
+        # Every value is written quoted (None as ""), so text columns keep ''; an
+        # empty timestamp or suggestion can only mean a missing one, which FORCE_NULL turns into NULL
+        csv.writer(buf, quoting=csv.QUOTE_NONNUMERIC, lineterminator="\n").writerows(batch)
+        buf.seek(0)
+        cursor.execute("TRUNCATE error_events_stage")
+        cursor.copy_expert(f"COPY error_events_stage ({', '.join(STAGE_COLUMNS)}) FROM STDIN "
+                           "WITH (FORMAT csv, FORCE_NULL (suggestion, timestamp))", buf)
+        # Monthly partitions for the batch must exist, or rows would land in the default partition
+        ensure_partitions_for_table(cursor, "error_events_stage")
+        return resolve_staged(cursor, "error_events_stage")
+
+    def load(self, rows, commit=True):
+        """
+        Load an iterable of STAGE_COLUMNS tuples. Each batch is committed on its
+        own (replays are safe thanks to event_key). Returns the number of new rows.
+        """
+        start = time.perf_counter()
+        inserted = 0
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute(STAGE_SCHEMA.format(stage="error_events_stage"))
+            batch = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= self.batch_size:
+                    inserted += self._copy_batch(cursor, batch)
+                    self.rows += len(batch)
+                    batch = []
+                    if commit:
+                        self.conn.commit()
+            if batch:
+                inserted += self._copy_batch(cursor, batch)
+                self.rows += len(batch)
+            if commit:
+                self.conn.commit()
+        finally:
+            cursor.close()
+        self.inserted += inserted
+        self.seconds += time.perf_counter() - start
+        return inserted
+
+    def report(self):
+        rate = self.rows / max(self.seconds, 1e-9)
+        return (f"{self.inserted} new of {self.rows} rows in {self.seconds:.2f}s "
+                f"({rate:,.0f} rows/s, {self.rows - self.inserted} already present)")
+
+def article_key(article):
+    """Natural key of a detected article (same identity as used for event_key)."""
+    source = article.get("url") or f"{article.get('title', '')}|{article.get('date', '')}|{article.get('country', '')}"
+    return hashlib.sha1(source.encode('utf-8')).hexdigest()
+
+def file_fingerprint(path, length):
+    """sha256 of the first `length` bytes: tells an appended file from a rewritten one."""
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read(length)).hexdigest()
+
+LEDGER_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS ingest_ledger (
+        source TEXT PRIMARY KEY,
+        file_size BIGINT,
+        head_length INTEGER,
+        head_sha256 TEXT,
+        resume_offset BIGINT,
+        articles BIGINT,
+        events BIGINT,
+        updated_at TIMESTAMP DEFAULT NOW()
+    );
+    CREATE TABLE IF NOT EXISTS ingested_articles (
+        article_key TEXT PRIMARY KEY,
+        source TEXT,
+        events INTEGER,
+        loaded_at TIMESTAMP DEFAULT NOW()
+    );
+'''
+
+class IngestLedger:
+    """
+    Tracks how far each detection output file has been loaded into error_events:
+    resume offset (byte offset for JSONL, article count for JSON arrays), a
+    fingerprint of the file head, and the keys of every loaded article.
+    A sync reads only what was appended since the last one; a rewritten file
+    is replayed from the start, skipping known articles, and event_key
+    uniqueness keeps any overlap from being inserted twice.
+
+    Only JSONL syncs incrementally (a seek to the byte offset). A changed JSON
+    array is re-decoded from its start up to the resume count, so each sync
+    costs O(file); the detector writes JSONL by default for that reason.
+
+    Events imported before the ledger existed have no event_key, so nothing
+    would stop a replay of their source file. sync(legacy=True) instead marks
+    such a file as loaded on its first sync when legacy events exist: the old
+    importer only ran on an empty table, so it never loaded a file twice either.
+    """
+
+    HEAD_BYTES = 64 * 1024
+
+    def __init__(self, conn, batch_size=1000):
+        self.conn = conn
+        self.batch_size = batch_size
+        with conn.cursor() as cursor:
+            cursor.execute(LEDGER_SCHEMA)
+        conn.commit()
+
+    def _entry(self, cursor, source):
+        cursor.execute('''
+            SELECT file_size, head_length, head_sha256, resume_offset, articles, events
+            FROM ingest_ledger WHERE source = %s
+        ''', (source,))
+        row = cursor.fetchone()
+        if not row:
+            return None
+        keys = ("file_size", "head_length", "head_sha256", "resume_offset", "articles", "events")
+        return dict(zip(keys, row))
+
+    def _has_legacy_events(self, cursor):
+        cursor.execute("SELECT 1 FROM error_events WHERE event_key IS NULL LIMIT 1")
+        return cursor.fetchone() is not None
+
+    def _known_articles(self, cursor, keys):
+        cursor.execute("SELECT article_key FROM ingested_articles WHERE article_key = ANY(%s)", (list(keys),))
+        return {row[0] for row in cursor.fetchall()}
+
+    def sync(self, path, countries_map, loader=None, legacy=False):
+        """
+        Load articles appended to `path` since the last sync.
+        legacy: `path` may have been imported by the pre-ledger loader (see above).
+        Returns (articles loaded, new events).
+        """
+        source = os.path.abspath(path)
+        size = os.path.getsize(path)
+        loader = loader or BulkLoader(self.conn)
+        cursor = self.conn.cursor()
+        try:
+            entry = self._entry(cursor, source)
+            if entry and size >= entry["head_length"] and file_fingerprint(path, entry["head_length"]) == entry["head_sha256"]:
+                if size == entry["file_size"]:
+                    return 0, 0 # Unchanged since the last sync
+                resume = entry["resume_offset"]
+                totals = [entry["articles"], entry["events"]]
+            else:
+                if entry:
+                    print(f"{path} was rewritten, replaying it (already loaded articles are skipped)")
+                resume = 0
+                totals = [0, 0]
+            adopt = legacy and entry is None and self._has_legacy_events(cursor)
+            if adopt:
+                print(f"{path} was imported before the ingestion ledger existed, recording its articles as loaded")
+
+            head_length = min(size, self.HEAD_BYTES)
+            head_sha256 = file_fingerprint(path, head_length)
+            if path.endswith(".jsonl"):
+                articles = iter_articles(path, start_offset=resume)
+            else:
+                articles = iter_articles(path, skip=resume)
+
+            loaded = new_events = 0
+            batch = []
+
+            def flush(offset):
+                nonlocal loaded, new_events
+                keyed = {article_key(a): a for a in batch}
+                known = self._known_articles(cursor, keyed)
+                fresh = [(k, a) for k, a in keyed.items() if k not in known]
+                if not adopt:
+                    rows = (row for _, a in fresh for row in article_event_rows(a, countries_map))
+                    new_events += loader.load(rows, commit=False)
+                    loaded += len(fresh)
+                if fresh:
+                    execute_values(cursor, '''
+                        INSERT INTO ingested_articles (article_key, source, events) VALUES %s
+                        ON CONFLICT (article_key) DO NOTHING
+                    ''', [(k, source, len(a.get("errors", []))) for k, a in fresh])
+                totals[0] += len(fresh)
+                totals[1] += sum(len(a.get("errors", [])) for _, a in fresh)
+                # Ledger position and loaded rows commit together
+                cursor.execute('''
+                    INSERT INTO ingest_ledger (source, file_size, head_length, head_sha256, resume_offset, articles, events, updated_at)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, NOW())
+                    ON CONFLICT (source) DO UPDATE SET
+                        file_size = EXCLUDED.file_size, head_length = EXCLUDED.head_length,
+                        head_sha256 = EXCLUDED.head_sha256, resume_offset = EXCLUDED.resume_offset,
+                        articles = EXCLUDED.articles, events = EXCLUDED.events, updated_at = NOW()
+                ''', (source, size, head_length, head_sha256, offset, totals[0], totals[1]))
+                self.conn.commit()
+                batch.clear()
+
+            offset = resume
+            for offset, article in articles:
+                batch.append(article)
+                if len(batch) >= self.batch_size:
+                    flush(offset)
+            flush(offset)
+            return loaded, new_events
+        except Exception:
+            self.conn.rollback()
+            raise
+        finally:
+            cursor.close()
@@ -0,0 +1,238 @@
+"""
+High-concurrency HTTP crawler engine built on aiohttp.
+
+- One shared ClientSession over a tuned TCPConnector (DNS cache, keep-alive, limit_per_host).
+- A global semaphore caps requests in flight.
+- Per-domain token buckets keep us polite to each outlet.
+- Retries with exponential backoff + jitter on timeouts, connection errors, 429 and 5xx
+  (Retry-After is honoured).
+- Live throughput metrics, printed periodically and available via metrics.snapshot().
+
+All endpoints are plain URLs, so the engine can be pointed at a local stub server
+(see scripts/stub_news_server.py).
+"""
+import asyncio
+import random
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+import aiohttp
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens per second, bursts up to `capacity`."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+class CrawlerMetrics:
+    def __init__(self):
+        self.started = time.monotonic()
+        self.requests = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.retries = 0
+        self.bytes = 0
+        self.in_flight = 0
+        self.statuses = Counter()
+
+    def snapshot(self):
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        return {
+            "elapsed_s": elapsed,
+            "requests": self.requests,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "retries": self.retries,
+            "in_flight": self.in_flight,
+            "bytes": self.bytes,
+            "requests_per_s": self.requests / elapsed,
+            "mb_per_s": self.bytes / elapsed / 1e6,
+            "statuses": dict(self.statuses)
+        }
+
+    def format(self):
+        s = self.snapshot()
+        return (f"[crawler] {s['requests']} req ({s['requests_per_s']:.1f}/s), "
+                f"ok={s['succeeded']} fail={s['failed']} retry={s['retries']} "
+                f"in-flight={s['in_flight']} {s['mb_per_s']:.2f} MB/s")
+
+class FetchResult:
+    def __init__(self, url, status, body, headers, encoding=None):
+        self.url = url
+        self.status = status
+        self.body = body
+        self.headers = headers
+        self.encoding = encoding
+
+    def text(self):
+        return self.body.decode(self.encoding or 'utf-8', errors='replace')
+
+class Crawler:
+    def __init__(self, concurrency=64, limit_per_host=8, per_domain_rate=2.0, per_domain_burst=4,
+                 timeout=10, max_retries=3, backoff_base=0.5, backoff_max=30.0,
+                 user_agent="SpellAtlasBot/1.0", report_interval=10.0):
+        self.concurrency = concurrency
+        self.limit_per_host = limit_per_host
+        self.per_domain_rate = per_domain_rate
+        self.per_domain_burst = per_domain_burst
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.user_agent = user_agent
+        self.report_interval = report_interval
+
+        self.metrics = CrawlerMetrics()
+        self.session = None
+        self._semaphore = None
+        self._buckets = {}
+        self._reporter = None
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(
+            limit=self.concurrency,
+            limit_per_host=self.limit_per_host,
+            ttl_dns_cache=300,
+            keepalive_timeout=30,
+            enable_cleanup_closed=True
+        )
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=self.timeout,
+            headers={"User-Agent": self.user_agent}
+        )
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        if self.report_interval:
+            self._reporter = asyncio.create_task(self._report_loop())
+        return self
+
+    async def __aexit__(self, *exc):
+        if self._reporter:
+            self._reporter.cancel()
+            try:
+                await self._reporter
+            except asyncio.CancelledError:
+                pass
+        await self.session.close()
+        print(self.metrics.format())
+
+    async def _report_loop(self):
+        while True:
+            await asyncio.sleep(self.report_interval)
+            print(self.metrics.format())
+
+    def _bucket(self, url):
+        domain = urlsplit(url).netloc.lower()
+        bucket = self._buckets.get(domain)
+        if bucket is None:
+            bucket = TokenBucket(self.per_domain_rate, self.per_domain_burst)
+            self._buckets[domain] = bucket
+        return bucket
+
+    def _backoff(self, attempt, retry_after=None):
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        delay = min(self.backoff_base * (2 ** attempt), self.backoff_max)
+        return delay * (0.5 + random.random() / 2)
+
+    async def fetch(self, url, params=None, headers=None):
+        """
+        GET `url` with rate limiting and retries.
+        Returns a FetchResult (also for non-retryable HTTP errors), or None when
+        every attempt failed with a network error/timeout or a retryable status.
+        """
+        bucket = self._bucket(url)
+        for attempt in range(self.max_retries + 1):
+            await bucket.acquire()
+            retry_after = None
+            async with self._semaphore:
+                self.metrics.requests += 1
+                self.metrics.in_flight += 1
+                try:
+                    async with self.session.get(url, params=params, headers=headers) as resp:
+                        self.metrics.statuses[resp.status] += 1
+                        if resp.status in RETRY_STATUSES:
+                            retry_after = resp.headers.get("Retry-After")
+                            error = f"HTTP {resp.status}"
+                        else:
+                            body = await resp.read()
+                            self.metrics.bytes += len(body)
+                            self.metrics.succeeded += 1
+                            return FetchResult(str(resp.url), resp.status, body, resp.headers, resp.charset)
+                except asyncio.TimeoutError:
+                    error = "Timeout"
+                except aiohttp.ClientError as e:
+                    error = str(e) or e.__class__.__name__
+                finally:
+                    self.metrics.in_flight -= 1
+
+            if attempt < self.max_retries:
+                self.metrics.retries += 1
+                await asyncio.sleep(self._backoff(attempt, retry_after))
+
+        self.metrics.failed += 1
+        print(f"Giving up on {url}: {error}")
+        return None
+
+    async def map(self, fn, items, workers=None):
+        """
+        Apply async `fn` to every item with a fixed pool of worker tasks, yielding
+        results as they complete. Unlike gather() over all items, the number of
+        pending coroutines stays bounded for arbitrarily long inputs.
+        """
+        workers = workers or self.concurrency
+        queue = asyncio.Queue(maxsize=workers * 2)
+        results = asyncio.Queue(maxsize=workers * 2)
+        done = object()
+
+        async def worker():
+            while True:
+                item = await queue.get()
+                if item is done:
+                    await results.put(done)
+                    return
+                try:
+                    await results.put(await fn(item))
+                except Exception as e:
+                    print(f"Crawler task failed: {e}")
+                    await results.put(None)
+
+        async def feeder():
+            for item in items:
+                await queue.put(item)
+            for _ in range(workers):
+                await queue.put(done)
+
+        tasks = [asyncio.create_task(worker()) for _ in range(workers)]
+        tasks.append(asyncio.create_task(feeder()))
+        try:
+            finished = 0
+            while finished < workers:
+                result = await results.get()
+                if result is done:
+                    finished += 1
+                else:
+                    yield result
+        finally:
+            for t in tasks:
+                t.cancel()
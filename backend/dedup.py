@@ -0,0 +1,298 @@
+"""
+Deduplication stage between fetch and detect.
+
+GDELT lists the same wire story once per syndicating outlet, so without this
+stage every copy is tagged, spell-checked and counted against its outlet's
+country. Two filters run over the raw article store:
+
+1. Exact: URLs are canonicalized (scheme/host case, www., default ports,
+   fragments, tracking parameters, AMP variants, trailing slashes).
+2. Near-duplicate: MinHash signatures over word 5-gram shingles, bucketed with
+   LSH banding; bucket collisions are confirmed by estimated Jaccard similarity.
+
+Signatures, LSH buckets and URL mappings live in a persistent SQLite index, so
+incremental runs compare new articles against everything seen before. Each
+unique article is written once with a `dedup_id`; every copy is recorded in the
+index against the first-seen article, which keeps the attribution stable.
+
+    python backend/backfill.py ...
+    python backend/dedup.py --input data/raw_articles.jsonl --output data/unique_articles.jsonl
+    python backend/detect_errors.py --stream --input data/unique_articles.jsonl
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+import zlib
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+import numpy as np
+
+try:
+    from backend.article_io import iter_articles
+except ImportError:
+    from article_io import iter_articles
+
+TRACKING_PARAMS = {"fbclid", "gclid", "dclid", "msclkid", "mc_cid", "mc_eid", "ocid", "cmpid",
+                   "ito", "icid", "ncid", "ref", "ref_src", "rss", "cmp", "s_cid", "smid", "amp"}
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+WORD_RE = re.compile(r"\w+")
+
+def canonicalize_url(url):
+    """Normalize a URL so trivially different links to the same page compare equal. None for an empty URL."""
+    if not url or not url.strip():
+        return None
+    try:
+        parts = urlsplit(url.strip())
+    except ValueError:
+        return url
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+
+    path = re.sub(r"/+", "/", parts.path or "/")
+    path = re.sub(r"(/amp)+/?$|\.amp(?=\.html?$)", "", path) or "/"
+    if len(path) > 1:
+        path = path.rstrip("/")
+
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                   if not k.lower().startswith("utm_") and k.lower() not in TRACKING_PARAMS)
+    # http and https copies of a page are the same document
+    return urlunsplit(("https", host, path, urlencode(query), ""))
+
+def shingles(text, k=5):
+    """Stable 32-bit hashes of the lowercased word k-grams of `text`."""
+    words = WORD_RE.findall(text.lower())
+    if len(words) < k:
+        grams = [" ".join(words)] if words else []
+    else:
+        grams = [" ".join(words[i:i + k]) for i in range(len(words) - k + 1)]
+    return np.fromiter((zlib.crc32(g.encode('utf-8')) for g in grams), dtype=np.uint64, count=len(grams))
+
+class MinHasher:
+    """MinHash over universal hash permutations (a*x + b) mod p, truncated to 32 bits."""
+
+    def __init__(self, num_perm=128, seed=1):
+        rng = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        self.a = rng.randint(1, 1 << 61, size=num_perm, dtype=np.uint64)
+        self.b = rng.randint(0, 1 << 61, size=num_perm, dtype=np.uint64)
+
+    def signature(self, hashes):
+        if len(hashes) == 0:
+            return np.full(self.num_perm, MAX_HASH, dtype=np.uint32)
+        # uint64 products wrap; that is fine for a hash family
+        with np.errstate(over='ignore'):
+            permuted = (np.outer(hashes, self.a) + self.b) % MERSENNE_PRIME & MAX_HASH
+        return permuted.min(axis=0).astype(np.uint32)
+
+def similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity of two MinHash signatures."""
+    return float(np.mean(sig_a == sig_b))
+
+class DedupIndex:
+    """Persistent URL map, MinHash signatures and LSH buckets (SQLite)."""
+
+    def __init__(self, path, num_perm=128, bands=16, threshold=0.8, shingle_size=5):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS documents (
+                doc_id INTEGER PRIMARY KEY,
+                canonical_url TEXT,
+                url TEXT,
+                title TEXT,
+                country TEXT,
+                date TEXT,
+                signature BLOB
+            );
+            CREATE TABLE IF NOT EXISTS urls (
+                canonical_url TEXT PRIMARY KEY,
+                doc_id INTEGER
+            );
+            CREATE TABLE IF NOT EXISTS bands (
+                band INTEGER,
+                bucket INTEGER,
+                doc_id INTEGER
+            );
+            CREATE INDEX IF NOT EXISTS idx_bands ON bands (band, bucket);
+            CREATE TABLE IF NOT EXISTS duplicates (
+                url TEXT,
+                doc_id INTEGER,
+                kind TEXT,
+                similarity REAL,
+                country TEXT,
+                date TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_duplicates_doc ON duplicates (doc_id);
+        ''')
+        params = {"num_perm": num_perm, "bands": bands, "shingle_size": shingle_size}
+        stored = self.get_meta("params")
+        if stored and json.loads(stored) != params:
+            raise ValueError(f"{path} was built with {stored}; use the same MinHash settings or a new index")
+        self.set_meta("params", json.dumps(params))
+        self.conn.commit()
+
+        self.hasher = MinHasher(num_perm)
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.unique = 0
+        self.url_duplicates = 0
+        self.near_duplicates = 0
+
+    def get_meta(self, key):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key, value):
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def _buckets(self, signature):
+        for band in range(self.bands):
+            chunk = signature[band * self.rows:(band + 1) * self.rows].tobytes()
+            yield band, int.from_bytes(hashlib.blake2b(chunk, digest_size=8).digest(), 'little', signed=True)
+
+    def _near_duplicate(self, signature, buckets):
+        """Best matching earlier document at or above the threshold, as (doc_id, similarity)."""
+        candidates = set()
+        for band, bucket in buckets:
+            rows = self.conn.execute("SELECT doc_id FROM bands WHERE band = ? AND bucket = ?", (band, bucket))
+            candidates.update(r[0] for r in rows)
+        best = (None, 0.0)
+        for doc_id in candidates:
+            (blob,) = self.conn.execute("SELECT signature FROM documents WHERE doc_id = ?", (doc_id,)).fetchone()
+            sim = similarity(signature, np.frombuffer(blob, dtype=np.uint32))
+            if sim >= self.threshold and sim > best[1]:
+                best = (doc_id, sim)
+        return best
+
+    def _record_duplicate(self, article, doc_id, kind, sim):
+        self.conn.execute(
+            "INSERT INTO duplicates (url, doc_id, kind, similarity, country, date) VALUES (?, ?, ?, ?, ?, ?)",
+            (article.get("url"), doc_id, kind, sim, article.get("country"), article.get("date")))
+
+    def add(self, article):
+        """
+        Register an article. Returns its new doc_id if it is unique, or None if
+        it duplicates an article already in the index (the copy is recorded).
+        """
+        canonical = canonicalize_url(article.get("url"))
+        # Articles without a URL are only checked by MinHash
+        row = self.conn.execute("SELECT doc_id FROM urls WHERE canonical_url = ?", (canonical,)).fetchone() if canonical else None
+        if row:
+            self._record_duplicate(article, row[0], "url", 1.0)
+            self.url_duplicates += 1
+            return None
+
+        hashes = shingles(article.get("content") or "", self.shingle_size)
+        signature = self.hasher.signature(hashes)
+        buckets = list(self._buckets(signature))
+        # Articles without text only dedup by URL
+        match, sim = self._near_duplicate(signature, buckets) if len(hashes) else (None, 0.0)
+        if match is not None:
+            if canonical:
+                self.conn.execute("INSERT INTO urls (canonical_url, doc_id) VALUES (?, ?)", (canonical, match))
+            self._record_duplicate(article, match, "near", sim)
+            self.near_duplicates += 1
+            return None
+
+        cursor = self.conn.execute(
+            "INSERT INTO documents (canonical_url, url, title, country, date, signature) VALUES (?, ?, ?, ?, ?, ?)",
+            (canonical, article.get("url"), article.get("title"), article.get("country"), article.get("date"),
+             signature.tobytes()))
+        doc_id = cursor.lastrowid
+        if canonical:
+            self.conn.execute("INSERT INTO urls (canonical_url, doc_id) VALUES (?, ?)", (canonical, doc_id))
+        self.conn.executemany("INSERT INTO bands (band, bucket, doc_id) VALUES (?, ?, ?)",
+                              [(band, bucket, doc_id) for band, bucket in buckets])
+        self.unique += 1
+        return doc_id
+
+    def commit(self):
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+def run(input_file, output_file, index_path, threshold=0.8, commit_every=1000, restart=False):
+    """
+    Stream `input_file`, append unique articles to `output_file` (JSONL).
+    Progress (input/output offsets) is committed together with the index, so
+    an interrupted or repeated run only handles articles it has not seen.
+    """
+    if restart:
+        for path in (index_path, output_file):
+            if os.path.exists(path):
+                os.remove(path)
+    os.makedirs(os.path.dirname(index_path) or ".", exist_ok=True)
+    os.makedirs(os.path.dirname(output_file) or ".", exist_ok=True)
+    index = DedupIndex(index_path, threshold=threshold)
+
+    out = open(output_file, 'r+b' if os.path.exists(output_file) else 'w+b')
+    out.seek(0, os.SEEK_END)
+    progress = json.loads(index.get_meta("progress") or "{}")
+    if progress.get("input_file") == os.path.abspath(input_file):
+        # Drop output written after the last committed index state
+        out.truncate(progress["output_offset"])
+        out.seek(progress["output_offset"])
+    else:
+        progress = {"input_file": os.path.abspath(input_file), "input_offset": 0, "output_offset": out.tell()}
+
+    if input_file.endswith(".jsonl"):
+        articles = iter_articles(input_file, start_offset=progress["input_offset"])
+    else:
+        articles = iter_articles(input_file, skip=progress["input_offset"])
+
+    def commit():
+        out.flush()
+        os.fsync(out.fileno())
+        progress["output_offset"] = out.tell()
+        index.set_meta("progress", json.dumps(progress))
+        index.commit()
+
+    start_time = time.time()
+    seen = 0
+    try:
+        for offset, article in articles:
+            doc_id = index.add(article)
+            if doc_id is not None:
+                article["dedup_id"] = doc_id
+                out.write(json.dumps(article, ensure_ascii=False).encode('utf-8') + b"\n")
+            progress["input_offset"] = offset
+            seen += 1
+            if seen % commit_every == 0:
+                commit()
+                print(f"  {seen} articles ({seen / max(time.time() - start_time, 1e-9):.1f}/s), "
+                      f"{index.unique} unique, {index.url_duplicates} URL dups, {index.near_duplicates} near dups")
+        commit()
+    finally:
+        out.close()
+        index.close()
+
+    dups = index.url_duplicates + index.near_duplicates
+    print(f"Dedup: {seen} articles in {time.time() - start_time:.2f}s -> {index.unique} unique "
+          f"({index.url_duplicates} URL duplicates, {index.near_duplicates} near duplicates, "
+          f"{dups / max(seen, 1):.1%} skipped)")
+    print(f"Unique articles appended to {output_file}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="URL + MinHash/LSH deduplication of scraped articles")
+    parser.add_argument("--input", default=os.path.join("data", "raw_articles.jsonl"), help="Articles (.jsonl or .json array)")
+    parser.add_argument("--output", default=os.path.join("data", "unique_articles.jsonl"), help="Unique articles (JSONL, appended)")
+    parser.add_argument("--index", default=os.path.join("data", "dedup_index.sqlite"), help="Persistent signature index")
+    parser.add_argument("--threshold", type=float, default=0.8, help="Estimated Jaccard similarity treated as duplicate")
+    parser.add_argument("--commit-every", type=int, default=1000)
+    parser.add_argument("--restart", action="store_true", help="Discard the index and output and start over")
+    args = parser.parse_args()
+    run(args.input, args.output, args.index, threshold=args.threshold,
+        commit_every=args.commit_every, restart=args.restart)
@@ -1,60 +1,87 @@
+import argparse
 import json
 import os
 import sys
 import time
 import multiprocessing
+from collections import deque
 from concurrent.futures import ProcessPoolExecutor
 import nltk
-from nltk.stem import WordNetLemmatizer
-from nltk.corpus import wordnet
 
 # Add project root to path to import hardware
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import hardware
 
 try:
-    from backend.spell_checker import SpellChecker
+    from backend.spell_checker import SpellChecker, index_key
+    from backend.nlp_backends import BACKENDS, get_backend
+    from backend.shared_dictionary import SharedDictionary, export_shared_dictionary, read_header, FORMAT_VERSION
+    from backend.article_io import iter_articles
 except ImportError:
-    from spell_checker import SpellChecker
+    from spell_checker import SpellChecker, index_key
+    from nlp_backends import BACKENDS, get_backend
+    from shared_dictionary import SharedDictionary, export_shared_dictionary, read_header, FORMAT_VERSION
+    from article_io import iter_articles
 
 # Global variables for worker processes (Lightweight)
-worker_lemmatizer = None
-worker_whitelist = None
+worker_backend = None
+worker_checker = None
 
-def get_wordnet_pos(treebank_tag):
-    if treebank_tag.startswith('J'):
-        return wordnet.ADJ
-    elif treebank_tag.startswith('V'):
-        return wordnet.VERB
-    elif treebank_tag.startswith('N'):
-        return wordnet.NOUN
-    elif treebank_tag.startswith('R'):
-        return wordnet.ADV
-    else:
-        return wordnet.NOUN # Default to noun
-
-def init_worker(whitelist_path):
-    """Initialize lightweight resources for each worker process (No Dictionary)."""
-    global worker_lemmatizer, worker_whitelist
+def init_worker(whitelist_path, backend_name="nltk", backend_options=None, shared_dict_path=None, cache_size=0, cache_path=None):
+    """
+    Initialize lightweight resources for each worker process.
+    The dictionary is only attached when a shared (mmap) export is given,
+    in which case the pages are shared with every other worker.
+    """
+    global worker_backend, worker_checker
+    
+    # Whitelist + Lemmatizer + Tagger only (Small memory footprint)
+    try:
+        worker_backend = get_backend(backend_name, whitelist_path=whitelist_path, **(backend_options or {}))
+    except Exception as e:
+        print(f"Worker failed to initialize NLP backend '{backend_name}': {e}")
     
-    # Load Whitelist
-    worker_whitelist = set()
-    if os.path.exists(whitelist_path):
+    if shared_dict_path:
         try:
-            with open(whitelist_path, 'r', encoding='utf-8') as f:
-                for line in f:
-                    w = line.strip()
-                    if w:
-                        worker_whitelist.add(w)
-                        worker_whitelist.add(w.lower())
+            worker_checker = SharedDictionary(shared_dict_path)
+            if cache_size:
+                # Warm start from the persisted cache; new verdicts go back to the parent
+                # with each batch (detect_batch), and the parent owns saving
+                worker_checker.enable_verdict_cache(cache_size, cache_path, track_new=True)
         except Exception as e:
-            print(f"Worker failed to load whitelist: {e}")
+            print(f"Worker failed to attach shared dictionary: {e}")
+
+def verify_candidates(result, checker):
+    """Check NLP candidates against the dictionary. Returns an error record or None."""
+    article_errors = []
+    candidates = result.get("candidates", [])
     
-    # Initialize Lemmatizer only (Small memory footprint)
-    try:
-        worker_lemmatizer = WordNetLemmatizer()
-    except Exception as e:
-        print(f"Worker failed to load lemmatizer: {e}")
+    for cand in candidates:
+        word = cand["word"]
+        # Memoized: recurring tokens skip the variant checks and SymSpell lookup
+        top_sugg = checker.verdict(word, cand["variants"])
+        if top_sugg:
+            article_errors.append({
+                "word": word,
+                "context": cand["context"],
+                "suggestion": top_sugg[0],
+                "distance": top_sugg[1],
+                "tag": cand["tag"],
+                "lemma": cand["lemma"]
+            })
+    
+    if not article_errors:
+        return None
+        
+    # Deduplicate
+    unique_errors = {f"{e['word']}->{e['suggestion']}": e for e in article_errors}.values()
+    return {
+        "title": result["title"],
+        "country": result["country"],
+        "date": result.get("date"),
+        "scraped_at": result.get("scraped_at"),
+        "errors": list(unique_errors)
+    }
 
 def analyze_article_nlp(article):
     """
@@ -62,103 +89,53 @@ def analyze_article_nlp(article):
     Extracts potential candidates for spell checking.
     Does NOT load the full dictionary.
     """
-    global worker_lemmatizer, worker_whitelist
-    
-    text = article.get("content", "")
-    if not text:
-        return None
-        
-    candidates = []
-    
-    try:
-        # Tokenize into sentences
-        sentences = nltk.sent_tokenize(text)
-        
-        for sentence in sentences:
-            # Tokenize words
-            tokens = nltk.word_tokenize(sentence)
-            # POS Tagging
-            tagged = nltk.pos_tag(tokens)
-            # Named Entity Recognition
-            chunked = nltk.ne_chunk(tagged)
-            
-            for chunk in chunked:
-                if hasattr(chunk, 'label'):
-                    # It's a Named Entity (e.g., PERSON, GPE, ORGANIZATION)
-                    continue
-                else:
-                    # It's a regular token (word, tag) tuple
-                    word, tag = chunk
-                    
-                    # Filter: Alpha only, length > 3
-                    if not word.isalpha() or len(word) <= 3:
-                        continue
-                        
-                    # Skip common stopwords
-                    if word.lower() in {"this", "that", "with", "from", "have", "what", "when", "where", "which", "your", "their", "there"}:
-                        continue
-                    
-                    # Skip Proper Nouns (NNP, NNPS)
-                    if tag in ('NNP', 'NNPS'):
-                        continue
+    return worker_backend.analyze_many([article])[0]
 
-                    # Whitelist Check
-                    if word in worker_whitelist or word.lower() in worker_whitelist:
-                        continue
+def analyze_batch_nlp(articles):
+    """Batched variant of analyze_article_nlp: one result (or None) per article, in order."""
+    return worker_backend.analyze_many(articles)
 
-                    # Generate Variants for Validation (moved from SpellChecker logic)
-                    variants = set()
-                    variants.add(word)
-                    
-                    # Lemmatization
-                    wn_pos = get_wordnet_pos(tag)
-                    lemma = worker_lemmatizer.lemmatize(word.lower(), pos=wn_pos)
-                    variants.add(lemma)
-                    variants.add(lemma.lower())
-                    
-                    # Fallback Lemmatization (Multi-POS)
-                    if wn_pos == wordnet.NOUN:
-                        # Try as Verb
-                        lemma_v = worker_lemmatizer.lemmatize(word.lower(), pos=wordnet.VERB)
-                        variants.add(lemma_v)
-                    elif wn_pos == wordnet.VERB:
-                        # Try as Noun
-                        lemma_n = worker_lemmatizer.lemmatize(word.lower(), pos=wordnet.NOUN)
-                        variants.add(lemma_n)
-                    elif wn_pos == wordnet.ADJ:
-                        # Try as Verb
-                        lemma_v = worker_lemmatizer.lemmatize(word.lower(), pos=wordnet.VERB)
-                        variants.add(lemma_v)
-                    
-                    # Add candidate
-                    candidates.append({
-                        "word": word,
-                        "context": sentence.strip()[:100] + "...",
-                        "tag": tag,
-                        "lemma": lemma,
-                        "variants": list(variants)
-                    })
-                            
-        return {
-            "title": article.get("title"),
-            "country": article.get("country"),
-            "date": article.get("date"),
-            "scraped_at": article.get("scraped_at"),
-            "candidates": candidates
-        }
-            
-    except Exception as e:
-        print(f"Error processing article '{article.get('title', 'unknown')}': {e}")
-        return None
+def detect_batch(articles):
+    """
+    NLP + dictionary verification inside the worker (requires a shared dictionary).
+    Returns (one result or None per article, verdict cache delta or None).
+    """
+    results = [verify_candidates(r, worker_checker) if r else None for r in worker_backend.analyze_many(articles)]
+    cache = worker_checker.verdict_cache
+    return results, (cache.drain() if cache is not None else None)
+
+def bounded_map(executor, fn, items, window):
+    """
+    Ordered executor.map that keeps at most `window` tasks in flight.
+    Yields (item, result). Unlike executor.map it does not consume the
+    whole input up front, so memory stays bounded for arbitrarily large inputs.
+    """
+    pending = deque()
+    for item in items:
+        pending.append((item, executor.submit(fn, item[1])))
+        if len(pending) >= window:
+            done_item, future = pending.popleft()
+            yield done_item, future.result()
+    while pending:
+        done_item, future = pending.popleft()
+        yield done_item, future.result()
 
 class SpellDetectionPipeline:
     def __init__(self):
         self.input_file = os.path.join("data", "sample_news_scraped.json")
         self.dict_path = os.path.join("data", "symspell_freq_dict.txt")
-        self.output_file = os.path.join("data", "detected_errors.json")
+        # JSONL: appended output is synced incrementally into the database (bulk_load.IngestLedger)
+        self.output_file = os.path.join("data", "detected_errors.jsonl")
         self.whitelist_path = os.path.join("data", "whitelist.txt")
         self.gpu_info = hardware.get_gpu_diagnostics()
         self.checker = None # Loaded in run()
+        self.nlp_backend = "nltk"
+        self.nlp_options = {}
+        self.nlp_batch_size = 32
+        self.shared_dict_path = os.path.join("data", "symspell_shared.bin")
+        self.use_shared_dict = False
+        self.cache_size = 100_000 # Verdict cache entries (0 disables)
+        self.verdict_cache_path = None # Persist verdicts across runs when set
         
     def ensure_nltk(self):
         try:
@@ -175,11 +152,31 @@ class SpellDetectionPipeline:
             nltk.download('words')
             nltk.download('wordnet')
 
-    def run(self):
-        print("\n" + "="*50)
-        print("   SpellAtlas Detection Pipeline - Memory Optimized")
-        print("="*50)
+    def verify_candidates(self, result):
+        """Check NLP candidates against the Master Dictionary. Returns an error record or None."""
+        return verify_candidates(result, self.checker)
+
+    def ensure_shared_dictionary(self):
+        """Export the dictionary to the read-only mmap format unless an up-to-date export exists."""
+        # Same identity as the precompiled SymSpell index: dictionary hash + parameters
+        key = index_key(self.dict_path) if os.path.exists(self.dict_path) else None
+        header = read_header(self.shared_dict_path)
+        if header and header.get("version") == FORMAT_VERSION and header.get("source_key") == key:
+            print(f"Shared dictionary {self.shared_dict_path} is up to date.")
+            return
         
+        print(f"Exporting shared dictionary to {self.shared_dict_path}...")
+        checker = SpellChecker(dictionary_path=self.dict_path)
+        header = export_shared_dictionary(
+            checker.sym_spell, self.shared_dict_path,
+            max_edit_distance=checker.max_edit_distance,
+            prefix_length=checker.sym_spell._prefix_length,
+            source_key=key
+        )
+        print(f"Exported {header['sections']['word_counts'][1]} words, {header['sections']['delete_hashes'][1]} deletes.")
+
+    def prepare(self):
+        """Diagnostics, NLTK resources and Master Dictionary. Returns False if the run cannot proceed."""
         # 1. Hardware Diagnostics
         print("\n[Hardware Diagnostics]")
         print(hardware.format_gpu_diagnostics(self.gpu_info))
@@ -193,15 +190,22 @@ class SpellDetectionPipeline:
         
         if not os.path.exists(self.input_file):
             print(f"Error: Input file {self.input_file} not found.")
-            return
+            return False
 
-        # 3. Load Data
-        print("\n[Data Loading]")
-        with open(self.input_file, 'r', encoding='utf-8') as f:
-            articles = json.load(f)
-        print(f"Loaded {len(articles)} articles.")
+        if self.use_shared_dict:
+            # 3. Shared read-only dictionary: workers attach via mmap and check words themselves
+            print("\n[Memory Optimization]")
+            try:
+                self.ensure_shared_dictionary()
+                self.checker = SharedDictionary(self.shared_dict_path)
+                print("Shared Dictionary Attached Successfully.")
+            except Exception as e:
+                print(f"Failed to prepare shared dictionary: {e}")
+                return False
+            self.enable_verdict_cache()
+            return True
 
-        # 4. Initialize Single SpellChecker (Shared Memory by Architecture)
+        # 3. Initialize Single SpellChecker (Shared Memory by Architecture)
         print("\n[Memory Optimization]")
         print("Initializing Master SpellChecker (Single Instance)...")
         # This instance is ONLY in the main process. Workers do not duplicate it.
@@ -211,86 +215,125 @@ class SpellDetectionPipeline:
             print("Master Dictionary Loaded Successfully.")
         except Exception as e:
             print(f"Failed to load dictionary: {e}")
+            return False
+        self.enable_verdict_cache()
+        return True
+
+    def enable_verdict_cache(self):
+        if self.cache_size:
+            self.checker.enable_verdict_cache(self.cache_size, self.verdict_cache_path)
+
+    def report_verdict_cache(self):
+        """Print cache effectiveness and persist it for the next run."""
+        if self.checker is None or self.checker.verdict_cache is None:
+            return
+        # With a shared dictionary the workers' verdicts and counters were merged in here
+        stats = self.checker.verdict_cache.stats()
+        print(f"Verdict Cache: {stats['hits']} hits / {stats['misses']} misses "
+              f"({stats['hit_rate']:.1%} hit rate, {stats['size']} entries)")
+        self.checker.save_verdict_cache()
+
+    def get_num_workers(self):
+        num_workers = os.cpu_count()
+        if num_workers is None:
+            num_workers = 4
+        return num_workers
+
+    def iter_detection_results(self, items, num_workers):
+        """
+        Run NLP and dictionary verification over (offset, article) items.
+        Yields (offset, error record or None) in input order. Articles are grouped
+        into batches so batched backends can tag sentences across articles in one call.
+        With a shared dictionary the workers verify candidates themselves and the
+        main process only collects results; otherwise the Master SpellChecker does it here.
+        """
+        def batches():
+            batch = []
+            for item in items:
+                batch.append(item)
+                if len(batch) >= self.nlp_batch_size:
+                    yield [o for o, _ in batch], [a for _, a in batch]
+                    batch = []
+            if batch:
+                yield [o for o, _ in batch], [a for _, a in batch]
+
+        def verify(result):
+            return self.verify_candidates(result) if result else None
+
+        if self.nlp_backend == "spacy":
+            # spaCy manages its own worker processes through nlp.pipe(n_process=...);
+            # one pipe over the whole stream, so the pool is not restarted per batch
+            options = dict(self.nlp_options)
+            options.setdefault("n_process", num_workers)
+            options.setdefault("batch_size", self.nlp_batch_size)
+            backend = get_backend(self.nlp_backend, whitelist_path=self.whitelist_path, **options)
+            for offset, result in backend.analyze_stream(items):
+                yield offset, verify(result)
+            return
+
+        shared_path = self.shared_dict_path if self.use_shared_dict else None
+        worker_fn = detect_batch if shared_path else analyze_batch_nlp
+        initargs = (self.whitelist_path, self.nlp_backend, self.nlp_options, shared_path, self.cache_size, self.verdict_cache_path)
+        with ProcessPoolExecutor(max_workers=num_workers, initializer=init_worker, initargs=initargs) as executor:
+            # Stream results to keep memory low
+            for (offsets, _), results in bounded_map(executor, worker_fn, batches(), num_workers * 2):
+                if shared_path:
+                    results, cache_delta = results
+                    if cache_delta and self.checker.verdict_cache is not None:
+                        self.checker.verdict_cache.merge(cache_delta)
+                for offset, result in zip(offsets, results):
+                    yield offset, result if shared_path else verify(result)
+
+    def run(self):
+        print("\n" + "="*50)
+        print("   SpellAtlas Detection Pipeline - Memory Optimized")
+        print("="*50)
+        
+        if not self.prepare():
             return
 
+        # 4. Load Data
+        print("\n[Data Loading]")
+        with open(self.input_file, 'r', encoding='utf-8') as f:
+            articles = json.load(f)
+        print(f"Loaded {len(articles)} articles.")
+
         # 5. Parallel Processing (Map-Reduce Style)
         # Workers: NLP Analysis (CPU bound) -> Output Candidates
         # Main: Spell Check (Memory bound) -> Output Errors
         
-        num_workers = os.cpu_count()
-        if num_workers is None:
-            num_workers = 4
+        num_workers = self.get_num_workers()
             
         print(f"\n[Execution Strategy]")
         if self.gpu_info.get("torch_cuda"):
             print("Status: GPU Acceleration Available (Future Integration)")
         else:
             print("Status: CPU Optimization Active")
-        print(f"Method: Decoupled Parallel NLP + Centralized Dictionary (Pool Size: {num_workers})")
+        dictionary_mode = "Shared mmap Dictionary" if self.use_shared_dict else "Centralized Dictionary"
+        print(f"Method: Decoupled Parallel NLP + {dictionary_mode} (Pool Size: {num_workers}, NLP Backend: {self.nlp_backend})")
         
         start_time = time.time()
         
         all_errors = []
         print(f"Processing started...")
         
-        # Use ProcessPoolExecutor for NLP
-        with ProcessPoolExecutor(max_workers=num_workers, initializer=init_worker, initargs=(self.whitelist_path,)) as executor:
-            # Stream results to keep memory low
-            results_iterator = executor.map(analyze_article_nlp, articles)
-            
-            for result in results_iterator:
-                if not result:
-                    continue
-                
-                article_errors = []
-                candidates = result.get("candidates", [])
-                
-                # Verify candidates against the Master Dictionary
-                for cand in candidates:
-                    word = cand["word"]
-                    variants = cand["variants"]
-                    
-                    # Check if any variant is valid
-                    is_valid = False
-                    for v in variants:
-                        if self.checker.check_word(v):
-                            is_valid = True
-                            break
-                    
-                    if not is_valid:
-                        # Confirm Error & Generate Suggestions
-                        suggestions = self.checker.suggest(word)
-                        if suggestions:
-                            top_sugg = suggestions[0]
-                            if top_sugg[0].lower() != word.lower():
-                                article_errors.append({
-                                    "word": word,
-                                    "context": cand["context"],
-                                    "suggestion": top_sugg[0],
-                                    "distance": top_sugg[1],
-                                    "tag": cand["tag"],
-                                    "lemma": cand["lemma"]
-                                })
-                
-                if article_errors:
-                    # Deduplicate
-                    unique_errors = {f"{e['word']}->{e['suggestion']}": e for e in article_errors}.values()
-                    all_errors.append({
-                        "title": result["title"],
-                        "country": result["country"],
-                        "date": result.get("date"),
-                        "scraped_at": result.get("scraped_at"),
-                        "errors": list(unique_errors)
-                    })
+        for _, record in self.iter_detection_results(enumerate(articles), num_workers):
+            if record:
+                all_errors.append(record)
                     
         elapsed = time.time() - start_time
         print(f"\n[Results]")
         print(f"Processed {len(articles)} articles in {elapsed:.2f}s")
         print(f"Found errors in {len(all_errors)} articles.")
+        self.report_verdict_cache()
         
         # 6. Save Results
         with open(self.output_file, 'w', encoding='utf-8') as f:
-            json.dump(all_errors, f, indent=2, ensure_ascii=False)
+            if self.output_file.endswith(".jsonl"):
+                for record in all_errors:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            else:
+                json.dump(all_errors, f, indent=2, ensure_ascii=False)
         print(f"Saved error report to {self.output_file}")
         
         # Sample
@@ -300,8 +343,138 @@ class SpellDetectionPipeline:
             for err in sample['errors'][:5]:
                 print(f"  - {err['word']} ({err['tag']}) -> {err['suggestion']} (dist={err['distance']})")
 
+    def _load_checkpoint(self, checkpoint_path):
+        if not os.path.exists(checkpoint_path):
+            return None
+        try:
+            with open(checkpoint_path, 'r', encoding='utf-8') as f:
+                checkpoint = json.load(f)
+        except Exception as e:
+            print(f"Ignoring unreadable checkpoint {checkpoint_path}: {e}")
+            return None
+        if checkpoint.get("input_file") != os.path.abspath(self.input_file):
+            print(f"Checkpoint belongs to {checkpoint.get('input_file')}, starting fresh.")
+            return None
+        return checkpoint
+
+    def _save_checkpoint(self, checkpoint_path, out, checkpoint):
+        """Commit output rows to disk, then atomically record how far we got."""
+        out.flush()
+        os.fsync(out.fileno())
+        checkpoint["output_offset"] = out.tell()
+        tmp_path = checkpoint_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(checkpoint, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, checkpoint_path)
+
+    def run_stream(self, checkpoint_every=1000, restart=False):
+        """
+        Streaming, resumable variant of run().
+        Articles are read incrementally (JSONL or chunked JSON array), error records
+        are appended to a JSONL output as they are produced, and progress is
+        checkpointed so a restarted run resumes from the last committed offset.
+        Peak memory is bounded by the in-flight window, not by corpus size.
+        """
+        print("\n" + "="*50)
+        print("   SpellAtlas Detection Pipeline - Streaming Mode")
+        print("="*50)
+        
+        if not self.prepare():
+            return
+
+        checkpoint_path = self.output_file + ".checkpoint"
+        checkpoint = None if restart else self._load_checkpoint(checkpoint_path)
+        
+        print("\n[Data Streaming]")
+        if checkpoint:
+            print(f"Resuming after {checkpoint['articles_done']} articles "
+                  f"(input offset {checkpoint['input_offset']}, output offset {checkpoint['output_offset']}).")
+            out = open(self.output_file, 'r+b' if os.path.exists(self.output_file) else 'w+b')
+            # Drop anything written after the last committed checkpoint
+            out.truncate(checkpoint["output_offset"])
+            out.seek(checkpoint["output_offset"])
+        else:
+            checkpoint = {
+                "input_file": os.path.abspath(self.input_file),
+                "input_offset": 0,
+                "articles_done": 0,
+                "articles_with_errors": 0,
+                "output_offset": 0
+            }
+            out = open(self.output_file, 'wb')
+
+        if self.input_file.endswith(".jsonl"):
+            articles = iter_articles(self.input_file, start_offset=checkpoint["input_offset"])
+        else:
+            articles = iter_articles(self.input_file, skip=checkpoint["input_offset"])
+        
+        num_workers = self.get_num_workers()
+        print(f"Method: Streaming Parallel NLP (Pool Size: {num_workers}, NLP Backend: {self.nlp_backend}, Batch: {self.nlp_batch_size})")
+        print(f"Output: {self.output_file} (checkpoint every {checkpoint_every} articles)")
+        
+        start_time = time.time()
+        processed = 0
+        
+        try:
+            for offset, record in self.iter_detection_results(articles, num_workers):
+                processed += 1
+                if record:
+                    out.write(json.dumps(record, ensure_ascii=False).encode('utf-8') + b"\n")
+                    checkpoint["articles_with_errors"] += 1
+                
+                checkpoint["input_offset"] = offset
+                checkpoint["articles_done"] += 1
+                if processed % checkpoint_every == 0:
+                    self._save_checkpoint(checkpoint_path, out, checkpoint)
+                    rate = processed / max(time.time() - start_time, 1e-9)
+                    print(f"  {checkpoint['articles_done']} articles committed ({rate:.1f} articles/s)")
+        
+            self._save_checkpoint(checkpoint_path, out, checkpoint)
+        finally:
+            out.close()
+            
+        elapsed = time.time() - start_time
+        print("\n[Results]")
+        print(f"Processed {processed} articles in {elapsed:.2f}s ({checkpoint['articles_done']} total)")
+        print(f"Found errors in {checkpoint['articles_with_errors']} articles.")
+        self.report_verdict_cache()
+        print(f"Saved error report to {self.output_file}")
+
 if __name__ == "__main__":
     # Windows support for multiprocessing
     multiprocessing.freeze_support()
+    
+    parser = argparse.ArgumentParser(description="SpellAtlas spelling error detection")
+    parser.add_argument("--stream", action="store_true", help="Streaming, resumable mode with JSONL output")
+    parser.add_argument("--input", help="Input articles (.json array or .jsonl)")
+    parser.add_argument("--output", help="Output file, .jsonl or .json array (default data/detected_errors.jsonl; --stream needs .jsonl)")
+    parser.add_argument("--checkpoint-every", type=int, default=1000, help="Articles between checkpoints")
+    parser.add_argument("--restart", action="store_true", help="Ignore any existing checkpoint")
+    parser.add_argument("--nlp-backend", choices=sorted(BACKENDS), default="nltk", help="Tokenization/tagging engine")
+    parser.add_argument("--nlp-batch-size", type=int, default=32, help="Articles per NLP batch")
+    parser.add_argument("--ner", action="store_true", help="nltk-batch only: also run the maxent NE chunker")
+    parser.add_argument("--shared-dict", action="store_true", help="Workers spell-check against a shared mmap dictionary")
+    parser.add_argument("--cache-size", type=int, default=100_000, help="Verdict cache entries (0 disables)")
+    parser.add_argument("--verdict-cache", help="Persist the verdict cache to this file across runs")
+    args = parser.parse_args()
+    if args.ner and args.nlp_backend != "nltk-batch":
+        parser.error("--ner is only supported with --nlp-backend nltk-batch")
+    
     pipeline = SpellDetectionPipeline()
-    pipeline.run()
+    pipeline.nlp_backend = args.nlp_backend
+    pipeline.nlp_batch_size = args.nlp_batch_size
+    if args.ner:
+        pipeline.nlp_options["ner"] = True
+    pipeline.use_shared_dict = args.shared_dict
+    pipeline.cache_size = args.cache_size
+    pipeline.verdict_cache_path = args.verdict_cache
+    if args.input:
+        pipeline.input_file = args.input
+    if args.output:
+        pipeline.output_file = args.output
+    if args.stream:
+        pipeline.run_stream(checkpoint_every=args.checkpoint_every, restart=args.restart)
+    else:
+        pipeline.run()
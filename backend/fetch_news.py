@@ -1,10 +1,20 @@
+import argparse
 import asyncio
-import aiohttp
+import gzip
+import itertools
 import trafilatura
 import json
 import os
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timezone
 
+try:
+    from backend.crawler import Crawler
+    from backend.html_cache import HtmlCache
+except ImportError:
+    from crawler import Crawler
+    from html_cache import HtmlCache
+
 GDELT_API_URL = "https://api.gdeltproject.org/api/v2/doc/doc"
 
 def is_english(text):
@@ -22,9 +32,10 @@ def is_english(text):
     except:
         return False
 
-async def fetch_gdelt_news(query="sourcelang:eng (domain:cnn.com OR domain:bbc.com OR domain:reuters.com OR domain:aljazeera.com)", max_records=20):
+async def fetch_gdelt_news(crawler, query="sourcelang:eng (domain:cnn.com OR domain:bbc.com OR domain:reuters.com OR domain:aljazeera.com)", max_records=20, api_url=GDELT_API_URL, extra_params=None):
     """
     Fetch news metadata from GDELT 2.0 Doc API.
+    Returns the article list, or None if the request failed.
     """
     # GDELT API Parameters
     params = {
@@ -34,104 +45,253 @@ async def fetch_gdelt_news(query="sourcelang:eng (domain:cnn.com OR domain:bbc.c
         "format": "json",
         "sort": "DateDesc"
     }
+    if extra_params:
+        params.update(extra_params)
     print(f"Requesting GDELT API: {params}")
     
-    async with aiohttp.ClientSession() as session:
-        try:
-            async with session.get(GDELT_API_URL, params=params) as resp:
-                if resp.status == 200:
-                    data = await resp.json()
-                    articles = data.get("articles", [])
-                    print(f"GDELT API returned {len(articles)} articles.")
-                    return articles
-                else:
-                    print(f"Error fetching GDELT: HTTP {resp.status}")
-                    text = await resp.text()
-                    print(f"Response: {text[:200]}")
-                    return []
-        except Exception as e:
-            print(f"Exception fetching GDELT: {e}")
-            return []
-
-async def process_article(session, article):
+    result = await crawler.fetch(api_url, params=params)
+    if result is None:
+        return None
+    if result.status != 200:
+        print(f"Error fetching GDELT: HTTP {result.status}")
+        print(f"Response: {result.text()[:200]}")
+        return None
+    try:
+        # GDELT answers with text/html content type, decode manually
+        data = json.loads(result.text()) if result.body.strip() else {}
+    except ValueError as e:
+        print(f"Exception decoding GDELT response: {e}")
+        return None
+    articles = data.get("articles", [])
+    print(f"GDELT API returned {len(articles)} articles.")
+    return articles
+
+def extract_article(html, encoding=None):
     """
-    Fetch article HTML and extract main text using trafilatura.
+    CPU-bound stage, runs in a worker process: trafilatura extraction + quality filters.
+    Returns (text, None) on success or (None, reason) when the article is rejected.
     """
-    url = article.get("url")
-    if not url:
-        return None
-    
-    # Basic metadata preservation
-    processed = {
+    try:
+        if isinstance(html, bytes):
+            html = html.decode(encoding or 'utf-8', errors='replace')
+        text = trafilatura.extract(html)
+    except Exception as e:
+        return None, str(e)
+        
+    if not text:
+        return None, "Trafilatura extraction failed"
+    # Quality Filters
+    if len(text) < 200:
+        return None, f"Content too short ({len(text)} chars)"
+    if not is_english(text):
+        return None, "Content not English"
+    return text, None
+
+def extract_cached(entry):
+    """Worker-side re-extraction of one cached page: (meta, body path) -> (meta, text, reason)."""
+    meta, body_path = entry
+    try:
+        with gzip.open(body_path, 'rb') as f:
+            body = f.read()
+    except OSError as e:
+        return meta, None, str(e)
+    text, reason = extract_article(body, meta.get("encoding"))
+    return meta, text, reason
+
+def article_record(article, url, scraped_at=None):
+    """Basic metadata preserved from the GDELT artlist entry."""
+    return {
         "url": url,
         "title": article.get("title"),
         "date": article.get("seendate"),
         "country": article.get("sourcecountry"),
         "domain": article.get("domain"),
         "language": article.get("language"),
-        "scraped_at": datetime.now(timezone.utc).isoformat()
+        "scraped_at": scraped_at or datetime.now(timezone.utc).isoformat()
     }
 
-    try:
-        # Timeout is crucial for crawling
-        timeout = aiohttp.ClientTimeout(total=10)
-        async with session.get(url, timeout=timeout, headers={"User-Agent": "SpellAtlasBot/1.0"}) as resp:
-            if resp.status == 200:
-                # Read as binary then decode to handle encoding issues gracefully if needed, 
-                # but aiohttp text() is usually good.
+async def download_article(crawler, article, cache=None, failed=None):
+    """
+    I/O stage: fetch article HTML. Returns (metadata, html bytes, encoding) or None.
+    With a cache, known pages are revalidated with a conditional GET and a 304
+    reuses the stored body; fresh bodies are written to the cache.
+    Articles whose download gave up (network errors, retryable statuses) are
+    appended to `failed` when given, so the caller can retry them later.
+    """
+    url = article.get("url")
+    if not url:
+        return None
+    
+    processed = article_record(article, url)
+
+    # Timeouts, retries and per-domain rate limits are handled by the crawler
+    headers = cache.conditional_headers(url) if cache else None
+    result = await crawler.fetch(url, headers=headers)
+    if result is None:
+        if failed is not None:
+            failed.append(article)
+        return None
+    if result.status == 304 and headers:
+        cache.revalidated += 1
+        meta = cache.get_meta(url)
+        body = await asyncio.to_thread(cache.read_body, url)
+        return processed, body, meta.get("encoding")
+    if result.status != 200:
+        print(f"Skipping {url}: HTTP {result.status}")
+        return None
+    if cache:
+        await asyncio.to_thread(cache.put, url, result.body, result.headers, result.encoding, article)
+    return processed, result.body, result.encoding
+
+class ExtractionPipeline:
+    """
+    Decoupled fetch -> extract stages.
+    Async downloads push raw HTML into a bounded queue; extractor tasks drain it
+    into a ProcessPoolExecutor, so extraction scales with cores instead of being
+    capped by the GIL. When extraction falls behind the queue fills up and the
+    downloaders block (backpressure) instead of buffering unbounded HTML.
+    One pipeline (and its process pool) can serve several concurrent run() calls.
+    """
+
+    def __init__(self, crawler, workers=None, queue_size=None, cache=None):
+        self.crawler = crawler
+        self.cache = cache
+        self.workers = workers or os.cpu_count() or 4
+        self.queue_size = queue_size or self.workers * 4
+        self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        self.extracted = 0
+        self.rejected = 0
+
+    def close(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+    async def run(self, articles, download_workers=None, failed=None):
+        """Yield extracted articles (metadata + content) as they complete; see download_article for `failed`."""
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        results = asyncio.Queue(maxsize=self.queue_size)
+        done = object()
+
+        async def producer():
+            try:
+                async for item in self.crawler.map(lambda a: download_article(self.crawler, a, self.cache, failed), articles, workers=download_workers):
+                    if item:
+                        await queue.put(item)
+            finally:
+                for _ in range(self.workers):
+                    await queue.put(done)
+
+        async def extractor():
+            while True:
+                item = await queue.get()
+                if item is done:
+                    await results.put(done)
+                    return
+                processed, body, encoding = item
                 try:
-                    html = await resp.text()
-                except UnicodeDecodeError:
-                    html = await resp.read() # trafilatura can handle bytes too sometimes or we decode loosely
-                
-                # Run trafilatura in a separate thread to not block async loop
-                # trafilatura.extract can take a string or bytes
-                text = await asyncio.to_thread(trafilatura.extract, html)
-                
+                    text, reason = await loop.run_in_executor(self.executor, extract_article, body, encoding)
+                except Exception as e:
+                    text, reason = None, str(e)
                 if text:
-                    # Quality Filters
-                    if len(text) < 200:
-                        print(f"Skipping {url}: Content too short ({len(text)} chars)")
-                    elif not is_english(text):
-                        print(f"Skipping {url}: Content not English")
-                    else:
-                        processed["content"] = text
-                        return processed
+                    processed["content"] = text
+                    self.extracted += 1
+                    await results.put(processed)
                 else:
-                    print(f"Skipping {url}: Trafilatura extraction failed")
-            else:
-                print(f"Skipping {url}: HTTP {resp.status}")
-    except asyncio.TimeoutError:
-        print(f"Skipping {url}: Timeout")
-    except Exception as e:
-        print(f"Skipping {url}: {e}")
-        
-    return None
+                    self.rejected += 1
+                    print(f"Skipping {processed['url']}: {reason}")
 
-async def main():
+        tasks = [asyncio.create_task(producer())]
+        tasks += [asyncio.create_task(extractor()) for _ in range(self.workers)]
+        try:
+            finished = 0
+            while finished < self.workers:
+                item = await results.get()
+                if item is done:
+                    finished += 1
+                else:
+                    yield item
+        finally:
+            for t in tasks:
+                t.cancel()
+
+def crawler_from_args(args):
+    return Crawler(
+        concurrency=args.concurrency,
+        limit_per_host=args.limit_per_host,
+        per_domain_rate=args.per_domain_rate,
+        per_domain_burst=args.per_domain_burst,
+        timeout=args.timeout,
+        max_retries=args.max_retries
+    )
+
+def add_crawler_args(parser):
+    parser.add_argument("--concurrency", type=int, default=64, help="Global cap on requests in flight")
+    parser.add_argument("--limit-per-host", type=int, default=8, help="Connections per host")
+    parser.add_argument("--per-domain-rate", type=float, default=2.0, help="Requests per second per domain")
+    parser.add_argument("--per-domain-burst", type=int, default=4, help="Token bucket burst size per domain")
+    parser.add_argument("--timeout", type=float, default=10, help="Total timeout per request (s)")
+    parser.add_argument("--max-retries", type=int, default=3)
+    parser.add_argument("--extract-workers", type=int, default=None, help="Extraction processes (default: CPU count)")
+    parser.add_argument("--html-cache", default=os.path.join("data", "html_cache"), help="Raw HTML cache directory")
+    parser.add_argument("--no-cache", action="store_true", help="Do not read or write the raw HTML cache")
+
+def reextract(args):
+    """
+    Replay extraction over the raw HTML cache at disk speed (no network).
+    Use after changing trafilatura settings or the quality filters.
+    """
+    cache = HtmlCache(args.html_cache)
+    output_file = args.output or os.path.join("data", "reextracted_articles.jsonl")
+    os.makedirs(os.path.dirname(output_file) or ".", exist_ok=True)
+    print(f"Re-extracting cached pages from {args.html_cache} -> {output_file}")
+
+    entries = cache.iter_entries()
+    kept = rejected = 0
+    with ProcessPoolExecutor(max_workers=args.extract_workers) as executor, open(output_file, 'w', encoding='utf-8') as out:
+        # Submit in slices so pending work stays bounded for very large caches
+        while True:
+            chunk = list(itertools.islice(entries, 2048))
+            if not chunk:
+                break
+            for meta, text, reason in executor.map(extract_cached, chunk, chunksize=32):
+                if not text:
+                    rejected += 1
+                    continue
+                record = article_record(meta.get("article") or {}, meta["url"], scraped_at=meta.get("fetched_at"))
+                record["content"] = text
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                kept += 1
+    print(f"Re-extracted {kept} articles ({rejected} rejected by extraction/quality filters).")
+
+async def main(args):
     print("--- Phase 2: Data Acquisition Started ---")
     
-    # 1. Fetch Metadata from GDELT
-    # We query for English news.
-    # Note: GDELT updates every 15 mins.
-    articles = await fetch_gdelt_news(max_records=20)
-    
-    if not articles:
-        print("No articles found from GDELT. Exiting.")
-        return
+    async with crawler_from_args(args) as crawler:
+        # 1. Fetch Metadata from GDELT
+        # We query for English news.
+        # Note: GDELT updates every 15 mins.
+        articles = await fetch_gdelt_news(crawler, max_records=args.max_records, api_url=args.gdelt_url)
+        
+        if not articles:
+            print("No articles found from GDELT. Exiting.")
+            return
 
-    # 2. Scrape Content
-    print(f"\nScraping content for {len(articles)} articles...")
-    results = []
-    
-    async with aiohttp.ClientSession() as session:
-        tasks = [process_article(session, a) for a in articles]
-        processed = await asyncio.gather(*tasks)
-        results = [p for p in processed if p]
+        # 2. Scrape Content (async download -> process pool extraction)
+        print(f"\nScraping content for {len(articles)} articles...")
+        results = []
+        cache = None if args.no_cache else HtmlCache(args.html_cache)
+        extractor = ExtractionPipeline(crawler, workers=args.extract_workers, cache=cache)
+        try:
+            async for processed in extractor.run(articles):
+                results.append(processed)
+        finally:
+            extractor.close()
         
     print(f"\n--- Summary ---")
     print(f"Requested: {len(articles)}")
     print(f"Successfully Scraped: {len(results)}")
+    if cache:
+        print(f"HTML cache: {cache.revalidated} revalidated (304), {cache.stored} stored")
     
     # 3. Save to local file
     if not results:
@@ -161,4 +321,15 @@ if __name__ == "__main__":
     # Windows SelectorEventLoop policy fix for Python 3.8+
     if os.name == 'nt':
         asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
-    asyncio.run(main())
+    
+    parser = argparse.ArgumentParser(description="Fetch GDELT news and extract article text")
+    parser.add_argument("--max-records", type=int, default=20)
+    parser.add_argument("--gdelt-url", default=GDELT_API_URL, help="GDELT Doc API endpoint (point at a stub server for tests)")
+    parser.add_argument("--reextract", action="store_true", help="Re-run extraction over the raw HTML cache instead of crawling")
+    parser.add_argument("--output", help="Output file for --reextract (JSONL)")
+    add_crawler_args(parser)
+    args = parser.parse_args()
+    if args.reextract:
+        reextract(args)
+    else:
+        asyncio.run(main(args))
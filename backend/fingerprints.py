@@ -0,0 +1,243 @@
+"""
+In-memory country x word error counts for the fingerprint analyses (T6.x).
+
+FingerprintMatrix keeps one sparse CSR matrix of counts: one row per
+(country, time bucket), one column per word. It is filled from aggregated
+(country, bucket, word, count) rows and grows incrementally: new events only
+add rows/columns and counts, nothing is recomputed. Country vectors, the
+global vector and distances are then slices and products of that matrix,
+not queries.
+
+    matrix = FingerprintMatrix(bucket="day")
+    matrix.add_counts([("GBR", "2024-01-02", "teh", 3), ...])
+    cols = matrix.top_words(100)
+    v = matrix.country_vector("GBR", cols)
+"""
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+from scipy import sparse
+from scipy.spatial.distance import pdist, squareform
+
+# strftime formats of the time bucket labels
+BUCKET_FORMATS = {"day": "%Y-%m-%d", "month": "%Y-%m"}
+
+def bucket_width(bucket):
+    """Length of a bucket label, i.e. of the ISO timestamp prefix it equals."""
+    return len(datetime(2000, 1, 1).strftime(BUCKET_FORMATS[bucket]))
+
+def l1_normalize(m):
+    """Rows scaled to sum to 1 (frequency distributions); all-zero rows stay zero."""
+    m = np.asarray(m, dtype=float)
+    totals = m.sum(axis=-1, keepdims=True)
+    return np.divide(m, totals, out=np.zeros_like(m), where=totals > 0)
+
+DISTANCE_METRICS = ("cosine", "euclidean", "jensenshannon")
+
+def pairwise_distances(vectors, metric="cosine"):
+    """
+    Square distance matrix between the rows of `vectors` (L1-normalized frequency
+    vectors) in one vectorized call. 'jensenshannon' is the JS divergence in bits.
+    """
+    vectors = np.asarray(vectors, dtype=float)
+    if metric == "cosine":
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        unit = np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+        dist = np.clip(1.0 - unit @ unit.T, 0.0, 2.0)
+        np.fill_diagonal(dist, 0.0)
+        return dist
+    if metric == "euclidean":
+        return squareform(pdist(vectors, "euclidean"))
+    if metric == "jensenshannon":
+        # pdist gives the JS distance in nats; squared and rescaled to a divergence in bits
+        return squareform(pdist(vectors, "jensenshannon") ** 2 / np.log(2))
+    raise ValueError(f"Unknown metric: {metric}")
+
+def split_half_similarities(events, dim, permutations, seed=None):
+    """
+    Cosine similarity between the two halves of `permutations` random exact
+    half-splits of `events` (word positions in [0, dim]; dim = outside the
+    vocabulary, counted for the split but not in the vectors). Each batch of
+    splits is one argpartition plus one offset bincount, no Python loop per split.
+    """
+    rng = np.random.default_rng(seed)
+    events = np.asarray(events, dtype=np.int64)
+    n, half, width = len(events), len(events) // 2, dim + 1
+    totals = np.bincount(events, minlength=width)[:dim]
+    # Keep each batch's random keys around 2M floats
+    batch = max(1, min(256, 2_000_000 // max(n, 1)))
+    out = np.empty(permutations)
+    for start in range(0, permutations, batch):
+        k = min(batch, permutations - start)
+        picks = rng.random((k, n)).argpartition(half, axis=1)[:, :half]
+        flat = (np.arange(k)[:, None] * width + events[picks]).ravel()
+        a = np.bincount(flat, minlength=k * width).reshape(k, width)[:, :dim].astype(float)
+        b = totals - a
+        norms = np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1)
+        out[start:start + k] = np.divide((a * b).sum(axis=1), norms, out=np.zeros(k), where=norms > 0)
+    return out
+
+def permutation_similarities(events, dim, permutations, seed=None, workers=None):
+    """split_half_similarities, optionally spread over a process pool (independent seed streams)."""
+    workers = max(1, min(workers or 1, permutations))
+    seeds = np.random.SeedSequence(seed).spawn(workers)
+    if workers == 1:
+        return split_half_similarities(events, dim, permutations, seeds[0])
+    sizes = [permutations // workers + (i < permutations % workers) for i in range(workers)]
+    with ProcessPoolExecutor(workers) as executor:
+        parts = executor.map(split_half_similarities, [events] * workers, [dim] * workers, sizes, seeds)
+        return np.concatenate(list(parts))
+
+class FingerprintMatrix:
+    def __init__(self, bucket=None):
+        # bucket: label granularity of the time dimension ('day', 'month') or None for none
+        self.bucket = bucket
+        self.row_index = {} # (country, bucket label) -> row
+        self.row_keys = []
+        self.word_index = {} # word -> column
+        self.words = []
+        self.country_index = {} # country -> row of by_country()
+        self.countries = []
+        self.counts = sparse.csr_matrix((0, 0), dtype=np.int64)
+        self.last_id = 0 # Highest event id folded in, for incremental refreshes
+        self.epoch = 0 # Source retention_version() it was built at
+        self.version = 0 # Bumped on every change (derived caches are dropped)
+        self._cache = {}
+
+    @property
+    def shape(self):
+        return self.counts.shape
+
+    def _index(self, index, keys, key):
+        i = index.get(key)
+        if i is None:
+            i = index[key] = len(keys)
+            keys.append(key)
+        return i
+
+    def add_counts(self, rows, last_id=None):
+        """Fold aggregated (country, bucket, word, count) rows into the matrix."""
+        r, c, v = [], [], []
+        for country, bucket, word, count in rows:
+            if not self.bucket:
+                bucket = None
+            self._index(self.country_index, self.countries, country)
+            r.append(self._index(self.row_index, self.row_keys, (country, bucket)))
+            c.append(self._index(self.word_index, self.words, word))
+            v.append(count)
+        if last_id is not None:
+            self.last_id = max(self.last_id, last_id)
+        if not v:
+            return 0
+
+        shape = (len(self.row_keys), len(self.words))
+        counts = self.counts.copy()
+        counts.resize(shape)
+        self.counts = (counts + sparse.csr_matrix((v, (r, c)), shape=shape, dtype=np.int64)).tocsr()
+        self.version += 1
+        self._cache = {}
+        return len(v)
+
+    def _cached(self, key, build):
+        if key not in self._cache:
+            self._cache[key] = build()
+        return self._cache[key]
+
+    def _row_mask(self, start=None, end=None):
+        """Rows whose bucket falls in [start, end], at bucket granularity (labels compare as ISO strings)."""
+        if not (start or end) or not self.bucket:
+            return None
+        width = bucket_width(self.bucket)
+        start = str(start)[:width] if start else None
+        end = str(end)[:width] if end else None
+        return np.array([b is not None and (not start or b >= start) and (not end or b <= end)
+                         for _, b in self.row_keys], dtype=bool)
+
+    def by_country(self, start=None, end=None):
+        """countries x words CSR counts (time buckets summed), rows ordered as self.countries."""
+        def build():
+            mask = self._row_mask(start, end)
+            rows = np.array([self.country_index[c] for c, _ in self.row_keys], dtype=np.int64)
+            keep = np.ones(len(rows), dtype=bool) if mask is None else mask
+            # Indicator (country x row) product sums each country's buckets in one pass
+            indicator = sparse.csr_matrix(
+                (np.ones(keep.sum(), dtype=np.int64), (rows[keep], np.flatnonzero(keep))),
+                shape=(len(self.countries), len(self.row_keys)))
+            return (indicator @ self.counts).tocsr()
+        return self._cached(("by_country", start, end), build)
+
+    def global_counts(self, start=None, end=None):
+        def build():
+            mask = self._row_mask(start, end)
+            counts = self.counts if mask is None else self.counts[np.flatnonzero(mask)]
+            return np.asarray(counts.sum(axis=0)).ravel()
+        return self._cached(("global", start, end), build)
+
+    def top_words(self, n=100):
+        """Column indices of the n most frequent words overall (the vector dimensions)."""
+        def build():
+            totals = self.global_counts()
+            # Ties broken by word so the dimensions are stable between processes
+            order = np.lexsort((np.array(self.words, dtype=str), -totals))
+            return order[:n].astype(np.int64)
+        return self._cached(("top", n), build)
+
+    def period_counts(self, cols, width=7):
+        """
+        Counts per (country, period) over `cols`, where a period is the first
+        `width` characters of the bucket label (7 = month for day/month buckets).
+        Returns (keys, dense array); with no time dimension, one row per country.
+        """
+        def build():
+            index, keys = {}, []
+            rows = np.array([self._index(index, keys, (c, b[:width] if b else None)) for c, b in self.row_keys], dtype=np.int64)
+            indicator = sparse.csr_matrix(
+                (np.ones(len(rows), dtype=np.int64), (rows, np.arange(len(rows)))), shape=(len(keys), len(self.row_keys)))
+            return keys, (indicator @ self.counts).tocsr()
+        keys, counts = self._cached(("periods", width), build)
+        return keys, counts[:, cols].toarray().astype(float)
+
+    def country_timeline(self, country):
+        """(bucket label, event count) of every bucket of `country`, in date order."""
+        def build():
+            totals = np.asarray(self.counts.sum(axis=1)).ravel()
+            return sorted((b, int(totals[i])) for (c, b), i in self.row_index.items() if c == country and b is not None)
+        return self._cached(("timeline", country), build)
+
+    def vocab_positions(self, cols):
+        """Position of every word column in `cols`; len(cols) for words outside it."""
+        pos = np.full(len(self.words), len(cols), dtype=np.int64)
+        pos[cols] = np.arange(len(cols))
+        return pos
+
+    def country_events(self, country, cols):
+        """One vocabulary position per error event of `country` (expanded from its counts; order is irrelevant)."""
+        if country not in self.country_index:
+            return np.zeros(0, dtype=np.int64)
+        row = self.by_country()[self.country_index[country]]
+        return np.repeat(self.vocab_positions(cols)[row.indices], row.data)
+
+    def country_vector(self, country, cols, start=None, end=None, normalize=True):
+        if country not in self.country_index:
+            return np.zeros(len(cols))
+        row = self.by_country(start, end)[self.country_index[country]]
+        vector = row[:, cols].toarray().ravel().astype(float)
+        return l1_normalize(vector) if normalize else vector
+
+    def global_vector(self, cols, start=None, end=None, normalize=True):
+        vector = self.global_counts(start, end)[cols].astype(float)
+        return l1_normalize(vector) if normalize else vector
+
+    def country_vectors(self, cols, start=None, end=None, normalize=True):
+        """Dense countries x len(cols) array, rows ordered as self.countries."""
+        m = self.by_country(start, end)[:, cols].toarray().astype(float)
+        return l1_normalize(m) if normalize else m
+
+    def distances_to(self, vectors, target):
+        """Cosine and euclidean distance of each row of `vectors` to `target`, vectorized."""
+        vectors = np.atleast_2d(vectors)
+        norms = np.linalg.norm(vectors, axis=1) * np.linalg.norm(target)
+        cosine = 1.0 - np.divide(vectors @ target, norms, out=np.zeros(len(vectors)), where=norms > 0)
+        euclidean = np.linalg.norm(vectors - target, axis=1)
+        return cosine, euclidean
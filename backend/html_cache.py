@@ -0,0 +1,106 @@
+"""
+Local store of compressed raw HTML, keyed by URL hash.
+
+Each page is kept as two files under a two-level fan-out directory:
+
+    <root>/ab/cd/<sha256(url)>.html.gz   gzip-compressed response body
+    <root>/ab/cd/<sha256(url)>.json      url, ETag, Last-Modified, encoding,
+                                         body sha256, fetch time, GDELT metadata
+
+Stored validators turn recrawls into conditional requests (304 = reuse the
+cached body), and the re-extract mode in fetch_news.py replays extraction over
+the cache without touching the network.
+"""
+import gzip
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+
+class HtmlCache:
+    def __init__(self, root=os.path.join("data", "html_cache")):
+        self.root = root
+        self.revalidated = 0
+        self.stored = 0
+
+    @staticmethod
+    def key(url):
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+    def _paths(self, key):
+        directory = os.path.join(self.root, key[:2], key[2:4])
+        return os.path.join(directory, key + ".html.gz"), os.path.join(directory, key + ".json")
+
+    def get_meta(self, url):
+        _, meta_path = self._paths(self.key(url))
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def read_body(self, url):
+        body_path, _ = self._paths(self.key(url))
+        with gzip.open(body_path, 'rb') as f:
+            return f.read()
+
+    def conditional_headers(self, url):
+        """If-None-Match / If-Modified-Since headers for a cached page, or None."""
+        meta = self.get_meta(url)
+        if not meta:
+            return None
+        headers = {}
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        return headers or None
+
+    def put(self, url, body, headers=None, encoding=None, article=None):
+        """Store a response body and its validators. Writes are atomic (tmp + rename)."""
+        headers = headers or {}
+        key = self.key(url)
+        body_path, meta_path = self._paths(key)
+        os.makedirs(os.path.dirname(body_path), exist_ok=True)
+
+        tmp = body_path + ".tmp"
+        with gzip.open(tmp, 'wb', compresslevel=6) as f:
+            f.write(body)
+        os.replace(tmp, body_path)
+
+        meta = {
+            "url": url,
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "encoding": encoding,
+            "sha256": hashlib.sha256(body).hexdigest(),
+            "size": len(body),
+            "fetched_at": datetime.now(timezone.utc).isoformat(),
+            "article": article
+        }
+        tmp = meta_path + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmp, meta_path)
+        self.stored += 1
+        return meta
+
+    def iter_entries(self):
+        """Yield (metadata, body path) for every cached page."""
+        if not os.path.isdir(self.root):
+            return
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                if not name.endswith(".json"):
+                    continue
+                try:
+                    with open(os.path.join(dirpath, name), 'r', encoding='utf-8') as f:
+                        meta = json.load(f)
+                except (OSError, ValueError):
+                    continue
+                body_path = os.path.join(dirpath, name[:-len(".json")] + ".html.gz")
+                if os.path.exists(body_path):
+                    yield meta, body_path
+
+    def stats(self):
+        return {"revalidated": self.revalidated, "stored": self.stored}
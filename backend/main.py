@@ -1,24 +1,48 @@
 import asyncio
+import hmac
+import math
 import random
 import json
-from fastapi import FastAPI, WebSocket
+from fastapi import FastAPI, WebSocket, HTTPException, Query, Request, Response, Depends
 from fastapi.middleware.cors import CORSMiddleware
 import os
+from contextlib import asynccontextmanager
+from typing import Optional
 try:
     from backend.storage import DataStorage
+    from backend.async_storage import AsyncStorage
+    from backend.refresher import CacheRefresher
     from backend.analysis import Analyzer
+    from backend.analysis_sources import source_from_env
     from backend.simulator import Simulator
 except ImportError:
     from storage import DataStorage
+    from async_storage import AsyncStorage
+    from refresher import CacheRefresher
     from analysis import Analyzer
+    from analysis_sources import source_from_env
     from simulator import Simulator
 
-app = FastAPI()
-
-# Initialize Storage
+# Initialize Storage (schema, startup sync, stats cache)
 storage = DataStorage()
-# Initialize Analyzer
-analyzer = Analyzer(storage.db_path)
+# Async pool for request handlers
+db = AsyncStorage(storage)
+# Periodic sync + stats cache rebuild
+refresher = CacheRefresher(storage)
+
+@asynccontextmanager
+async def lifespan(app):
+    await db.open()
+    refresher.start()
+    yield
+    await refresher.stop()
+    await db.close()
+
+app = FastAPI(lifespan=lifespan)
+
+# Initialize Analyzer on the event store named by ANALYSIS_SOURCE (Postgres by default)
+analysis_source = source_from_env(storage)
+analyzer = Analyzer(analysis_source) if analysis_source else None
 
 # Enhanced CORS Configuration
 # Defaults to "*" but explicitly allows common development and production origins
@@ -40,6 +64,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Metadata of the binary analysis responses
+    expose_headers=["X-Countries", "X-Matrix-Shape", "X-Data-Version", "ETag"],
 )
 
 @app.websocket("/ws")
@@ -72,40 +98,117 @@ async def websocket_endpoint(websocket: WebSocket):
 
 
 @app.get("/")
-def read_root():
+async def read_root():
     return {
         "status": "online",
         "system": "SpellAtlas Backend V1.0",
-        "data_loaded": len(storage.get_raw_data())
+        "data_loaded": await db.get_article_count()
     }
 
 @app.get("/api/stats")
-def get_global_stats():
+async def get_global_stats():
     """Get global summary statistics."""
     return storage.get_global_summary()
 
 @app.get("/api/map-data")
-def get_map_data():
+async def get_map_data():
     """Get country-level statistics for map visualization."""
     return storage.get_stats()
 
 @app.get("/api/errors")
-def get_errors(limit: int = 100):
-    """Get raw error list (flat)."""
-    raw = storage.get_raw_data()
-    flat_errors = []
-    for article in raw:
-        country = article.get("country", "Unknown")
-        title = article.get("title", "")
-        for err in article.get("errors", []):
-            flat_errors.append({
-                "country": country,
-                "title": title,
-                **err
-            })
-    return flat_errors[:limit]
+async def get_errors(limit: int = 100, cursor: Optional[str] = None):
+    """
+    Get raw error list (flat), one page at a time.
+    Pass the returned next_cursor to fetch the following page.
+    """
+    limit = max(1, min(limit, 1000))
+    try:
+        errors, next_cursor = await db.get_errors_page(limit, cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return {"errors": errors, "next_cursor": next_cursor}
 
 @app.get("/api/stats/top-errors")
-def get_top_errors(limit: int = 10):
+async def get_top_errors(limit: int = 10):
     """Get global top spelling errors."""
     return storage.get_top_errors(limit)
+
+@app.get("/api/stats/trends")
+async def get_error_trends(hours: int = 24, limit: int = 10):
+    """Most frequent errors over the last `hours` hours."""
+    hours = max(1, min(hours, 24 * 365 * 10))
+    limit = max(1, min(limit, 100))
+    return await db.get_error_trends(hours, limit)
+
+@app.get("/api/stats/curve")
+async def get_error_curve(hours: int = 24):
+    """Hourly error counts over the last `hours` hours."""
+    hours = max(1, min(hours, 24 * 365 * 10))
+    return await db.get_error_curve(hours)
+
+@app.get("/api/analysis/distance-matrix")
+async def get_distance_matrix(request: Request, metric: str = "cosine", output: str = Query("binary", alias="format")):
+    """
+    All-pairs distances between country fingerprints (metric: cosine, euclidean, jensenshannon).
+    Default response is the n x n matrix as little-endian float32, row-major;
+    X-Countries lists the country codes in row order. format=json returns nested lists.
+    """
+    if analyzer is None:
+        raise HTTPException(status_code=503, detail="No analysis source configured")
+    try:
+        countries, dist, version = await asyncio.to_thread(analyzer.get_distance_matrix, metric)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    etag = f'"{version}-{metric}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    if output == "json":
+        return {"metric": metric, "countries": countries, "data_version": version, "matrix": dist.round(6).tolist()}
+    return Response(
+        content=dist.astype("<f4").tobytes(),
+        media_type="application/octet-stream",
+        headers={
+            "X-Countries": ",".join(countries),
+            "X-Matrix-Shape": f"{len(countries)},{len(countries)}",
+            "X-Data-Version": str(version),
+            "ETag": etag,
+        },
+    )
+
+# Ops endpoints: with OPS_TOKEN set, callers send "Authorization: Bearer <OPS_TOKEN>";
+# without it they only answer clients on the loopback interface
+OPS_TOKEN = os.getenv("OPS_TOKEN")
+
+def require_ops_access(request: Request):
+    if OPS_TOKEN:
+        scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+        if scheme.lower() != "bearer" or not hmac.compare_digest(token.encode(), OPS_TOKEN.encode()):
+            raise HTTPException(status_code=401, detail="Invalid ops token", headers={"WWW-Authenticate": "Bearer"})
+    elif request.client is None or request.client.host not in ("127.0.0.1", "::1"):
+        raise HTTPException(status_code=403, detail="Set OPS_TOKEN to use the ops endpoints remotely")
+
+@app.get("/api/ops/metrics", dependencies=[Depends(require_ops_access)])
+async def get_ops_metrics():
+    """Storage timings (stats cache refresh), async pool health and per-query latency / plan cache stats."""
+    return {**storage.get_metrics(), "refresher": refresher.status(), "db_pool": db.health(), "db_queries": await db.query_metrics()}
+
+@app.post("/api/ops/refresh", dependencies=[Depends(require_ops_access)])
+async def refresh_caches(wait: bool = False):
+    """
+    Sync new detection output and rebuild the stats caches now (e.g. after an ingest).
+    With wait=true, returns once the refresh has finished. A call while a refresh
+    runs joins it; calls closer together than OPS_REFRESH_MIN_INTERVAL get a 429.
+    """
+    retry_after = refresher.retry_after()
+    if retry_after:
+        raise HTTPException(status_code=429, detail="Refreshed recently, try again later",
+                            headers={"Retry-After": str(math.ceil(retry_after))})
+    if not wait:
+        if refresher.busy():
+            return {"status": "running"}
+        refresher.trigger()
+        return {"status": "scheduled"}
+    if not await refresher.refresh_now():
+        raise HTTPException(status_code=500, detail=f"Refresh failed: {refresher.last_error}")
+    return {"status": "refreshed", "stats_refresh": storage.get_metrics().get("stats_refresh")}
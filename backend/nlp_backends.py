@@ -0,0 +1,252 @@
+"""
+Pluggable NLP backends for the detection pipeline.
+
+Every backend turns articles into the same candidate schema
+(`word`, `context`, `tag`, `lemma`, `variants`) so the spell-checking stage
+does not care which tokenizer/tagger produced them:
+
+- nltk:       per-sentence word_tokenize -> pos_tag -> ne_chunk (original behaviour).
+- nltk-batch: sentences of a whole batch of articles tagged with one pos_tag_sents
+              call; the maxent NE chunker is optional (skipped by default).
+- spacy:      spaCy nlp.pipe with n_process, entities from the statistical NER;
+              analyze_stream() runs a whole article stream through one pipe.
+"""
+import os
+import nltk
+from nltk.stem import WordNetLemmatizer
+from nltk.corpus import wordnet
+
+STOPWORDS = {"this", "that", "with", "from", "have", "what", "when", "where", "which", "your", "their", "there"}
+
+def get_wordnet_pos(treebank_tag):
+    if treebank_tag.startswith('J'):
+        return wordnet.ADJ
+    elif treebank_tag.startswith('V'):
+        return wordnet.VERB
+    elif treebank_tag.startswith('N'):
+        return wordnet.NOUN
+    elif treebank_tag.startswith('R'):
+        return wordnet.ADV
+    else:
+        return wordnet.NOUN # Default to noun
+
+def load_whitelist(whitelist_path):
+    whitelist = set()
+    if whitelist_path and os.path.exists(whitelist_path):
+        try:
+            with open(whitelist_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    w = line.strip()
+                    if w:
+                        whitelist.add(w)
+                        whitelist.add(w.lower())
+        except Exception as e:
+            print(f"Failed to load whitelist: {e}")
+    return whitelist
+
+def article_result(article, candidates):
+    return {
+        "title": article.get("title"),
+        "country": article.get("country"),
+        "date": article.get("date"),
+        "scraped_at": article.get("scraped_at"),
+        "candidates": candidates
+    }
+
+class NLPBackend:
+    """Base class: filtering and variant generation shared by all backends."""
+    name = None
+
+    def __init__(self, whitelist_path=None):
+        self.whitelist = load_whitelist(whitelist_path)
+        self.lemmatizer = WordNetLemmatizer()
+
+    def make_candidate(self, word, tag, sentence):
+        """Apply the candidate filters to one tagged token. Returns a candidate dict or None."""
+        # Filter: Alpha only, length > 3
+        if not word.isalpha() or len(word) <= 3:
+            return None
+
+        # Skip common stopwords
+        if word.lower() in STOPWORDS:
+            return None
+
+        # Skip Proper Nouns (NNP, NNPS)
+        if tag in ('NNP', 'NNPS'):
+            return None
+
+        # Whitelist Check
+        if word in self.whitelist or word.lower() in self.whitelist:
+            return None
+
+        # Generate Variants for Validation
+        variants = set()
+        variants.add(word)
+
+        # Lemmatization
+        wn_pos = get_wordnet_pos(tag)
+        lemma = self.lemmatizer.lemmatize(word.lower(), pos=wn_pos)
+        variants.add(lemma)
+        variants.add(lemma.lower())
+
+        # Fallback Lemmatization (Multi-POS)
+        if wn_pos == wordnet.NOUN:
+            # Try as Verb
+            variants.add(self.lemmatizer.lemmatize(word.lower(), pos=wordnet.VERB))
+        elif wn_pos == wordnet.VERB:
+            # Try as Noun
+            variants.add(self.lemmatizer.lemmatize(word.lower(), pos=wordnet.NOUN))
+        elif wn_pos == wordnet.ADJ:
+            # Try as Verb
+            variants.add(self.lemmatizer.lemmatize(word.lower(), pos=wordnet.VERB))
+
+        return {
+            "word": word,
+            "context": sentence.strip()[:100] + "...",
+            "tag": tag,
+            "lemma": lemma,
+            "variants": list(variants)
+        }
+
+    def analyze_many(self, articles):
+        """Analyze a batch of articles. Returns one result (or None) per input article, in order."""
+        raise NotImplementedError
+
+class NLTKBackend(NLPBackend):
+    """Original per-sentence NLTK pipeline with the maxent NE chunker."""
+    name = "nltk"
+
+    def analyze_article(self, article):
+        text = article.get("content", "")
+        if not text:
+            return None
+
+        candidates = []
+        try:
+            for sentence in nltk.sent_tokenize(text):
+                tagged = nltk.pos_tag(nltk.word_tokenize(sentence))
+                for chunk in nltk.ne_chunk(tagged):
+                    if hasattr(chunk, 'label'):
+                        # It's a Named Entity (e.g., PERSON, GPE, ORGANIZATION)
+                        continue
+                    word, tag = chunk
+                    cand = self.make_candidate(word, tag, sentence)
+                    if cand:
+                        candidates.append(cand)
+            return article_result(article, candidates)
+        except Exception as e:
+            print(f"Error processing article '{article.get('title', 'unknown')}': {e}")
+            return None
+
+    def analyze_many(self, articles):
+        return [self.analyze_article(a) for a in articles]
+
+class NLTKBatchBackend(NLPBackend):
+    """
+    Tags the sentences of a whole batch of articles with a single pos_tag_sents call.
+    NE chunking is optional: the NNP/NNPS filter already drops most named entities,
+    and the maxent chunker dominates the runtime.
+    """
+    name = "nltk-batch"
+
+    def __init__(self, whitelist_path=None, ner=False):
+        super().__init__(whitelist_path)
+        self.ner = ner
+
+    def analyze_many(self, articles):
+        results = [None] * len(articles)
+        sentences = [] # (article index, sentence text)
+        token_lists = []
+
+        for i, article in enumerate(articles):
+            text = article.get("content", "")
+            if not text:
+                continue
+            try:
+                for sentence in nltk.sent_tokenize(text):
+                    sentences.append((i, sentence))
+                    token_lists.append(nltk.word_tokenize(sentence))
+            except Exception as e:
+                print(f"Error processing article '{article.get('title', 'unknown')}': {e}")
+                continue
+            results[i] = article_result(article, [])
+
+        if not token_lists:
+            return results
+
+        tagged_sents = nltk.pos_tag_sents(token_lists)
+        if self.ner:
+            tagged_sents = nltk.ne_chunk_sents(tagged_sents)
+
+        for (i, sentence), tagged in zip(sentences, tagged_sents):
+            if results[i] is None:
+                continue
+            candidates = results[i]["candidates"]
+            for item in tagged:
+                if hasattr(item, 'label'):
+                    continue
+                word, tag = item
+                cand = self.make_candidate(word, tag, sentence)
+                if cand:
+                    candidates.append(cand)
+        return results
+
+class SpacyBackend(NLPBackend):
+    """
+    spaCy pipeline run through nlp.pipe. Tokens inside recognised entities are
+    skipped, which replaces the NLTK ne_chunk step. Requires spacy and a model
+    with a PTB tagger and NER (e.g. en_core_web_sm).
+    """
+    name = "spacy"
+
+    def __init__(self, whitelist_path=None, model="en_core_web_sm", n_process=1, batch_size=64):
+        super().__init__(whitelist_path)
+        try:
+            import spacy
+        except ImportError:
+            raise RuntimeError("spaCy backend requested but spacy is not installed (pip install spacy)")
+        self.nlp = spacy.load(model, exclude=["parser", "lemmatizer"])
+        if "senter" in self.nlp.disabled:
+            self.nlp.enable_pipe("senter")
+        elif "senter" not in self.nlp.pipe_names:
+            self.nlp.add_pipe("sentencizer")
+        self.n_process = n_process
+        self.batch_size = batch_size
+
+    def analyze_stream(self, items):
+        """
+        Analyze (key, article) items through a single nlp.pipe call, so the
+        n_process worker pool is started once for the whole stream.
+        Yields (key, result or None) in input order.
+        """
+        # Articles without content go through as empty docs to keep the order
+        texts = ((a.get("content") or "", (key, a)) for key, a in items)
+        docs = self.nlp.pipe(texts, as_tuples=True, n_process=self.n_process, batch_size=self.batch_size)
+        for doc, (key, article) in docs:
+            if not article.get("content"):
+                yield key, None
+                continue
+            candidates = []
+            for sent in doc.sents:
+                for token in sent:
+                    if token.ent_type_:
+                        continue
+                    cand = self.make_candidate(token.text, token.tag_, sent.text)
+                    if cand:
+                        candidates.append(cand)
+            yield key, article_result(article, candidates)
+
+    def analyze_many(self, articles):
+        return [result for _, result in self.analyze_stream(enumerate(articles))]
+
+BACKENDS = {
+    NLTKBackend.name: NLTKBackend,
+    NLTKBatchBackend.name: NLTKBatchBackend,
+    SpacyBackend.name: SpacyBackend,
+}
+
+def get_backend(name, whitelist_path=None, **options):
+    """Instantiate an NLP backend by name."""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown NLP backend '{name}'. Choose from: {', '.join(BACKENDS)}")
+    return BACKENDS[name](whitelist_path=whitelist_path, **options)
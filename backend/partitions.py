@@ -0,0 +1,199 @@
+"""
+Monthly range partitioning of error_events on `timestamp`.
+
+- error_events is a partitioned parent; each month lives in
+  error_events_yYYYYmMM. error_events_default catches rows for months that have
+  no partition yet; creating the partition later moves them over.
+- Partitions are created on demand: at startup for the next few months, and by
+  the bulk loader for every month present in a batch before it is inserted.
+- Retention: partitions older than ERROR_EVENTS_RETENTION_MONTHS are detached
+  (and moved to the `archive` schema) or dropped, per ERROR_EVENTS_RETENTION_MODE.
+  Detaching bypasses the rollup triggers, so the aggregate tables keep the
+  history of archived months. Dropping deletes that history too: the caller's
+  before_drop hook (storage.subtract_rollups) takes the partition's counts out
+  of the rollups in the same transaction. Every run is logged in
+  error_events_retention, which tells readers that kept their own aggregates
+  (the Analyzer) that events were removed.
+- A pre-partitioning heap table is converted by backend/scripts/normalize_events.py
+  (convert_legacy_table); startup refuses to run on one (schema.create_schema).
+"""
+import os
+from datetime import datetime
+
+PARENT = "error_events"
+DEFAULT_PARTITION = "error_events_default"
+ARCHIVE_SCHEMA = "archive"
+# Partition key of legacy events with neither a timestamp nor a dated article
+UNDATED_FALLBACK = "1970-01-01"
+
+PARENT_SCHEMA = '''
+    CREATE SEQUENCE IF NOT EXISTS error_events_id_seq;
+    CREATE TABLE IF NOT EXISTS error_events (
+        id BIGINT NOT NULL DEFAULT nextval('error_events_id_seq'),
+        article_id BIGINT,
+        country_id SMALLINT,
+        word_id INTEGER,
+        suggestion_id INTEGER,
+        timestamp TIMESTAMP,
+        context TEXT,
+        event_key TEXT,
+        PRIMARY KEY (id, timestamp)
+    ) PARTITION BY RANGE (timestamp);
+    ALTER SEQUENCE error_events_id_seq OWNED BY error_events.id;
+    CREATE TABLE IF NOT EXISTS error_events_default PARTITION OF error_events DEFAULT;
+    CREATE TABLE IF NOT EXISTS error_events_retention (
+        id SERIAL PRIMARY KEY,
+        partition TEXT NOT NULL,
+        mode TEXT NOT NULL,
+        applied_at TIMESTAMP DEFAULT NOW()
+    );
+'''
+
+# Shaped after the queries that hit raw events: time windows per country / per
+# word, keyset pagination on id, and idempotent loads (event_key).
+INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_events_timestamp ON error_events (timestamp)",
+    "CREATE INDEX IF NOT EXISTS idx_events_country_time ON error_events (country_id, timestamp)",
+    "CREATE INDEX IF NOT EXISTS idx_events_word_time ON error_events (word_id, timestamp)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_event_key ON error_events (event_key, timestamp)",
+]
+
+def month_start(value):
+    return datetime(value.year, value.month, 1)
+
+def add_months(month, n):
+    index = month.year * 12 + month.month - 1 + n
+    return datetime(index // 12, index % 12 + 1, 1)
+
+def partition_name(month):
+    return f"{PARENT}_y{month.year:04d}m{month.month:02d}"
+
+def existing_partitions(cursor):
+    cursor.execute('''
+        SELECT c.relname FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = to_regclass(%s)
+    ''', (PARENT,))
+    return {row[0] for row in cursor.fetchall()}
+
+def ensure_partition(cursor, month, existing=None):
+    """Create the partition for `month` if missing; adopts matching rows parked in the default partition."""
+    month = month_start(month)
+    name = partition_name(month)
+    if existing is not None and name in existing:
+        return False
+    cursor.execute("SELECT to_regclass(%s) IS NOT NULL", (name,))
+    if cursor.fetchone()[0]:
+        if existing is not None:
+            existing.add(name)
+        return False
+
+    start, end = month, add_months(month, 1)
+    # Attaching fails while the default partition holds rows of that range, so move them over first
+    cursor.execute(f"CREATE TABLE {name} (LIKE {PARENT} INCLUDING DEFAULTS)")
+    cursor.execute(f'''
+        WITH moved AS (
+            DELETE FROM {DEFAULT_PARTITION} WHERE timestamp >= %s AND timestamp < %s RETURNING *
+        )
+        INSERT INTO {name} SELECT * FROM moved
+    ''', (start, end))
+    cursor.execute(f"ALTER TABLE {PARENT} ATTACH PARTITION {name} FOR VALUES FROM (%s) TO (%s)", (start, end))
+    if existing is not None:
+        existing.add(name)
+    return True
+
+def ensure_partitions(cursor, months):
+    existing = existing_partitions(cursor)
+    created = 0
+    for month in sorted({month_start(m) for m in months if m is not None}):
+        created += ensure_partition(cursor, month, existing)
+    return created
+
+def ensure_future_partitions(cursor, months_ahead=3, now=None):
+    """Current month plus the next `months_ahead`."""
+    current = month_start(now or datetime.utcnow())
+    return ensure_partitions(cursor, [add_months(current, i) for i in range(months_ahead + 1)])
+
+def ensure_partitions_for_table(cursor, table, column="timestamp"):
+    """Create partitions for every month that occurs in `table` (e.g. a staging table)."""
+    cursor.execute(f"SELECT DISTINCT date_trunc('month', {column}) FROM {table} WHERE {column} IS NOT NULL")
+    return ensure_partitions(cursor, [row[0] for row in cursor.fetchall()])
+
+def create_schema(cursor, months_ahead=3):
+    """Partitioned error_events, converting a legacy heap table if there is one."""
+    cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", (PARENT,))
+    row = cursor.fetchone()
+    if row and row[0] == 'r':
+        convert_legacy_table(cursor)
+    else:
+        cursor.execute(PARENT_SCHEMA)
+    for statement in INDEXES:
+        cursor.execute(statement)
+    ensure_future_partitions(cursor, months_ahead)
+
+def convert_legacy_table(cursor):
+    """Move rows of a pre-partitioning error_events heap (already id-encoded, see schema.py) into the partitioned layout."""
+    print("Converting error_events to a monthly partitioned table...")
+    cursor.execute(f"LOCK TABLE {PARENT} IN ACCESS EXCLUSIVE MODE")
+    cursor.execute(f"ALTER TABLE {PARENT} RENAME TO error_events_legacy")
+    cursor.execute("ALTER INDEX IF EXISTS error_events_pkey RENAME TO error_events_legacy_pkey")
+    # Keep the id sequence: detach it from the legacy column so it survives the drop
+    cursor.execute("ALTER SEQUENCE IF EXISTS error_events_id_seq OWNED BY NONE")
+    cursor.execute("ALTER TABLE error_events_legacy ALTER COLUMN id DROP DEFAULT")
+    cursor.execute(PARENT_SCHEMA)
+    ensure_partitions_for_table(cursor, "error_events_legacy")
+    # timestamp is part of the partitioned primary key; undated rows take their article's time
+    cursor.execute("SELECT COUNT(*) FROM error_events_legacy WHERE timestamp IS NULL")
+    undated = cursor.fetchone()[0]
+    if undated:
+        print(f"{undated} events have no timestamp, using their article's published_at (or {UNDATED_FALLBACK})")
+    cursor.execute(f'''
+        INSERT INTO error_events (id, article_id, country_id, word_id, suggestion_id, timestamp, context, event_key)
+        SELECT e.id, e.article_id, e.country_id, e.word_id, e.suggestion_id,
+               COALESCE(e.timestamp, a.published_at, TIMESTAMP '{UNDATED_FALLBACK}'), e.context, e.event_key
+        FROM error_events_legacy e
+        LEFT JOIN articles a ON a.article_id = e.article_id
+    ''')
+    moved = cursor.rowcount
+    cursor.execute("SELECT setval('error_events_id_seq', GREATEST((SELECT MAX(id) FROM error_events), 1))")
+    # Drops the legacy indexes and rollup triggers too; _init_db recreates the triggers
+    # and rebuilds the rollups, which the copy above did not touch
+    cursor.execute("DROP TABLE error_events_legacy")
+    print(f"Moved {moved} events into monthly partitions.")
+
+def apply_retention(cursor, keep_months, mode="detach", now=None, before_drop=None):
+    """
+    Detach (mode='detach', moved to the archive schema) or drop (mode='drop')
+    monthly partitions that end before the retention window.
+    before_drop(cursor, name) runs on each detached partition about to be dropped.
+    Returns the names of the affected partitions.
+    """
+    if mode not in ("detach", "drop"):
+        raise ValueError(f"Unknown retention mode: {mode}")
+    cutoff = add_months(month_start(now or datetime.utcnow()), -keep_months)
+    affected = []
+    for name in sorted(existing_partitions(cursor)):
+        if name == DEFAULT_PARTITION:
+            continue
+        try:
+            month = datetime.strptime(name[len(PARENT) + 1:], "y%Ym%m")
+        except ValueError:
+            continue
+        if add_months(month, 1) > cutoff:
+            continue
+        cursor.execute(f"ALTER TABLE {PARENT} DETACH PARTITION {name}")
+        if mode == "drop":
+            if before_drop:
+                before_drop(cursor, name)
+            cursor.execute(f"DROP TABLE {name}")
+        else:
+            cursor.execute(f"CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA}")
+            cursor.execute(f"ALTER TABLE {name} SET SCHEMA {ARCHIVE_SCHEMA}")
+        cursor.execute("INSERT INTO error_events_retention (partition, mode) VALUES (%s, %s)", (name, mode))
+        affected.append(name)
+    return affected
+
+def retention_policy():
+    """(keep_months or None, mode) from ERROR_EVENTS_RETENTION_MONTHS / ERROR_EVENTS_RETENTION_MODE."""
+    months = os.getenv("ERROR_EVENTS_RETENTION_MONTHS")
+    return (int(months) if months else None), os.getenv("ERROR_EVENTS_RETENTION_MODE", "detach")
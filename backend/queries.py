@@ -0,0 +1,211 @@
+"""
+Registry of the parameterized read queries served to the API.
+
+Every query is written once with $n placeholders and executed by name, from
+the asyncpg pool (async_storage.py) or from a psycopg2 cursor (storage.py).
+Either way it is a server-side prepared statement, prepared once per
+connection: asyncpg does this itself, and on psycopg2 the registry issues
+PREPARE/EXECUTE. Postgres can then reuse its plan across calls, whatever the
+`hours` value.
+
+The registry times every execution into a per-query latency histogram, and
+reads Postgres' plan cache counters (pg_prepared_statements) for the
+registered statements on the asyncpg connections; both are served by
+/api/ops/metrics.
+"""
+import base64
+import time
+import weakref
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+class QueryRegistry:
+    def __init__(self):
+        self.queries = {}
+        self.stats = {}
+        # psycopg2 connection -> names PREPAREd on it (dropped with the connection)
+        self.prepared = weakref.WeakKeyDictionary()
+
+    def register(self, name, sql):
+        self.queries[name] = sql
+        self.stats[name] = {"calls": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0,
+                            "buckets": [0] * (len(LATENCY_BUCKETS_MS) + 1)}
+        return name
+
+    @contextmanager
+    def timed(self, name):
+        stats = self.stats[name]
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            stats["errors"] += 1
+            raise
+        finally:
+            ms = (time.perf_counter() - start) * 1000
+            stats["calls"] += 1
+            stats["total_ms"] += ms
+            stats["max_ms"] = max(stats["max_ms"], ms)
+            i = 0
+            while i < len(LATENCY_BUCKETS_MS) and ms > LATENCY_BUCKETS_MS[i]:
+                i += 1
+            stats["buckets"][i] += 1
+
+    async def fetch(self, conn, name, *args):
+        """Rows of a registered query on an asyncpg connection (prepared and cached per connection)."""
+        with self.timed(name):
+            return await conn.fetch(self.queries[name], *args)
+
+    async def fetchval(self, conn, name, *args):
+        with self.timed(name):
+            return await conn.fetchval(self.queries[name], *args)
+
+    def execute(self, cursor, name, *args):
+        """
+        Run a registered query on a psycopg2 cursor. It is PREPAREd on first use
+        on each connection (prepared statements outlive transactions), then
+        EXECUTEd with the arguments, so Postgres plans and caches it as for asyncpg.
+        """
+        prepared = self.prepared.setdefault(cursor.connection, set())
+        with self.timed(name):
+            if name not in prepared:
+                cursor.execute(f"PREPARE {name} AS {self.queries[name]}")
+                prepared.add(name)
+            if args:
+                cursor.execute(f"EXECUTE {name} ({', '.join(['%s'] * len(args))})", args)
+            else:
+                cursor.execute(f"EXECUTE {name}")
+
+    async def plan_cache(self, conn):
+        """Prepared-statement plan counters for the registered queries on one asyncpg connection."""
+        rows = await conn.fetch('''
+            SELECT statement, generic_plans, custom_plans FROM pg_prepared_statements
+            WHERE statement = ANY($1::text[])
+        ''', list(self.queries.values()))
+        by_sql = {r["statement"]: r for r in rows}
+        report = {}
+        for name, sql in self.queries.items():
+            row = by_sql.get(sql)
+            report[name] = {
+                "prepared": row is not None,
+                "generic_plans": row["generic_plans"] if row else 0,
+                "custom_plans": row["custom_plans"] if row else 0,
+            }
+        return report
+
+    def merge_plan_caches(self, caches):
+        """Sum plan_cache() reports of several connections; prepared_on counts the connections."""
+        merged = {name: {"prepared_on": 0, "generic_plans": 0, "custom_plans": 0} for name in self.queries}
+        for cache in caches:
+            for name, entry in cache.items():
+                merged[name]["prepared_on"] += entry["prepared"]
+                merged[name]["generic_plans"] += entry["generic_plans"]
+                merged[name]["custom_plans"] += entry["custom_plans"]
+        return merged
+
+    def report(self):
+        """Per-query call counts and latency histogram (bucket upper bounds in ms)."""
+        labels = [f"le_{b}" for b in LATENCY_BUCKETS_MS] + ["inf"]
+        return {
+            name: {
+                "calls": s["calls"],
+                "errors": s["errors"],
+                "avg_ms": round(s["total_ms"] / s["calls"], 3) if s["calls"] else None,
+                "max_ms": round(s["max_ms"], 3),
+                "histogram_ms": dict(zip(labels, s["buckets"])),
+            }
+            for name, s in self.stats.items()
+        }
+
+registry = QueryRegistry()
+
+ERROR_TRENDS = registry.register("error_trends", '''
+    SELECT w.word, t.cnt
+    FROM (
+        SELECT word_id, SUM(cnt) AS cnt
+        FROM error_counts_word_hour
+        WHERE hour >= date_trunc('hour', NOW() - make_interval(hours => $1))
+        GROUP BY word_id
+        HAVING SUM(cnt) > 0
+        ORDER BY cnt DESC
+        LIMIT $2
+    ) t
+    JOIN words w ON w.word_id = t.word_id
+    ORDER BY t.cnt DESC
+''')
+
+ERROR_CURVE = registry.register("error_curve", '''
+    SELECT hour AS hour_bucket, SUM(cnt) AS cnt
+    FROM error_counts_country_hour
+    WHERE hour >= date_trunc('hour', NOW() - make_interval(hours => $1))
+    GROUP BY hour_bucket
+    HAVING SUM(cnt) > 0
+    ORDER BY hour_bucket ASC
+''')
+
+ERRORS_PAGE = registry.register("errors_page", '''
+    SELECT e.id, c.code, c.name, a.title, w.word, sw.word, e.context, e.timestamp
+    FROM (
+        SELECT * FROM error_events
+        WHERE id > $1
+        ORDER BY id
+        LIMIT $2
+    ) e
+    LEFT JOIN countries c ON c.country_id = e.country_id
+    LEFT JOIN articles a ON a.article_id = e.article_id
+    LEFT JOIN words w ON w.word_id = e.word_id
+    LEFT JOIN words sw ON sw.word_id = e.suggestion_id
+    ORDER BY e.id
+''')
+
+ARTICLE_COUNT = registry.register("article_count", "SELECT COALESCE(SUM(articles), 0) FROM ingest_ledger")
+
+def error_row(r):
+    """API shape of an ERRORS_PAGE row."""
+    return {
+        "id": r[0],
+        "country_code": r[1],
+        "country": r[2],
+        "title": r[3],
+        "word": r[4],
+        "suggestion": r[5],
+        "context": r[6],
+        "timestamp": r[7].isoformat() if r[7] else None
+    }
+
+def file_error_row(event_id, article, err, countries_map):
+    """error_row() shape for an event read from the detection output files (NO-DB mode)."""
+    meta = countries_map.get(article.get("country", "Unknown"))
+    ts = article.get("scraped_at") or article.get("date")
+    try:
+        # Stored as UTC without a zone, like error_events.timestamp
+        ts = datetime.fromisoformat(ts) if ts else None
+        if ts is not None and ts.tzinfo is not None:
+            ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    except ValueError:
+        ts = None
+    return {
+        "id": event_id,
+        "country_code": meta["code"] if meta else "UNK",
+        "country": meta["name"] if meta else "Unknown",
+        "title": article.get("title", ""),
+        "word": err.get("word", "").lower(),
+        "suggestion": err.get("suggestion") or None,
+        "context": err.get("context", ""),
+        "timestamp": ts.isoformat() if ts else None
+    }
+
+def encode_cursor(*positions):
+    """Opaque page cursor for /api/errors, whatever positions the backend needs to resume."""
+    return base64.urlsafe_b64encode(".".join(map(str, positions)).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor, size):
+    """Positions of an encode_cursor() token; ValueError if it is not one with `size` of them."""
+    raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+    positions = [int(x) for x in raw.split(".")]
+    if len(positions) != size:
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    return positions
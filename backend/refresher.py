@@ -0,0 +1,105 @@
+"""
+Background refresh of the DataStorage caches.
+
+Every STATS_REFRESH_INTERVAL seconds (default 300, 0 = on demand only) the
+refresher runs DataStorage.refresh() in a worker thread: new detection
+output is synced and the stats caches are rebuilt, then swapped in.
+Requests keep reading the previous caches meanwhile and never wait on it.
+POST /api/ops/refresh triggers a run right away, e.g. after an ingest.
+Only one refresh runs at a time: a trigger while one is running joins it.
+On-demand runs are also spaced by OPS_REFRESH_MIN_INTERVAL seconds
+(default 30); see retry_after().
+"""
+import asyncio
+import os
+import time
+from datetime import datetime
+
+class CacheRefresher:
+    def __init__(self, storage, interval=None):
+        self.storage = storage
+        self.interval = float(os.getenv("STATS_REFRESH_INTERVAL", "300")) if interval is None else interval
+        self.min_interval = float(os.getenv("OPS_REFRESH_MIN_INTERVAL", "30"))
+        self.runs = 0
+        self.failures = 0
+        self.last_error = None
+        self.last_run_at = None
+        self.last_seconds = None
+        self._finished_at = None # time.monotonic() of the last run's end
+        self._current = None # Task of the refresh in progress
+        self._wake = None
+        self._task = None
+
+    def start(self):
+        """Start the periodic task on the running event loop."""
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def busy(self):
+        return self._current is not None and not self._current.done()
+
+    def retry_after(self):
+        """Seconds until an on-demand refresh is allowed again (0 if now or one is running to join)."""
+        if self.busy() or self._finished_at is None:
+            return 0.0
+        return max(0.0, self.min_interval - (time.monotonic() - self._finished_at))
+
+    def trigger(self):
+        """Ask for a refresh as soon as possible (coalesces with a pending or running one)."""
+        if self._wake is not None and not self.busy():
+            self._wake.set()
+
+    async def _loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.interval or None)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.refresh_now()
+
+    async def refresh_now(self):
+        """Run one refresh off the event loop, or join the one in progress. Returns True on success."""
+        if not self.busy():
+            self._current = asyncio.create_task(self._run())
+        # A caller that goes away (cancelled request) does not cancel the shared run
+        return await asyncio.shield(self._current)
+
+    async def _run(self):
+        start = time.perf_counter()
+        try:
+            await asyncio.to_thread(self.storage.refresh)
+            self.runs += 1
+            self.last_error = None
+            return True
+        except Exception as e:
+            self.failures += 1
+            self.last_error = str(e)
+            print(f"Cache refresh failed: {e}")
+            return False
+        finally:
+            self.last_seconds = round(time.perf_counter() - start, 4)
+            self.last_run_at = datetime.utcnow().isoformat()
+            self._finished_at = time.monotonic()
+
+    def status(self):
+        return {
+            "interval_seconds": self.interval,
+            "running": self._task is not None and not self._task.done(),
+            "refreshing": self.busy(),
+            "min_interval_seconds": self.min_interval,
+            "runs": self.runs,
+            "failures": self.failures,
+            "last_run_at": self.last_run_at,
+            "last_seconds": self.last_seconds,
+            "last_error": self.last_error,
+        }
@@ -0,0 +1,226 @@
+"""
+Normalized, dictionary-encoded error_events schema.
+
+Events hold integer surrogate keys instead of repeating text:
+
+    countries (country_id SMALLINT)  seeded from DATA["COUNTRIES"] (+ UNK)
+    words     (word_id INTEGER)      lexicon of misspellings and suggestions
+    articles  (article_id BIGINT)    one row per detected article (title, url key)
+    error_events (id, article_id, country_id, word_id, suggestion_id,
+                  timestamp, context, event_key)   partitioned by month
+
+Loads go through a text staging table (see bulk_load.py); resolve_staged()
+adds unseen words/articles to the dimensions and inserts the id-encoded events.
+Databases with the older text columns (or an unpartitioned table) are converted
+by backend/scripts/normalize_events.py; startup refuses to run on them.
+"""
+try:
+    from backend.data import DATA
+    from backend.partitions import create_schema as create_partitioned_events
+except ImportError:
+    from data import DATA
+    from partitions import create_schema as create_partitioned_events
+
+UNKNOWN_COUNTRY = ("UNK", "Unknown")
+
+DIMENSION_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS countries (
+        country_id SMALLINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+        code TEXT NOT NULL UNIQUE,
+        name TEXT NOT NULL,
+        region TEXT,
+        lat DOUBLE PRECISION,
+        lng DOUBLE PRECISION
+    );
+    CREATE TABLE IF NOT EXISTS words (
+        word_id INTEGER GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+        word TEXT NOT NULL UNIQUE
+    );
+    CREATE TABLE IF NOT EXISTS articles (
+        article_id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+        article_key TEXT NOT NULL UNIQUE,
+        title TEXT,
+        country_id SMALLINT,
+        published_at TIMESTAMP
+    );
+'''
+
+# Columns of the text staging table the loader COPYs into
+STAGE_COLUMNS = ("country_code", "country_name", "word", "suggestion", "timestamp", "context", "title", "event_key", "article_key")
+
+STAGE_SCHEMA = '''
+    CREATE TEMP TABLE IF NOT EXISTS {stage} (
+        country_code TEXT,
+        country_name TEXT,
+        word TEXT,
+        suggestion TEXT,
+        timestamp TIMESTAMP,
+        context TEXT,
+        title TEXT,
+        event_key TEXT,
+        article_key TEXT
+    )
+'''
+
+# Text rows -> dimension rows. {source} is any relation with the STAGE_COLUMNS.
+# Known values are filtered out before inserting, so ON CONFLICT (kept for
+# concurrent loaders) does not burn identity values on every batch.
+# A missing suggestion is NULL (legacy rows may hold ''); it is not a word and
+# leaves suggestion_id NULL.
+# Rows without a timestamp (undated articles) take their article's published_at,
+# which is fixed to the load time on first sight; replays resolve to the same value.
+RESOLVE_DIMENSIONS = '''
+    INSERT INTO words (word)
+        SELECT v.word FROM (
+            SELECT s.word FROM {source} s WHERE s.word IS NOT NULL
+            UNION
+            SELECT s.suggestion FROM {source} s WHERE s.suggestion <> ''
+        ) v
+        WHERE NOT EXISTS (SELECT 1 FROM words w WHERE w.word = v.word)
+    ON CONFLICT (word) DO NOTHING;
+
+    INSERT INTO articles (article_key, title, country_id, published_at)
+        SELECT DISTINCT ON (s.article_key) s.article_key, s.title,
+               COALESCE(c.country_id, (SELECT country_id FROM countries WHERE code = 'UNK')),
+               COALESCE(s.timestamp, date_trunc('second', now() AT TIME ZONE 'UTC'))
+        FROM {source} s
+        LEFT JOIN countries c ON c.code = s.country_code
+        WHERE s.article_key IS NOT NULL
+          AND NOT EXISTS (SELECT 1 FROM articles a WHERE a.article_key = s.article_key)
+    ON CONFLICT (article_key) DO NOTHING;
+'''
+
+RESOLVE_EVENTS = '''
+    INSERT INTO error_events (article_id, country_id, word_id, suggestion_id, timestamp, context, event_key)
+    SELECT DISTINCT ON (s.event_key)
+           a.article_id,
+           COALESCE(c.country_id, (SELECT country_id FROM countries WHERE code = 'UNK')),
+           w.word_id, sw.word_id, COALESCE(s.timestamp, a.published_at), s.context, s.event_key
+    FROM {source} s
+    JOIN articles a ON a.article_key = s.article_key
+    LEFT JOIN countries c ON c.code = s.country_code
+    LEFT JOIN words w ON w.word = s.word
+    LEFT JOIN words sw ON sw.word = NULLIF(s.suggestion, '')
+    ON CONFLICT (event_key, timestamp) DO NOTHING
+'''
+
+# Rows loaded before events carried an article key: identify the article by title/country/time
+LEGACY_ARTICLE_KEY = "'legacy:' || md5(COALESCE({t}title, '') || '|' || COALESCE({t}country_name, '') || '|' || COALESCE({t}timestamp::text, ''))"
+
+def seed_countries(cursor):
+    """Insert missing countries and refresh the metadata of known ones (ids never change)."""
+    rows = [(c["code"], c["name"], c.get("region"), c.get("lat"), c.get("lng")) for c in DATA["COUNTRIES"]]
+    rows.append((UNKNOWN_COUNTRY[0], UNKNOWN_COUNTRY[1], None, None, None))
+    cursor.execute("SELECT code FROM countries")
+    known = {row[0] for row in cursor.fetchall()}
+    cursor.executemany('''
+        UPDATE countries SET name = %s, region = %s, lat = %s, lng = %s WHERE code = %s
+    ''', [(name, region, lat, lng, code) for code, name, region, lat, lng in rows if code in known])
+    cursor.executemany('''
+        INSERT INTO countries (code, name, region, lat, lng) VALUES (%s, %s, %s, %s, %s)
+        ON CONFLICT (code) DO NOTHING
+    ''', [row for row in rows if row[0] not in known])
+
+def resolve_staged(cursor, stage):
+    """Move staged text rows into the dimensions and error_events. Returns new event count."""
+    cursor.execute(RESOLVE_DIMENSIONS.format(source=stage))
+    cursor.execute(RESOLVE_EVENTS.format(source=stage))
+    return cursor.rowcount
+
+def has_text_columns(cursor):
+    cursor.execute('''
+        SELECT 1 FROM information_schema.columns
+        WHERE table_schema = current_schema() AND table_name = 'error_events' AND column_name = 'word'
+    ''')
+    return cursor.fetchone() is not None
+
+def legacy_layout(cursor):
+    """Which older error_events layout is in place ('text columns', 'unpartitioned table'), or None."""
+    cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass('error_events')")
+    row = cursor.fetchone()
+    if not row:
+        return None
+    if has_text_columns(cursor):
+        return "text columns"
+    if row[0] == 'r':
+        return "unpartitioned table"
+    return None
+
+# One id range of a text-column error_events to surrogate keys: set-based joins
+# against the dimensions, rows already converted (country_id set) are skipped
+NORMALIZE_RANGE = f'''
+    UPDATE error_events e SET
+        article_id = r.article_id, country_id = r.country_id,
+        word_id = r.word_id, suggestion_id = r.suggestion_id
+    FROM (
+        SELECT s.id, a.article_id,
+               COALESCE(c.country_id, (SELECT country_id FROM countries WHERE code = 'UNK')) AS country_id,
+               w.word_id, sw.word_id AS suggestion_id
+        FROM error_events s
+        LEFT JOIN articles a ON a.article_key = {LEGACY_ARTICLE_KEY.format(t='s.')}
+        LEFT JOIN countries c ON c.code = s.country_code
+        LEFT JOIN words w ON w.word = s.word
+        LEFT JOIN words sw ON sw.word = NULLIF(s.suggestion, '')
+        WHERE s.id >= %(lo)s AND s.id < %(hi)s AND s.country_id IS NULL
+    ) r
+    WHERE e.id = r.id
+'''
+
+def add_id_columns(cursor):
+    """Nullable surrogate key columns next to the text ones (a catalog-only change)."""
+    cursor.execute('''
+        ALTER TABLE error_events
+            ADD COLUMN IF NOT EXISTS event_key TEXT,
+            ADD COLUMN IF NOT EXISTS article_id BIGINT,
+            ADD COLUMN IF NOT EXISTS country_id SMALLINT,
+            ADD COLUMN IF NOT EXISTS word_id INTEGER,
+            ADD COLUMN IF NOT EXISTS suggestion_id INTEGER
+    ''')
+
+def normalize_range(cursor, lo, hi):
+    """Add the words/articles of events with lo <= id < hi to the dimensions and set their ids. Returns rows converted."""
+    source = f"(SELECT *, {LEGACY_ARTICLE_KEY.format(t='')} AS article_key FROM error_events WHERE id >= %(lo)s AND id < %(hi)s AND country_id IS NULL)"
+    cursor.execute(RESOLVE_DIMENSIONS.format(source=source), {"lo": lo, "hi": hi})
+    cursor.execute(NORMALIZE_RANGE, {"lo": lo, "hi": hi})
+    return cursor.rowcount
+
+def drop_text_columns(cursor):
+    """Last step of the conversion; drops the text indexes with them."""
+    cursor.execute('''
+        ALTER TABLE error_events
+            DROP COLUMN country_code,
+            DROP COLUMN country_name,
+            DROP COLUMN word,
+            DROP COLUMN suggestion,
+            DROP COLUMN title
+    ''')
+
+def create_dimensions(cursor):
+    cursor.execute(DIMENSION_SCHEMA)
+    seed_countries(cursor)
+
+def clear_empty_suggestions(cursor):
+    """Earlier loads stored a missing suggestion as the word ''; point those events at NULL instead."""
+    cursor.execute("SELECT word_id FROM words WHERE word = ''")
+    row = cursor.fetchone()
+    if not row:
+        return
+    cursor.execute("UPDATE error_events SET suggestion_id = NULL WHERE suggestion_id = %s", row)
+    cursor.execute('''
+        DELETE FROM words w WHERE w.word_id = %s
+          AND NOT EXISTS (SELECT 1 FROM error_events e WHERE e.word_id = w.word_id)
+    ''', row)
+
+def create_schema(cursor, months_ahead=3):
+    """
+    Dimensions + partitioned, id-encoded error_events. Older layouts are not
+    converted here: that rewrites every event, so it is an explicit step
+    (backend/scripts/normalize_events.py), not something every startup may do.
+    """
+    create_dimensions(cursor)
+    layout = legacy_layout(cursor)
+    if layout:
+        raise RuntimeError(f"error_events still has the old layout ({layout}). "
+                           "Run python backend/scripts/normalize_events.py before starting.")
+    create_partitioned_events(cursor, months_ahead)
+    clear_empty_suggestions(cursor)
@@ -0,0 +1,93 @@
+import argparse
+import os
+import sys
+import time
+
+# Add project root directory to path to allow imports like 'from backend.nlp_backends import ...'
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.nlp_backends import BACKENDS, get_backend
+from backend.article_io import iter_articles
+
+def load_corpus(path, limit):
+    """Fixed corpus: the first `limit` articles (with content) of the input file."""
+    articles = []
+    for _, article in iter_articles(path):
+        if article.get("content"):
+            articles.append(article)
+            if len(articles) >= limit:
+                break
+    return articles
+
+def candidate_keys(results):
+    keys = set()
+    for i, res in enumerate(results):
+        if res:
+            for cand in res["candidates"]:
+                keys.add((i, cand["word"], cand["context"]))
+    return keys
+
+def benchmark(backend_name, articles, batch_size, options):
+    start = time.perf_counter()
+    backend = get_backend(backend_name, **options)
+    load_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = []
+    if hasattr(backend, "analyze_stream"):
+        # Same path as the detector: one pipe over the whole corpus
+        results = [r for _, r in backend.analyze_stream(enumerate(articles))]
+    else:
+        for i in range(0, len(articles), batch_size):
+            results.extend(backend.analyze_many(articles[i:i + batch_size]))
+    elapsed = time.perf_counter() - start
+
+    chars = sum(len(a["content"]) for a in articles)
+    return {
+        "backend": backend_name,
+        "load_s": load_time,
+        "elapsed_s": elapsed,
+        "articles_per_s": len(articles) / elapsed if elapsed else 0.0,
+        "chars_per_s": chars / elapsed if elapsed else 0.0,
+        "candidates": sum(len(r["candidates"]) for r in results if r),
+        "keys": candidate_keys(results)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput benchmark for detection NLP backends")
+    parser.add_argument("--input", default=os.path.join("data", "sample_news_scraped.json"), help="Corpus (.json or .jsonl)")
+    parser.add_argument("--limit", type=int, default=200, help="Number of articles in the fixed corpus")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--backends", default=",".join(BACKENDS), help="Comma separated backend names")
+    parser.add_argument("--n-process", type=int, default=1, help="spaCy n_process")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input):
+        print(f"Corpus {args.input} not found.")
+        return
+
+    articles = load_corpus(args.input, args.limit)
+    print(f"Corpus: {len(articles)} articles from {args.input}\n")
+
+    reports = []
+    for name in args.backends.split(","):
+        options = {"n_process": args.n_process, "batch_size": args.batch_size} if name == "spacy" else {}
+        try:
+            reports.append(benchmark(name, articles, args.batch_size, options))
+        except Exception as e:
+            print(f"Skipping {name}: {e}")
+
+    if not reports:
+        return
+
+    baseline = reports[0]["keys"]
+    print(f"{'backend':<12} {'load(s)':>8} {'run(s)':>8} {'art/s':>8} {'chars/s':>10} {'cands':>7} {'overlap':>8}")
+    for r in reports:
+        union = baseline | r["keys"]
+        overlap = len(baseline & r["keys"]) / len(union) if union else 1.0
+        print(f"{r['backend']:<12} {r['load_s']:>8.2f} {r['elapsed_s']:>8.2f} {r['articles_per_s']:>8.1f} "
+              f"{r['chars_per_s']:>10.0f} {r['candidates']:>7} {overlap:>8.2%}")
+    print(f"\n(overlap = Jaccard similarity of candidates vs. {reports[0]['backend']})")
+
+if __name__ == "__main__":
+    main()
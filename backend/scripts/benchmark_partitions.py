@@ -0,0 +1,142 @@
+"""
+Benchmark: the registered API queries (backend/queries.py) on the production layout.
+
+Builds the real schema in a scratch schema: countries/words dictionaries
+(schema.DIMENSION_SCHEMA), the monthly partitioned error_events
+(partitions.PARENT_SCHEMA + INDEXES) and the trigger-maintained rollups
+(storage.ROLLUP_SCHEMA). It fills them with synthetic id-encoded events spread
+over --months, then runs each registered query with the API's parameters:
+- EXPLAIN ANALYZE of the prepared statement, for the plan, buffers and
+  partitions scanned
+- registry.execute, for the latency the API sees
+
+    DATABASE_URL=postgresql://... python backend/scripts/benchmark_partitions.py --rows 5000000 --months 24
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+
+# Add project root directory to path to allow imports like 'from backend.data import DATA'
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import psycopg2
+from datetime import datetime
+from backend.partitions import month_start, add_months, ensure_partitions
+from backend.queries import registry, ERROR_TRENDS, ERROR_CURVE, ERRORS_PAGE
+from backend.schema import create_schema
+from backend.storage import ROLLUP_SCHEMA, ROLLUP_TRIGGERS
+
+SCHEMA = "bench_partitions"
+WORDS = 5000
+
+def cases(rows):
+    """(label, query name, parameters) in the shapes the API calls them."""
+    return [
+        ("trends_24h", ERROR_TRENDS, (24, 10)),
+        ("trends_30d", ERROR_TRENDS, (24 * 30, 10)),
+        ("curve_24h", ERROR_CURVE, (24,)),
+        ("curve_7d", ERROR_CURVE, (24 * 7,)),
+        ("page_first", ERRORS_PAGE, (0, 100)),
+        ("page_middle", ERRORS_PAGE, (rows // 2, 100)),
+    ]
+
+def build(cursor, rows, months):
+    now = datetime.utcnow()
+    first = add_months(month_start(now), -(months - 1))
+    cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+    cursor.execute(f"CREATE SCHEMA {SCHEMA}")
+    # Every unqualified name below (and in the registered queries) resolves to the scratch schema
+    cursor.execute(f"SET search_path TO {SCHEMA}")
+    create_schema(cursor)
+    ensure_partitions(cursor, [add_months(first, i) for i in range(months)])
+    cursor.execute(ROLLUP_SCHEMA)
+    cursor.execute(ROLLUP_TRIGGERS)
+    cursor.execute("INSERT INTO words (word) SELECT 'w' || g FROM generate_series(0, %s) g", (WORDS - 1,))
+
+    # Uniform spread over the whole range up to now; ~1/(30*months) of it lands in the last 24h.
+    # Inserted in id order, one statement per million rows, so the rollup triggers see bounded batches.
+    print(f"Generating {rows:,} events over {months} months...")
+    cursor.execute("SELECT array_agg(country_id) FROM countries")
+    countries = cursor.fetchone()[0]
+    for lo in range(1, rows + 1, 1_000_000):
+        cursor.execute('''
+            INSERT INTO error_events (country_id, word_id, timestamp, context, event_key)
+            SELECT (%s::smallint[])[1 + g %% %s],
+                   (SELECT min(word_id) FROM words) + floor(pow(random(), 3) * %s)::int,
+                   %s::timestamp + (g::float8 / %s) * (%s::timestamp - %s::timestamp),
+                   'benchmark', 'bench:' || g
+            FROM generate_series(%s, %s) g
+        ''', (countries, len(countries), WORDS, first, rows, now, first, lo, min(lo + 999_999, rows)))
+    cursor.execute("ANALYZE")
+
+def plan_stats(plan):
+    """(relations scanned, subplans removed by runtime pruning, shared buffers hit+read)."""
+    relations = set()
+    removed = 0
+    def walk(node):
+        nonlocal removed
+        if "Relation Name" in node:
+            relations.add(node["Relation Name"])
+        removed += node.get("Subplans Removed", 0)
+        for child in node.get("Plans", []):
+            walk(child)
+    walk(plan["Plan"])
+    buffers = plan["Plan"].get("Shared Hit Blocks", 0) + plan["Plan"].get("Shared Read Blocks", 0)
+    return relations, removed, buffers
+
+def run(cursor, rows, repeats):
+    cursor.execute("SELECT COUNT(*) FROM pg_inherits WHERE inhparent = 'error_events'::regclass")
+    partitions = cursor.fetchone()[0]
+    print(f"\n{'case':<12} {'plan ms':>8} {'api ms':>8} {'buffers':>8}  relations scanned")
+    for label, name, params in cases(rows):
+        cursor.execute(f"PREPARE bench AS {registry.queries[name]}")
+        args = ", ".join(str(p) for p in params)
+        timings = []
+        for _ in range(repeats):
+            cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) EXECUTE bench({args})")
+            result = cursor.fetchone()[0]
+            plan = result[0] if isinstance(result, list) else json.loads(result)[0]
+            timings.append(plan["Execution Time"])
+        cursor.execute("DEALLOCATE bench")
+
+        latencies = []
+        for _ in range(repeats):
+            before = registry.stats[name]["total_ms"]
+            registry.execute(cursor, name, *params)
+            cursor.fetchall()
+            latencies.append(registry.stats[name]["total_ms"] - before)
+
+        relations, removed, buffers = plan_stats(plan)
+        events = sorted(r for r in relations if r.startswith("error_events"))
+        scanned = ", ".join(sorted(relations - set(events)))
+        if events:
+            scanned += f"{', ' if scanned else ''}{len(events)} of {partitions} partitions ({removed} pruned at runtime)"
+        print(f"{label:<12} {statistics.median(timings):>8.2f} {statistics.median(latencies):>8.2f} {buffers:>8}  {scanned}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Registered query benchmark on the partitioned, dictionary-encoded layout")
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--months", type=int, default=24)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--keep", action="store_true", help=f"Keep the {SCHEMA} schema afterwards")
+    args = parser.parse_args()
+
+    db_url = os.getenv("DATABASE_URL")
+    if not db_url:
+        print("DATABASE_URL environment variable not set.")
+        return
+    conn = psycopg2.connect(db_url)
+    conn.autocommit = True
+    cursor = conn.cursor()
+    try:
+        build(cursor, args.rows, args.months)
+        run(cursor, args.rows, args.repeats)
+    finally:
+        if not args.keep:
+            cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        conn.close()
+
+if __name__ == "__main__":
+    main()
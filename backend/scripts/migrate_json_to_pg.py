@@ -1,8 +1,6 @@
 import os
-import json
 import psycopg2
 import sys
-from datetime import datetime
 
 # Add project root directory to path to allow imports like 'from backend.data import DATA'
 # File is at: backend/scripts/migrate_json_to_pg.py
@@ -13,21 +11,11 @@ def migrate():
     # Path to JSON file (relative to project root)
     base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
     json_path = os.path.join(base_dir, "data", "detected_errors.json")
+    jsonl_path = os.path.join(base_dir, "data", "detected_errors.jsonl")
+    sources = [p for p in (json_path, jsonl_path) if os.path.exists(p)]
     
-    if not os.path.exists(json_path):
-        print(f"File not found: {json_path}")
-        return
-
-    print(f"Reading data from {json_path}...")
-    try:
-        with open(json_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-    except Exception as e:
-        print(f"Error reading JSON: {e}")
-        return
-
-    if not data:
-        print("No data found in JSON.")
+    if not sources:
+        print(f"File not found: {jsonl_path}")
         return
 
     # Database connection
@@ -46,45 +34,28 @@ def migrate():
         print(f"Database connection failed: {e}")
         return
 
-    # Prepare data
-    rows = []
-    print(f"Processing {len(data)} articles...")
-    
-    # Simple mapping for country codes (simplified version of backend/storage.py logic)
-    # Ideally we should fetch this from DB or use the same map, but for migration script we keep it simple or try to import
+    # Same row mapping (and idempotency keys) as the startup sync in backend/storage.py,
+    # through the same ingestion ledger, so the two never load the file twice
     from backend.data import DATA
+    from backend.bulk_load import BulkLoader, IngestLedger
+    from backend.schema import create_schema
     countries_map = {c["name"]: c for c in DATA["COUNTRIES"]}
 
-    for article in data:
-        c_name = article.get("country", "Unknown")
-        meta = countries_map.get(c_name)
-        c_code = meta["code"] if meta else "UNK"
-        ts = article.get("scraped_at") or article.get("date") or datetime.utcnow().isoformat()
-        title = article.get("title", "")
-        
-        for err in article.get("errors", []):
-            rows.append((
-                c_code,
-                c_name,
-                err.get("word", "").lower(),
-                err.get("suggestion", ""),
-                ts,
-                err.get("context", ""),
-                title
-            ))
-
-    if not rows:
-        print("No error events found to migrate.")
-        return
-
-    print(f"Inserting {len(rows)} error events...")
-    
     try:
-        # Batch insert
-        args_str = ','.join(cursor.mogrify("(%s,%s,%s,%s,%s,%s,%s)", x).decode('utf-8') for x in rows)
-        cursor.execute("INSERT INTO error_events (country_code, country_name, word, suggestion, timestamp, context, title) VALUES " + args_str)
+        create_schema(cursor)
         conn.commit()
-        print("Migration completed successfully.")
+        # COPY in bounded batches; re-running the migration skips articles already loaded
+        loader = BulkLoader(conn)
+        ledger = IngestLedger(conn)
+        articles = 0
+        for path in sources:
+            print(f"Streaming articles from {path}...")
+            # Only the JSON array can predate the ledger (see IngestLedger)
+            articles += ledger.sync(path, countries_map, loader, legacy=path == json_path)[0]
+        if not articles:
+            print("No new error events found to migrate.")
+            return
+        print(f"Migration completed successfully: {articles} articles, {loader.report()}")
     except Exception as e:
         conn.rollback()
         print(f"Migration failed: {e}")
@@ -0,0 +1,93 @@
+"""
+Convert an older error_events table to the current layout (backend/schema.py).
+
+1. Text columns (country_code, word, ...) -> surrogate keys into the
+   countries/words/articles dictionaries, one id range per transaction, so
+   each commit is short and an interrupted run resumes where it stopped.
+   Writers may keep inserting meanwhile; their rows are caught up at the end.
+2. The text columns are dropped under a brief exclusive lock, after the
+   last catch-up range.
+3. An unpartitioned table is moved into monthly partitions (partitions.py).
+   This copies every row in one transaction, with the table locked.
+
+The API refuses to start until this has run:
+
+    DATABASE_URL=postgresql://... python backend/scripts/normalize_events.py --batch-size 100000
+"""
+import argparse
+import os
+import sys
+import time
+
+# Add project root directory to path to allow imports like 'from backend.data import DATA'
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import psycopg2
+from backend.schema import (legacy_layout, has_text_columns, create_dimensions, add_id_columns,
+                            normalize_range, drop_text_columns, create_schema)
+from backend.partitions import convert_legacy_table
+
+def normalize(conn, batch_size):
+    cursor = conn.cursor()
+    create_dimensions(cursor)
+    add_id_columns(cursor)
+    conn.commit()
+
+    cursor.execute("SELECT MIN(id), MAX(id) FROM error_events WHERE country_id IS NULL")
+    lo, last = cursor.fetchone()
+    converted = 0
+    start = time.perf_counter()
+    if lo is not None:
+        print(f"Normalizing error_events ids {lo}..{last} in batches of {batch_size}...")
+        while lo <= last:
+            converted += normalize_range(cursor, lo, lo + batch_size)
+            conn.commit()
+            lo += batch_size
+            print(f"  up to id {min(lo - 1, last)}: {converted} events ({converted / max(time.perf_counter() - start, 1e-9):,.0f}/s)")
+
+    # Rows inserted while the batches ran, then the text columns, under one short lock
+    cursor.execute("LOCK TABLE error_events IN ACCESS EXCLUSIVE MODE")
+    cursor.execute("SELECT MAX(id) FROM error_events")
+    top = cursor.fetchone()[0] or 0
+    if lo is None:
+        lo = 0
+    converted += normalize_range(cursor, lo, top + 1)
+    drop_text_columns(cursor)
+    conn.commit()
+    print(f"Normalized {converted} events in {time.perf_counter() - start:.1f}s. "
+          "Run VACUUM FULL error_events to reclaim the space of the dropped text columns.")
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert error_events to the normalized, partitioned layout")
+    parser.add_argument("--batch-size", type=int, default=100_000, help="Event ids per transaction")
+    args = parser.parse_args()
+
+    db_url = os.getenv("DATABASE_URL")
+    if not db_url:
+        print("DATABASE_URL environment variable not set.")
+        return
+
+    conn = psycopg2.connect(db_url)
+    try:
+        cursor = conn.cursor()
+        layout = legacy_layout(cursor)
+        if not layout:
+            print("error_events already has the current layout, nothing to do.")
+            return
+        if has_text_columns(cursor):
+            normalize(conn, args.batch_size)
+        if legacy_layout(cursor):
+            convert_legacy_table(cursor)
+            conn.commit()
+        # Indexes and upcoming partitions, as at startup
+        create_schema(cursor)
+        conn.commit()
+        print("error_events is up to date. The rollups are rebuilt on the next API start.")
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
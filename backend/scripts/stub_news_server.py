@@ -0,0 +1,77 @@
+"""
+Local stand-in for the GDELT Doc API and the news sites it links to, for
+exercising the crawler without touching the network:
+
+    python backend/scripts/stub_news_server.py --port 8765 --articles 1000 --fail-rate 0.1
+    python backend/fetch_news.py --gdelt-url http://127.0.0.1:8765/api/v2/doc/doc --max-records 1000
+
+All article pages live on the stub's host:port, so they share one per-domain
+token bucket; raise --per-domain-rate to measure raw crawler throughput.
+"""
+import argparse
+import random
+import sys
+import os
+from collections import Counter
+
+# Add project root directory to path to allow imports like 'from backend.data import DATA'
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from aiohttp import web
+from backend.data import DATA
+
+PARAGRAPH = ("The government announced a new package of measures on Tuesday, "
+             "saying the plan would support families and small businesses across the region. ")
+
+def make_app(args):
+    rng = random.Random(args.seed)
+    hits = Counter() # requests per article, for --fail-first
+
+    async def artlist(request):
+        max_records = int(request.query.get("maxrecords", 20))
+        base = f"http://{request.host}"
+        articles = []
+        for i in range(min(max_records, args.articles)):
+            country = DATA["COUNTRIES"][i % len(DATA["COUNTRIES"])]
+            articles.append({
+                "url": f"{base}/article/{i}",
+                "title": f"Stub article {i}",
+                "seendate": "20240101T000000Z",
+                "domain": request.host,
+                "language": "English",
+                "sourcecountry": country["name"]
+            })
+        return web.json_response({"articles": articles})
+
+    async def article(request):
+        n = int(request.match_info["n"])
+        hits[n] += 1
+        if hits[n] <= args.fail_first:
+            return web.Response(status=429, headers={"Retry-After": "0"})
+        if rng.random() < args.fail_rate:
+            return web.Response(status=rng.choice([429, 503]), headers={"Retry-After": "0"})
+        etag = f'"stub-{n}"'
+        if request.headers.get("If-None-Match") == etag:
+            return web.Response(status=304, headers={"ETag": etag})
+        body = "".join(f"<p>{PARAGRAPH * 3} Article {n}, paragraph {p}.</p>" for p in range(4))
+        html = f"<html><head><title>Stub article {n}</title></head><body><article>{body}</article></body></html>"
+        return web.Response(text=html, content_type="text/html", headers={"ETag": etag})
+
+    app = web.Application()
+    app.router.add_get("/api/v2/doc/doc", artlist)
+    app.router.add_get("/article/{n}", article)
+    return app
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub GDELT + news site server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--articles", type=int, default=100)
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of article requests answered with 429/503")
+    parser.add_argument("--fail-first", type=int, default=0, help="Answer the first N requests of every article with 429")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    web.run_app(make_app(args), host=args.host, port=args.port)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+"""
+Read-only, memory-mappable export of the SymSpell dictionary.
+
+The word table and the deletes index of a loaded SymSpell instance are written
+to one flat binary file of numpy arrays. Worker processes open it with mmap, so
+the pages are shared through the OS page cache instead of every process holding
+a private copy of the (multi-GB) Python dicts. SharedDictionary exposes the same
+check_word/suggest interface as SpellChecker.
+
+Layout (little-endian, every section 8-byte aligned):
+    magic (8 bytes) | header length (uint32) | JSON header | sections...
+    word_blob      utf-8 words concatenated
+    word_offsets   uint64[n_words + 1]   word i = blob[off[i]:off[i+1]]
+    word_counts    int64[n_words]
+    word_hashes    uint64[n_words]       sorted
+    word_order     uint32[n_words]       word index for each sorted hash
+    delete_hashes  uint64[n_deletes]     sorted
+    delete_starts  uint64[n_deletes + 1] ranges into postings
+    postings       uint32[n_postings]    word indices per delete
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+import numpy as np
+from symspellpy.editdistance import DistanceAlgorithm, EditDistance
+
+try:
+    from backend.spell_checker import CachedVerdictMixin
+except ImportError:
+    from spell_checker import CachedVerdictMixin
+
+MAGIC = b"SPLDICT1"
+FORMAT_VERSION = 1
+
+SECTIONS = [
+    ("word_blob", np.uint8),
+    ("word_offsets", np.uint64),
+    ("word_counts", np.int64),
+    ("word_hashes", np.uint64),
+    ("word_order", np.uint32),
+    ("delete_hashes", np.uint64),
+    ("delete_starts", np.uint64),
+    ("postings", np.uint32),
+]
+
+def hash64(text):
+    """Stable 64-bit hash of a string (Python's hash() is salted per process)."""
+    return int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'little')
+
+def export_shared_dictionary(sym_spell, path, max_edit_distance, prefix_length, source_key=None):
+    """Write the words and deletes of a loaded SymSpell instance to `path`."""
+    words = list(sym_spell.words.keys())
+    word_index = {w: i for i, w in enumerate(words)}
+
+    encoded = [w.encode('utf-8') for w in words]
+    word_offsets = np.zeros(len(words) + 1, dtype=np.uint64)
+    np.cumsum([len(b) for b in encoded], out=word_offsets[1:])
+    word_blob = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    word_counts = np.fromiter((sym_spell.words[w] for w in words), dtype=np.int64, count=len(words))
+
+    hashes = np.fromiter((hash64(w) for w in words), dtype=np.uint64, count=len(words))
+    word_order = np.argsort(hashes, kind='stable').astype(np.uint32)
+    word_hashes = hashes[word_order]
+
+    # Deletes: group postings by delete hash (colliding deletes share a bucket,
+    # the edit distance check in suggest() filters out the false positives)
+    deletes = sym_spell.deletes
+    keys = list(deletes.keys())
+    del_hashes = np.fromiter((hash64(k) for k in keys), dtype=np.uint64, count=len(keys))
+    order = np.argsort(del_hashes, kind='stable')
+
+    delete_hashes = []
+    delete_starts = [0]
+    postings = []
+    last = None
+    for i in order:
+        h = int(del_hashes[i])
+        if h != last:
+            if last is not None:
+                delete_starts.append(len(postings))
+            delete_hashes.append(h)
+            last = h
+        postings.extend(word_index[w] for w in deletes[keys[i]])
+    delete_starts.append(len(postings))
+
+    arrays = {
+        "word_blob": word_blob,
+        "word_offsets": word_offsets,
+        "word_counts": word_counts,
+        "word_hashes": word_hashes,
+        "word_order": word_order,
+        "delete_hashes": np.array(delete_hashes, dtype=np.uint64),
+        "delete_starts": np.array(delete_starts, dtype=np.uint64),
+        "postings": np.array(postings, dtype=np.uint32),
+    }
+
+    header = {
+        "version": FORMAT_VERSION,
+        "max_edit_distance": max_edit_distance,
+        "prefix_length": prefix_length,
+        "max_length": max((len(w) for w in words), default=0),
+        "source_key": source_key,
+        "sections": {}
+    }
+    # Section offsets are relative to the end of the header block
+    offset = 0
+    for name, dtype in SECTIONS:
+        arr = arrays[name].astype(dtype, copy=False)
+        arrays[name] = arr
+        header["sections"][name] = [offset, len(arr)]
+        offset += arr.nbytes
+        offset += (-offset) % 8
+
+    header_bytes = json.dumps(header).encode('utf-8')
+    header_bytes += b" " * ((-(len(MAGIC) + 4 + len(header_bytes))) % 8)
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(header_bytes)))
+        f.write(header_bytes)
+        for name, _ in SECTIONS:
+            data = arrays[name].tobytes()
+            f.write(data)
+            f.write(b"\0" * ((-len(data)) % 8))
+    os.replace(tmp_path, path)
+    return header
+
+def read_header(path):
+    """Return the JSON header of a shared dictionary file, or None if unreadable."""
+    try:
+        with open(path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                return None
+            (length,) = struct.unpack("<I", f.read(4))
+            return json.loads(f.read(length))
+    except (OSError, ValueError):
+        return None
+
+class SharedDictionary(CachedVerdictMixin):
+    """Read-only SymSpell lookup over a memory-mapped export (see module docstring)."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a shared dictionary file")
+        (length,) = struct.unpack_from("<I", self._mm, len(MAGIC))
+        base = len(MAGIC) + 4 + length
+        self.header = json.loads(self._mm[len(MAGIC) + 4:base])
+        if self.header.get("version") != FORMAT_VERSION:
+            raise ValueError(f"{path} has unsupported format version {self.header.get('version')}")
+
+        for name, dtype in SECTIONS:
+            offset, count = self.header["sections"][name]
+            setattr(self, name, np.frombuffer(self._mm, dtype=dtype, count=count, offset=base + offset))
+
+        self.max_edit_distance = self.header["max_edit_distance"]
+        self.prefix_length = self.header["prefix_length"]
+        self.max_length = self.header["max_length"]
+        self.cache_source_key = self.header["source_key"]
+        self.distance_comparer = EditDistance(DistanceAlgorithm.DAMERAU_OSA)
+
+    def _word(self, i):
+        return bytes(self.word_blob[int(self.word_offsets[i]):int(self.word_offsets[i + 1])]).decode('utf-8')
+
+    def _find_word(self, word):
+        """Index of `word` in the word table, or -1."""
+        h = np.uint64(hash64(word))
+        lo = int(np.searchsorted(self.word_hashes, h, side='left'))
+        while lo < len(self.word_hashes) and self.word_hashes[lo] == h:
+            idx = int(self.word_order[lo])
+            if self._word(idx) == word:
+                return idx
+            lo += 1
+        return -1
+
+    def _deletes(self, candidate):
+        h = np.uint64(hash64(candidate))
+        pos = int(np.searchsorted(self.delete_hashes, h, side='left'))
+        if pos >= len(self.delete_hashes) or self.delete_hashes[pos] != h:
+            return ()
+        start, end = int(self.delete_starts[pos]), int(self.delete_starts[pos + 1])
+        return self.postings[start:end]
+
+    def check_word(self, word):
+        """Check if a word is valid (in dictionary). Returns True/False."""
+        return self._find_word(word.lower()) >= 0
+
+    def suggest(self, word):
+        """
+        Get suggestions for a misspelled word (SymSpell Verbosity.CLOSEST).
+        Returns list of (term, distance, count).
+        """
+        phrase = word
+        max_edit_distance = self.max_edit_distance
+        phrase_len = len(phrase)
+
+        if phrase_len - max_edit_distance > self.max_length:
+            return []
+
+        idx = self._find_word(phrase)
+        if idx >= 0:
+            return [(phrase, 0, int(self.word_counts[idx]))]
+
+        suggestions = {} # term -> (distance, count)
+        considered_deletes = set()
+        considered_suggestions = {phrase}
+        max_edit_distance_2 = max_edit_distance
+
+        phrase_prefix_len = min(phrase_len, self.prefix_length)
+        candidates = [phrase[:phrase_prefix_len]]
+        candidate_pointer = 0
+        while candidate_pointer < len(candidates):
+            candidate = candidates[candidate_pointer]
+            candidate_pointer += 1
+            candidate_len = len(candidate)
+            len_diff = phrase_prefix_len - candidate_len
+
+            # Candidates are ordered by delete distance, none further on can be closer
+            if len_diff > max_edit_distance_2:
+                break
+
+            for i in self._deletes(candidate):
+                suggestion = self._word(int(i))
+                if suggestion == phrase:
+                    continue
+                suggestion_len = len(suggestion)
+                if (abs(suggestion_len - phrase_len) > max_edit_distance_2
+                        or suggestion_len < candidate_len
+                        or (suggestion_len == candidate_len and suggestion != candidate)):
+                    continue
+                suggestion_prefix_len = min(suggestion_len, self.prefix_length)
+                if (suggestion_prefix_len > phrase_prefix_len
+                        and suggestion_prefix_len - candidate_len > max_edit_distance_2):
+                    continue
+
+                if candidate_len == 0:
+                    distance = max(phrase_len, suggestion_len)
+                    if distance > max_edit_distance_2 or suggestion in considered_suggestions:
+                        continue
+                elif suggestion_len == 1:
+                    distance = phrase_len if phrase.find(suggestion[0]) < 0 else phrase_len - 1
+                    if distance > max_edit_distance_2 or suggestion in considered_suggestions:
+                        continue
+                else:
+                    if suggestion in considered_suggestions:
+                        continue
+                    considered_suggestions.add(suggestion)
+                    distance = self.distance_comparer.compare(phrase, suggestion, max_edit_distance_2)
+                    if distance < 0:
+                        continue
+
+                if distance <= max_edit_distance_2:
+                    # Keep only the closest distance found so far
+                    if suggestions and distance < max_edit_distance_2:
+                        suggestions = {}
+                    max_edit_distance_2 = distance
+                    suggestions[suggestion] = (distance, int(self.word_counts[int(i)]))
+
+            # Derive further deletes from the candidate, up to the max edit distance
+            if len_diff < max_edit_distance and candidate_len <= self.prefix_length:
+                if len_diff >= max_edit_distance_2:
+                    continue
+                for j in range(candidate_len):
+                    delete = candidate[:j] + candidate[j + 1:]
+                    if delete not in considered_deletes:
+                        considered_deletes.add(delete)
+                        candidates.append(delete)
+
+        ranked = sorted(suggestions.items(), key=lambda kv: (kv[1][0], -kv[1][1]))
+        return [(term, dist, count) for term, (dist, count) in ranked]
+
+    def close(self):
+        # Drop array views before closing the map they point into
+        for name, _ in SECTIONS:
+            setattr(self, name, None)
+        self._mm.close()
+        self._file.close()
@@ -1,18 +1,192 @@
+import gzip
+import hashlib
 import os
+import pickle
+from collections import OrderedDict
 import pkg_resources
 from symspellpy import SymSpell, Verbosity
 
-class SpellChecker:
-    def __init__(self, dictionary_path=None, max_edit_distance=2):
-        self.sym_spell = SymSpell(max_dictionary_edit_distance=max_edit_distance, prefix_length=7)
+# Bump when the layout of the serialized index changes
+INDEX_FORMAT_VERSION = 1
+
+def file_sha256(path, chunk_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def index_key(dictionary_path, max_edit_distance=2, prefix_length=7):
+    """
+    Identity of a precompiled index: dictionary content hash + SymSpell parameters.
+    Any change to one of them makes an existing index stale.
+    """
+    return {
+        "format": INDEX_FORMAT_VERSION,
+        "symspell_data_version": SymSpell.data_version,
+        "dictionary_sha256": file_sha256(dictionary_path),
+        "max_edit_distance": max_edit_distance,
+        "prefix_length": prefix_length
+    }
+
+def default_index_path(dictionary_path):
+    return os.path.splitext(dictionary_path)[0] + ".index.pkl.gz"
+
+class VerdictCache:
+    """
+    Bounded LRU cache of spell-check verdicts with hit/miss counters.
+    Keys are (token, sorted variants); values are the top suggestion tuple
+    for a confirmed error, or None when the token is valid / has no correction.
+    Can be persisted to disk, tagged with the dictionary identity it was built against.
+    With track_new, verdicts computed since the last drain() are kept so a worker
+    process can hand them (and its counters) to the process that saves the cache.
+    """
+    def __init__(self, maxsize=100_000, track_new=False):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.new_entries = [] if track_new else None
+        self._drained = (0, 0)
+
+    def get(self, key):
+        """Returns (found, verdict)."""
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return True, self.entries[key]
+        self.misses += 1
+        return False, None
+
+    def put(self, key, verdict):
+        self.entries[key] = verdict
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+        if self.new_entries is not None:
+            self.new_entries.append((key, verdict))
+
+    def drain(self):
+        """New verdicts and hit/miss counts since the last drain() (requires track_new)."""
+        delta = {
+            "entries": self.new_entries,
+            "hits": self.hits - self._drained[0],
+            "misses": self.misses - self._drained[1]
+        }
+        self.new_entries = []
+        self._drained = (self.hits, self.misses)
+        return delta
+
+    def merge(self, delta):
+        """Fold a drain() of another process's cache into this one."""
+        for key, verdict in delta["entries"]:
+            self.put(key, verdict)
+        self.hits += delta["hits"]
+        self.misses += delta["misses"]
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0
+        }
+
+    def save(self, path, source_key):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump({"source_key": source_key, "entries": list(self.entries.items())}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    def load(self, path, source_key):
+        """Load persisted verdicts if they were computed against the same dictionary. Returns count loaded."""
+        if not path or not os.path.exists(path):
+            return 0
+        try:
+            with open(path, 'rb') as f:
+                data = pickle.load(f)
+        except Exception as e:
+            print(f"Ignoring unreadable verdict cache {path}: {e}")
+            return 0
+        if data.get("source_key") != source_key:
+            print(f"Verdict cache {path} was built against another dictionary, discarding.")
+            return 0
+        # Most recently used entries were saved last; keep the newest `maxsize`
+        for key, verdict in data["entries"][-self.maxsize:]:
+            self.entries[key] = verdict
+        return len(self.entries)
+
+def compute_verdict(checker, word, variants):
+    """
+    Verify one candidate. Returns the top (term, distance, count) suggestion
+    if the word is a confirmed error, else None.
+    """
+    # Check if any variant is valid
+    for v in variants:
+        if checker.check_word(v):
+            return None
+
+    # Confirm Error & Generate Suggestions
+    suggestions = checker.suggest(word)
+    if suggestions and suggestions[0][0].lower() != word.lower():
+        return suggestions[0]
+    return None
+
+class CachedVerdictMixin:
+    """verdict() with a memoized VerdictCache; the class provides check_word/suggest."""
+    verdict_cache = None
+    cache_source_key = None
+
+    def enable_verdict_cache(self, maxsize=100_000, cache_path=None, track_new=False):
+        self.verdict_cache = VerdictCache(maxsize, track_new)
+        self.verdict_cache_path = cache_path
+        loaded = self.verdict_cache.load(cache_path, self.cache_source_key)
+        if loaded:
+            print(f"Loaded {loaded} cached verdicts from {cache_path}")
+
+    def verdict(self, word, variants):
+        if self.verdict_cache is None:
+            return compute_verdict(self, word, variants)
+        key = (word, tuple(sorted(set(variants))))
+        found, result = self.verdict_cache.get(key)
+        if not found:
+            result = compute_verdict(self, word, variants)
+            self.verdict_cache.put(key, result)
+        return result
+
+    def save_verdict_cache(self):
+        if self.verdict_cache is not None and self.verdict_cache_path:
+            self.verdict_cache.save(self.verdict_cache_path, self.cache_source_key)
+
+class SpellChecker(CachedVerdictMixin):
+    def __init__(self, dictionary_path=None, max_edit_distance=2, prefix_length=7, index_path=None):
+        self.sym_spell = SymSpell(max_dictionary_edit_distance=max_edit_distance, prefix_length=prefix_length)
         self.max_edit_distance = max_edit_distance
-        
+        self.prefix_length = prefix_length
+
         # Load dictionary
         if dictionary_path and os.path.exists(dictionary_path):
+            index_path = index_path or default_index_path(dictionary_path)
+            key = index_key(dictionary_path, max_edit_distance, prefix_length)
+            self.cache_source_key = key
+
+            # Precompiled index first, rebuild the deletes only when it is missing or stale
+            if self.load_index(index_path, key):
+                print(f"Loaded precompiled index {index_path}")
+                return
+
             print(f"Loading dictionary from {dictionary_path}...")
             # term_index=0, count_index=1, separator=" "
             if not self.sym_spell.load_dictionary(dictionary_path, term_index=0, count_index=1, separator=" ", encoding="utf-8"):
                 print("Dictionary file not found")
+            else:
+                try:
+                    self.save_index(index_path, key)
+                    print(f"Saved precompiled index to {index_path}")
+                except OSError as e:
+                    print(f"Could not save precompiled index: {e}")
         else:
             # Fallback to default frequency dictionary if available (or empty)
             print("No custom dictionary found. Using default frequency dictionary from symspellpy if available.")
@@ -20,7 +194,35 @@ class SpellChecker:
                 "symspellpy", "frequency_dictionary_en_82_765.txt")
             if not self.sym_spell.load_dictionary(dictionary_path, term_index=0, count_index=1):
                 print("Default dictionary not found")
-                
+            self.cache_source_key = {"default": dictionary_path, "max_edit_distance": max_edit_distance, "prefix_length": prefix_length}
+
+    def save_index(self, index_path, key):
+        """
+        Serialize the loaded SymSpell state (words + deletes) with its key header.
+        The header is pickled first so staleness can be checked without reading the payload.
+        """
+        tmp_path = index_path + ".tmp"
+        with gzip.open(tmp_path, 'wb', compresslevel=1) as f:
+            pickle.dump(key, f, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(self.sym_spell.save_pickle(to_bytes=True), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, index_path)
+
+    def load_index(self, index_path, key):
+        """Load a precompiled index if it matches `key`. Returns True on success."""
+        if not os.path.exists(index_path):
+            return False
+        try:
+            with gzip.open(index_path, 'rb') as f:
+                stored_key = pickle.load(f)
+                if stored_key != key:
+                    print(f"Precompiled index {index_path} is stale, rebuilding.")
+                    return False
+                payload = pickle.load(f)
+            return self.sym_spell.load_pickle(payload, from_bytes=True)
+        except Exception as e:
+            print(f"Failed to load precompiled index {index_path}: {e}")
+            return False
+
     def check_word(self, word):
         """
         Check if a word is valid (in dictionary).
@@ -44,3 +246,9 @@ class SpellChecker:
         """
         suggestions = self.sym_spell.lookup_compound(text, max_edit_distance=self.max_edit_distance)
         return [(s.term, s.distance, s.count) for s in suggestions]
+
+def build_index(dictionary_path, max_edit_distance=2, prefix_length=7, index_path=None):
+    """(Re)build the precompiled index for a dictionary file if it is missing or stale."""
+    index_path = index_path or default_index_path(dictionary_path)
+    SpellChecker(dictionary_path, max_edit_distance=max_edit_distance, prefix_length=prefix_length, index_path=index_path)
+    return index_path
@@ -1,5 +1,6 @@
-import json
 import os
+import threading
+import time
 from datetime import datetime
 from contextlib import contextmanager
 
@@ -12,18 +13,143 @@ except ImportError:
 
 try:
     from backend.data import DATA
+    from backend.bulk_load import BulkLoader, IngestLedger
+    from backend.partitions import apply_retention, retention_policy
+    from backend.schema import create_schema
+    from backend.article_io import iter_articles
+    from backend.queries import registry, error_row, file_error_row, encode_cursor, decode_cursor, ERROR_TRENDS, ERROR_CURVE, ERRORS_PAGE, ARTICLE_COUNT
 except ImportError:
     from data import DATA
+    from bulk_load import BulkLoader, IngestLedger
+    from partitions import apply_retention, retention_policy
+    from schema import create_schema
+    from article_io import iter_articles
+    from queries import registry, error_row, file_error_row, encode_cursor, decode_cursor, ERROR_TRENDS, ERROR_CURVE, ERRORS_PAGE, ARTICLE_COUNT
+
+# Rollups of error_events, maintained by statement-level triggers so every
+# insert path (startup sync, migration script, psql) keeps them current.
+# Stats endpoints read these instead of re-scanning error_events.
+ROLLUP_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS error_counts_country_word (
+        country_id SMALLINT NOT NULL,
+        word_id INTEGER NOT NULL,
+        cnt BIGINT NOT NULL,
+        PRIMARY KEY (country_id, word_id)
+    );
+    CREATE TABLE IF NOT EXISTS error_counts_country_hour (
+        country_id SMALLINT NOT NULL,
+        hour TIMESTAMP NOT NULL,
+        cnt BIGINT NOT NULL,
+        PRIMARY KEY (country_id, hour)
+    );
+    CREATE TABLE IF NOT EXISTS error_counts_word_hour (
+        word_id INTEGER NOT NULL,
+        hour TIMESTAMP NOT NULL,
+        cnt BIGINT NOT NULL,
+        PRIMARY KEY (word_id, hour)
+    );
+    CREATE INDEX IF NOT EXISTS idx_counts_country_hour_hour ON error_counts_country_hour (hour);
+    CREATE INDEX IF NOT EXISTS idx_counts_word_hour_hour ON error_counts_word_hour (hour);
+
+    CREATE OR REPLACE FUNCTION error_events_rollup() RETURNS trigger AS $$
+    DECLARE
+        sign BIGINT := CASE WHEN TG_OP = 'DELETE' THEN -1 ELSE 1 END;
+    BEGIN
+        -- changed_rows is the NEW TABLE of the insert trigger, the OLD TABLE of the delete trigger
+        INSERT INTO error_counts_country_word AS t (country_id, word_id, cnt)
+        SELECT country_id, word_id, sign * COUNT(*)
+        FROM changed_rows
+        WHERE country_id IS NOT NULL AND word_id IS NOT NULL
+        GROUP BY 1, 2
+        ON CONFLICT (country_id, word_id) DO UPDATE SET cnt = t.cnt + EXCLUDED.cnt;
+
+        INSERT INTO error_counts_country_hour AS t (country_id, hour, cnt)
+        SELECT country_id, date_trunc('hour', timestamp), sign * COUNT(*)
+        FROM changed_rows
+        WHERE country_id IS NOT NULL AND timestamp IS NOT NULL
+        GROUP BY 1, 2
+        ON CONFLICT (country_id, hour) DO UPDATE SET cnt = t.cnt + EXCLUDED.cnt;
+
+        INSERT INTO error_counts_word_hour AS t (word_id, hour, cnt)
+        SELECT word_id, date_trunc('hour', timestamp), sign * COUNT(*)
+        FROM changed_rows
+        WHERE word_id IS NOT NULL AND timestamp IS NOT NULL
+        GROUP BY 1, 2
+        ON CONFLICT (word_id, hour) DO UPDATE SET cnt = t.cnt + EXCLUDED.cnt;
+
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+'''
+
+ROLLUP_TRIGGERS = '''
+    CREATE TRIGGER error_events_rollup_insert
+        AFTER INSERT ON error_events
+        REFERENCING NEW TABLE AS changed_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION error_events_rollup();
+    CREATE TRIGGER error_events_rollup_delete
+        AFTER DELETE ON error_events
+        REFERENCING OLD TABLE AS changed_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION error_events_rollup();
+'''
+
+ROLLUP_REBUILD = '''
+    TRUNCATE error_counts_country_word, error_counts_country_hour, error_counts_word_hour;
+    INSERT INTO error_counts_country_word (country_id, word_id, cnt)
+        SELECT country_id, word_id, COUNT(*)
+        FROM error_events WHERE country_id IS NOT NULL AND word_id IS NOT NULL GROUP BY 1, 2;
+    INSERT INTO error_counts_country_hour (country_id, hour, cnt)
+        SELECT country_id, date_trunc('hour', timestamp), COUNT(*)
+        FROM error_events WHERE country_id IS NOT NULL AND timestamp IS NOT NULL GROUP BY 1, 2;
+    INSERT INTO error_counts_word_hour (word_id, hour, cnt)
+        SELECT word_id, date_trunc('hour', timestamp), COUNT(*)
+        FROM error_events WHERE word_id IS NOT NULL AND timestamp IS NOT NULL GROUP BY 1, 2;
+'''
+
+# Events of a detached partition, taken out of the rollups before it is dropped.
+# Rows that reach zero are removed, as if the events had been deleted.
+ROLLUP_SUBTRACT = '''
+    UPDATE error_counts_country_word t SET cnt = t.cnt - g.cnt
+    FROM (SELECT country_id, word_id, COUNT(*) AS cnt FROM {partition}
+          WHERE country_id IS NOT NULL AND word_id IS NOT NULL GROUP BY 1, 2) g
+    WHERE t.country_id = g.country_id AND t.word_id = g.word_id;
+    UPDATE error_counts_country_hour t SET cnt = t.cnt - g.cnt
+    FROM (SELECT country_id, date_trunc('hour', timestamp) AS hour, COUNT(*) AS cnt FROM {partition}
+          WHERE country_id IS NOT NULL AND timestamp IS NOT NULL GROUP BY 1, 2) g
+    WHERE t.country_id = g.country_id AND t.hour = g.hour;
+    UPDATE error_counts_word_hour t SET cnt = t.cnt - g.cnt
+    FROM (SELECT word_id, date_trunc('hour', timestamp) AS hour, COUNT(*) AS cnt FROM {partition}
+          WHERE word_id IS NOT NULL AND timestamp IS NOT NULL GROUP BY 1, 2) g
+    WHERE t.word_id = g.word_id AND t.hour = g.hour;
+    DELETE FROM error_counts_country_word WHERE cnt <= 0;
+    DELETE FROM error_counts_country_hour WHERE cnt <= 0;
+    DELETE FROM error_counts_word_hour WHERE cnt <= 0;
+'''
+
+def subtract_rollups(cursor, partition):
+    """apply_retention() before_drop hook: keep the rollups equal to the remaining events."""
+    cursor.execute(ROLLUP_SUBTRACT.format(partition=partition))
+
+# Rollups keyed by text columns (before schema.py): dropped so they are rebuilt on ids
+ROLLUP_DROP_TEXT_KEYED = '''
+    DROP TRIGGER IF EXISTS error_events_rollup_insert ON error_events;
+    DROP TRIGGER IF EXISTS error_events_rollup_delete ON error_events;
+    DROP TABLE IF EXISTS error_counts_country_word, error_counts_country_hour, error_counts_word_hour;
+'''
 
 class DataStorage:
     def __init__(self):
         self.base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
         self.errors_path = os.path.join(self.base_dir, "data", "detected_errors.json")
+        # Detection outputs loaded into error_events: batch run and streaming run
+        self.sync_sources = [self.errors_path, os.path.join(self.base_dir, "data", "detected_errors.jsonl")]
         
         self.countries_map = {c["name"]: c for c in DATA["COUNTRIES"]}
-        self.data = []
+        self.article_count = 0 # NO-DB mode only, counted while streaming the sources
         self.stats = {} # Cache for map stats
         self.global_top_errors = []
+        self.metrics = {} # Timings of cache refreshes etc., served by /api/ops/metrics
+        self._refresh_lock = threading.Lock()
         
         # Database Configuration
         self.db_url = os.getenv("DATABASE_URL")
@@ -46,7 +172,6 @@ class DataStorage:
             # Initialize Connection Pool
             # Wait for DB to be ready is handled by docker-compose healthcheck, 
             # but we add a small retry here just in case.
-            import time
             max_retries = 5
             for i in range(max_retries):
                 try:
@@ -89,207 +214,228 @@ class DataStorage:
                     yield None
                 else:
                     raise Exception("PostgreSQL connection pool not initialized")
+        except Exception:
+            # Don't hand a connection with a failed transaction back to the pool
+            if conn is not None and not conn.closed:
+                try:
+                    conn.rollback()
+                except psycopg2.Error:
+                    pass # Connection is gone; it is closed on putconn below
+            raise
         finally:
             if conn and self.pg_pool:
-                self.pg_pool.putconn(conn)
+                # Broken connections are discarded instead of being reused
+                self.pg_pool.putconn(conn, close=bool(conn.closed))
 
     def _init_db(self):
         """Initialize database tables."""
         with self.get_connection() as conn:
             cursor = conn.cursor()
             
-            # PostgreSQL Schema
+            # PostgreSQL Schema: dictionary-encoded error_events (schema.py),
+            # partitioned by month (partitions.py)
+            create_schema(cursor)
+
+            # Aggregate rollups + triggers. First time round, backfill them from
+            # existing events in the same transaction the triggers are created in.
             cursor.execute('''
-                CREATE TABLE IF NOT EXISTS error_events (
-                    id SERIAL PRIMARY KEY,
-                    country_code TEXT,
-                    country_name TEXT,
-                    word TEXT,
-                    suggestion TEXT,
-                    timestamp TIMESTAMP,
-                    context TEXT,
-                    title TEXT
-                )
+                SELECT 1 FROM information_schema.columns
+                WHERE table_schema = current_schema() AND table_name = 'error_counts_country_word' AND column_name = 'word'
             ''')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_timestamp ON error_events(timestamp)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_country ON error_events(country_code)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_word ON error_events(word)')
+            if cursor.fetchone():
+                cursor.execute(ROLLUP_DROP_TEXT_KEYED)
+            cursor.execute(ROLLUP_SCHEMA)
+            cursor.execute("SELECT 1 FROM pg_trigger WHERE tgname = 'error_events_rollup_insert'")
+            if not cursor.fetchone():
+                cursor.execute("LOCK TABLE error_events IN SHARE ROW EXCLUSIVE MODE")
+                cursor.execute(ROLLUP_TRIGGERS)
+                cursor.execute(ROLLUP_REBUILD)
+                print("Created error count rollups.")
+
+            # After the rollups exist, so a dropped month's counts can be subtracted
+            keep_months, mode = retention_policy()
+            if keep_months:
+                for name in apply_retention(cursor, keep_months, mode, before_drop=subtract_rollups):
+                    print(f"Retention: {'dropped' if mode == 'drop' else 'archived'} partition {name}")
             
             conn.commit()
 
-    def load_data(self):
-        """Load data from JSON and sync to DB if needed."""
-        # 1. Load Raw JSON (Still useful for simple iteration/fallback)
-        if os.path.exists(self.errors_path):
-            try:
-                with open(self.errors_path, 'r', encoding='utf-8') as f:
-                    self.data = json.load(f)
-            except Exception as e:
-                print(f"Error loading data: {e}")
-                self.data = []
-        else:
-            self.data = []
+    def refresh(self):
+        """load_data() for the background refresher; refreshes run one at a time, readers never wait."""
+        with self._refresh_lock:
+            self.load_data()
 
-        # 2. Sync DB
+    def load_data(self):
+        """Sync new detection output to the DB and warm up the stats cache."""
+        # Raw articles are never held in memory; they are served page by page
+        # from Postgres (or streamed from the source files in NO-DB mode)
+        # 1. Sync DB
         self._sync_db()
 
-        # 3. Warm up cache
+        # 2. Warm up cache
         self._refresh_stats_cache()
 
+    def _iter_source_articles(self, source_index=0, offset=0):
+        """
+        Stream articles from the detection output files.
+        Yields (source index, article start offset, article); offsets are what
+        iter_articles resumes from (bytes for JSONL, article count for JSON).
+        """
+        for i in range(source_index, len(self.sync_sources)):
+            path = self.sync_sources[i]
+            if not os.path.exists(path):
+                continue
+            start = offset if i == source_index else 0
+            if path.endswith(".jsonl"):
+                articles = iter_articles(path, start_offset=start)
+            else:
+                articles = iter_articles(path, skip=start)
+            try:
+                for next_offset, article in articles:
+                    yield i, start, article
+                    start = next_offset
+            except Exception as e:
+                print(f"Error reading {path}: {e}")
+
     def _sync_db(self):
-        """Sync DB with JSON data if DB is empty."""
+        """Load detection output appended since the last sync (see IngestLedger)."""
         if not self.use_postgres:
             return
 
         with self.get_connection() as conn:
-            cursor = conn.cursor()
-            
-            cursor.execute('SELECT COUNT(*) FROM error_events')
-            count = cursor.fetchone()[0]
-            
-            # Only import if DB is empty to avoid duplicates on restart
-            if count == 0 and self.data:
-                print("Syncing Database with JSON data...")
-                
-                rows = []
-                for article in self.data:
-                    c_name = article.get("country", "Unknown")
-                    meta = self.countries_map.get(c_name)
-                    c_code = meta["code"] if meta else "UNK"
-                    ts = article.get("scraped_at") or article.get("date") or datetime.utcnow().isoformat()
-                    title = article.get("title", "")
-                    
-                    for err in article.get("errors", []):
-                        rows.append((
-                            c_code,
-                            c_name,
-                            err.get("word", "").lower(),
-                            err.get("suggestion", ""),
-                            ts,
-                            err.get("context", ""),
-                            title
-                        ))
-                
-                if rows:
-                    # PostgreSQL batch insert
-                    args_str = ','.join(cursor.mogrify("(%s,%s,%s,%s,%s,%s,%s)", x).decode('utf-8') for x in rows)
-                    cursor.execute("INSERT INTO error_events (country_code, country_name, word, suggestion, timestamp, context, title) VALUES " + args_str)
-                
-                conn.commit()
-                print(f"Imported {len(rows)} error events to Database.")
+            ledger = IngestLedger(conn)
+            for path in self.sync_sources:
+                if not os.path.exists(path):
+                    continue
+                loader = BulkLoader(conn)
+                # The batch output is the file the pre-ledger startup import loaded
+                articles, events = ledger.sync(path, self.countries_map, loader, legacy=path == self.errors_path)
+                if articles:
+                    print(f"Synced {articles} new articles from {os.path.basename(path)}: {loader.report()}")
 
     def _refresh_stats_cache(self):
-        """Compute aggregated stats from DB."""
-        if not self.use_postgres:
+        """Rebuild the stats caches off to the side, then swap them in; readers keep the previous ones until then."""
+        start = time.perf_counter()
+        if self.use_postgres:
+            stats, global_top_errors, rows = self._compute_stats_from_db()
+        else:
             # Fallback: Compute stats from JSON in memory if DB is down
-            self._compute_stats_from_json()
-            return
+            stats, global_top_errors, rows = self._compute_stats_from_json()
+        self.stats, self.global_top_errors = stats, global_top_errors
 
+        self.metrics["stats_refresh"] = {
+            "seconds": round(time.perf_counter() - start, 4),
+            "rows": rows,
+            "countries": len(stats),
+            "refreshed_at": datetime.utcnow().isoformat()
+        }
+        print(f"Stats cache refreshed in {self.metrics['stats_refresh']['seconds']:.3f}s ({len(stats)} countries)")
+
+    def _compute_stats_from_db(self):
+        """(stats, global top errors, rows read) from the rollups."""
         with self.get_connection() as conn:
             cursor = conn.cursor()
             
-            # Global Top Errors
+            # Per-(country, word) counts come from the rollup; they feed both the
+            # per-country top 5 (window functions) and the global top 20
             cursor.execute('''
-                SELECT word, COUNT(*) as cnt 
-                FROM error_events 
-                GROUP BY word 
-                ORDER BY cnt DESC 
-                LIMIT 20
+                WITH counts AS MATERIALIZED (
+                    SELECT c.code AS country_code, c.name AS country_name, w.word, r.cnt
+                    FROM error_counts_country_word r
+                    JOIN countries c ON c.country_id = r.country_id
+                    JOIN words w ON w.word_id = r.word_id
+                    WHERE r.cnt > 0
+                ),
+                ranked AS (
+                    SELECT country_code, country_name, word, cnt,
+                           SUM(cnt) OVER (PARTITION BY country_code) AS total,
+                           ROW_NUMBER() OVER (PARTITION BY country_code ORDER BY cnt DESC, word) AS rn
+                    FROM counts
+                ),
+                global_top AS (
+                    SELECT word, SUM(cnt) AS cnt
+                    FROM counts
+                    GROUP BY word
+                    ORDER BY cnt DESC
+                    LIMIT 20
+                )
+                SELECT country_code, country_name, total, word, cnt, rn
+                FROM ranked
+                WHERE rn <= 5
+                UNION ALL
+                SELECT NULL, NULL, NULL, word, cnt, NULL
+                FROM global_top
             ''')
-            self.global_top_errors = [{"word": row[0], "count": row[1]} for row in cursor.fetchall()]
-            
-            # Country Stats
-            self.stats = {}
+            rows = cursor.fetchall()
+        
+        # Global Top Errors (NULL country rows)
+        global_rows = sorted((r for r in rows if r[5] is None), key=lambda r: -r[4])
+        global_top_errors = [{"word": r[3], "count": int(r[4])} for r in global_rows]
+        
+        # Country Stats, rows come in rank order within each country
+        stats = {}
+        for code, name, total, word, cnt, rn in sorted((r for r in rows if r[5] is not None), key=lambda r: (r[0] or "", r[5])):
+            if not code or code == 'UNK': continue
             
-            # Get totals per country
-            cursor.execute('''
-                SELECT country_code, country_name, COUNT(*) as total
-                FROM error_events
-                GROUP BY country_code, country_name
-            ''')
-            country_totals = cursor.fetchall()
+            meta = self.countries_map.get(name)
+            if not meta: continue
             
-            for row in country_totals:
-                # Handle tuple access differences if any (both return tuples by default)
-                code, name, total = row[0], row[1], row[2]
-                
-                if not code or code == 'UNK': continue
-                
-                meta = self.countries_map.get(name)
-                if not meta: continue
-                
-                # Get top errors for this country
-                cursor.execute(f'''
-                    SELECT word, COUNT(*) as cnt
-                    FROM error_events
-                    WHERE country_code = %s
-                    GROUP BY word
-                    ORDER BY cnt DESC
-                    LIMIT 5
-                ''', (code,))
-                top_errors = [{"word": r[0], "count": r[1]} for r in cursor.fetchall()]
-                
-                self.stats[code] = {
+            if code not in stats:
+                stats[code] = {
                     "name": name,
                     "code": code,
-                    "total": total,
-                    "errors": total,
+                    "total": int(total),
+                    "errors": int(total),
                     "lat": meta["lat"],
                     "lng": meta["lng"],
                     "region": meta["region"],
-                    "top_errors": top_errors
+                    "top_errors": []
                 }
+            stats[code]["top_errors"].append({"word": word, "count": int(cnt)})
+        return stats, global_top_errors, len(rows)
 
     def _compute_stats_from_json(self):
-        """Fallback: Compute stats from self.data in memory."""
+        """Fallback: (stats, global top errors, articles read) by streaming the detection output files."""
         from collections import Counter
         
-        # 1. Global Top Errors
-        all_words = []
-        for article in self.data:
-            for err in article.get("errors", []):
-                all_words.append(err.get("word", "").lower())
-        
-        word_counts = Counter(all_words)
-        self.global_top_errors = [{"word": w, "count": c} for w, c in word_counts.most_common(20)]
+        # Streamed: memory is bounded by the number of distinct (country, word) pairs
+        word_counts = Counter()
+        country_data = {} # code -> {total: 0, errors: 0, words: Counter}
+        article_count = 0
         
-        # 2. Country Stats
-        self.stats = {}
-        country_data = {} # code -> {total: 0, errors: 0, words: []}
-        
-        for article in self.data:
+        for _, _, article in self._iter_source_articles():
+            article_count += 1
+            errors = article.get("errors", [])
+            words = [err.get("word", "").lower() for err in errors]
+            
+            # 1. Global Top Errors
+            word_counts.update(words)
+            
+            # 2. Country Stats
             c_name = article.get("country", "Unknown")
             meta = self.countries_map.get(c_name)
             if not meta: continue
             
             c_code = meta["code"]
             if c_code not in country_data:
-                country_data[c_code] = {"total": 0, "errors": 0, "words": []}
-            
-            # Since self.data structure might be article-based or flat error based?
-            # get_raw_data returns list of articles.
-            # Assuming article has 'errors' list.
-            # Wait, DB counts 'error_events'. JSON is articles.
-            # If JSON is articles, total count of ERRORS is sum of len(errors).
-            
-            errors = article.get("errors", [])
-            err_count = len(errors)
+                country_data[c_code] = {"total": 0, "errors": 0, "words": Counter()}
             
             # In DB logic: COUNT(*) FROM error_events GROUP BY country_code
             # This counts individual errors.
-            country_data[c_code]["total"] += err_count
-            country_data[c_code]["errors"] += err_count
-            
-            for err in errors:
-                country_data[c_code]["words"].append(err.get("word", "").lower())
+            country_data[c_code]["total"] += len(errors)
+            country_data[c_code]["errors"] += len(errors)
+            country_data[c_code]["words"].update(words)
+        
+        global_top_errors = [{"word": w, "count": c} for w, c in word_counts.most_common(20)]
+        stats = {}
                 
         for code, data in country_data.items():
             meta = next((c for c in DATA["COUNTRIES"] if c["code"] == code), None)
             if not meta: continue
             
-            top_words = Counter(data["words"]).most_common(5)
+            top_words = data["words"].most_common(5)
             
-            self.stats[code] = {
+            stats[code] = {
                 "name": meta["name"],
                 "code": code,
                 "total": data["total"],
@@ -299,32 +445,31 @@ class DataStorage:
                 "region": meta["region"],
                 "top_errors": [{"word": w, "count": c} for w, c in top_words]
             }
+        self.article_count = article_count
+        return stats, global_top_errors, article_count
 
     def get_stats(self):
         return self.stats
 
+    def get_metrics(self):
+        refresh = self.metrics.get("stats_refresh")
+        if not refresh:
+            return self.metrics
+        age = datetime.utcnow() - datetime.fromisoformat(refresh["refreshed_at"])
+        return {**self.metrics, "stats_refresh": {**refresh, "age_seconds": round(age.total_seconds(), 1)}}
+
     def get_top_errors(self, limit=10):
         return self.global_top_errors[:limit]
 
-    def get_error_trends(self, hours=24):
+    def get_error_trends(self, hours=24, limit=10):
         if not self.use_postgres:
             return [] # Not supported in NO-DB mode for now
             
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            
-            query = f'''
-                SELECT word, COUNT(*) as cnt
-                FROM error_events
-                WHERE timestamp >= NOW() - INTERVAL '{hours} hours'
-                GROUP BY word
-                ORDER BY cnt DESC
-                LIMIT 10
-            '''
-                
-            cursor.execute(query)
-            trends = [{"word": row[0], "count": row[1]} for row in cursor.fetchall()]
-            return trends
+            # Hour-granular window over the (word, hour) rollup
+            registry.execute(cursor, ERROR_TRENDS, hours, limit)
+            return [{"word": row[0], "count": int(row[1])} for row in cursor.fetchall()]
 
     def get_error_curve(self, hours=24):
         if not self.use_postgres:
@@ -332,23 +477,57 @@ class DataStorage:
 
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            
-            query = f'''
-                SELECT date_trunc('hour', timestamp) as hour_bucket, COUNT(*) as cnt
-                FROM error_events
-                WHERE timestamp >= NOW() - INTERVAL '{hours} hours'
-                GROUP BY hour_bucket
-                ORDER BY hour_bucket ASC
-            '''
-                
-            cursor.execute(query)
+            registry.execute(cursor, ERROR_CURVE, hours)
             # Format timestamps consistently if needed, but ISO format usually works
-            curve = [{"time": str(row[0]), "count": row[1]} for row in cursor.fetchall()]
-            return curve
+            return [{"time": str(row[0]), "count": int(row[1])} for row in cursor.fetchall()]
+
+    def get_article_count(self):
+        """Number of detected articles loaded (from the ingestion ledger, not a table scan)."""
+        if not self.use_postgres:
+            return self.article_count
+
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            registry.execute(cursor, ARTICLE_COUNT)
+            return int(cursor.fetchone()[0])
+
+    def get_errors_page(self, limit=100, cursor=None):
+        """
+        One page of flat error rows, keyset-paginated.
+        Returns (rows, next cursor or None). Cost is O(limit) regardless of the
+        page position: an index range scan on error_events.id in DB mode, a
+        seek into the source files in NO-DB mode. Both modes return error_row()
+        dicts and opaque cursors; a malformed cursor raises ValueError.
+        """
+        if not self.use_postgres:
+            return self._errors_page_from_files(limit, cursor)
+
+        after_id, = decode_cursor(cursor, 1) if cursor else (0,)
+        with self.get_connection() as conn:
+            cur = conn.cursor()
+            registry.execute(cur, ERRORS_PAGE, after_id, limit)
+            rows = [error_row(r) for r in cur.fetchall()]
+        next_cursor = encode_cursor(rows[-1]["id"]) if len(rows) == limit else None
+        return rows, next_cursor
+
+    def _errors_page_from_files(self, limit, cursor=None):
+        """
+        NO-DB pagination; the cursor encodes source index, article offset and
+        error index of the next event, plus the id it gets. Ids number events
+        in file order from 1, as error_events.id numbers them in load order.
+        """
+        source_index, offset, skip, next_id = decode_cursor(cursor, 4) if cursor else (0, 0, 0, 1)
+        rows = []
+        for i, start, article in self._iter_source_articles(source_index, offset):
+            errors = article.get("errors", [])
+            first = skip if (i, start) == (source_index, offset) else 0
+            for n in range(first, len(errors)):
+                if len(rows) == limit:
+                    return rows, encode_cursor(i, start, n, next_id)
+                rows.append(file_error_row(next_id, article, errors[n], self.countries_map))
+                next_id += 1
+        return rows, None
 
-    def get_raw_data(self):
-        return self.data
-    
     def register_snapshot(self, s3_key, count):
         """Register a new raw news snapshot."""
         if not self.use_postgres:
@@ -375,8 +554,9 @@ class DataStorage:
             return row[0] if row else None
 
     def get_global_summary(self):
-        total_errors = sum(s["total"] for s in self.stats.values())
-        total_countries = len(self.stats)
+        stats = self.stats # One snapshot, even if a refresh swaps it meanwhile
+        total_errors = sum(s["total"] for s in stats.values())
+        total_countries = len(stats)
         return {
             "total_errors": total_errors,
             "active_countries": total_countries,
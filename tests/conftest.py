@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Add project root directory to path to allow imports like 'from backend.crawler import Crawler'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,28 @@
+"""Shared helpers: the stub news server (backend/scripts/stub_news_server.py) on an ephemeral port, and a fast crawler."""
+import argparse
+from contextlib import asynccontextmanager
+
+from aiohttp import web
+
+from backend.crawler import Crawler
+from backend.scripts.stub_news_server import make_app
+
+@asynccontextmanager
+async def stub_server(**options):
+    args = argparse.Namespace(articles=10, fail_rate=0.0, fail_first=0, seed=0)
+    for key, value in options.items():
+        setattr(args, key, value)
+    runner = web.AppRunner(make_app(args))
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    try:
+        host, port = runner.addresses[0][:2]
+        yield f"http://{host}:{port}"
+    finally:
+        await runner.cleanup()
+
+def crawler(**options):
+    settings = {"max_retries": 3, "per_domain_rate": 1000, "per_domain_burst": 1000, "report_interval": 0}
+    settings.update(options)
+    return Crawler(**settings)
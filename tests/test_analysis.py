@@ -0,0 +1,107 @@
+"""
+Analyzer on a small sqlite events file (analysis_sources.SqliteSource):
+distance matrix shape, Mahalanobis against a direct numpy computation, and
+the permutation test on a fixed seed.
+"""
+import sqlite3
+from collections import Counter
+
+import numpy as np
+import pytest
+from sklearn.covariance import LedoitWolf
+
+from backend.analysis import Analyzer
+
+WORDS = [f"w{i}" for i in range(8)]
+# Three countries share one error distribution; DDD leans on the last words
+SHARED = np.array([20, 16, 14, 12, 10, 8, 6, 4], dtype=float)
+DISTINCT = np.array([4, 4, 6, 6, 8, 10, 24, 38], dtype=float)
+COUNTRIES = {"AAA": SHARED, "BBB": SHARED, "CCC": SHARED, "DDD": DISTINCT}
+MONTHS = [f"2024-{m:02d}" for m in range(1, 7)]
+
+@pytest.fixture(scope="module")
+def events(tmp_path_factory):
+    """(country, timestamp, word) rows, also written to an error_events sqlite file."""
+    rng = np.random.default_rng(7)
+    rows = []
+    for country, weights in COUNTRIES.items():
+        for month in MONTHS:
+            for _ in range(int(rng.integers(30, 60))):
+                word = WORDS[rng.choice(len(WORDS), p=weights / weights.sum())]
+                rows.append((country, f"{month}-{int(rng.integers(1, 29)):02d}T12:00:00", word))
+    path = str(tmp_path_factory.mktemp("analysis") / "events.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE error_events (id INTEGER PRIMARY KEY, country_code TEXT, word TEXT, timestamp TEXT)")
+    conn.executemany("INSERT INTO error_events (country_code, timestamp, word) VALUES (?, ?, ?)", rows)
+    conn.commit()
+    conn.close()
+    return path, rows
+
+@pytest.fixture
+def analyzer(events):
+    analyzer = Analyzer(events[0])
+    yield analyzer
+    analyzer.source.close()
+
+def distribution(rows):
+    counts = Counter(word for _, _, word in rows)
+    vector = np.array([counts[w] for w in WORDS], dtype=float)
+    return vector / vector.sum()
+
+@pytest.mark.parametrize("metric", ["cosine", "euclidean", "jensenshannon"])
+def test_distance_matrix_symmetric_zero_diagonal(analyzer, metric):
+    countries, dist, version = analyzer.get_distance_matrix(metric)
+    assert sorted(countries) == sorted(COUNTRIES)
+    assert dist.shape == (len(countries), len(countries))
+    assert dist.dtype == np.float32
+    np.testing.assert_allclose(dist, dist.T, atol=1e-6)
+    np.testing.assert_allclose(np.diag(dist), 0, atol=1e-6)
+    assert (dist >= 0).all()
+    # The outlier is the farthest from everyone
+    d = countries.index("DDD")
+    assert all(dist[d, j] > dist[i, j] for i in range(len(countries)) for j in range(len(countries))
+               if i != d and j not in (i, d))
+    # Cached until the data changes
+    assert analyzer.get_distance_matrix(metric)[2] == version
+
+def test_mahalanobis_matches_numpy(analyzer, events):
+    _, rows = events
+    metrics = analyzer.get_fingerprint_metrics("DDD")
+
+    # Fingerprints of every (country, month) with at least 20 events, as _get_covariance takes them
+    periods = {}
+    for row in rows:
+        periods.setdefault((row[0], row[1][:7]), []).append(row)
+    samples = np.array([distribution(p) for p in periods.values() if len(p) >= 20])
+    precision = LedoitWolf().fit(samples).precision_
+    delta = distribution([r for r in rows if r[0] == "DDD"]) - distribution(rows)
+    expected = float(np.sqrt(delta @ precision @ delta))
+
+    assert metrics["covariance"]["samples"] == len(samples)
+    assert metrics["vector_dim"] == len(WORDS)
+    assert metrics["mahalanobis_distance"] == pytest.approx(expected, rel=1e-6)
+    assert metrics["euclidean_distance"] == pytest.approx(float(np.linalg.norm(delta)), rel=1e-6)
+
+def test_stability_fixed_seed(analyzer, events):
+    permutations = 200
+    outlier = analyzer.analyze_stability("DDD", permutations=permutations, seed=42, workers=1)
+    again = analyzer.analyze_stability("DDD", permutations=permutations, seed=42, workers=1)
+    for key in ("stability_score", "stability_ci", "similarity_to_rest", "null_distribution", "p_value"):
+        assert outlier[key] == again[key]
+
+    low, high = outlier["stability_ci"]
+    assert 0 <= low <= outlier["stability_score"] <= high <= 1
+    null_low, null_high = outlier["null_distribution"]["ci"]
+    assert null_low <= outlier["null_distribution"]["mean"] <= null_high
+    # DDD differs from the rest: no null split is as dissimilar, so the smallest p-value
+    assert outlier["similarity_to_rest"] < null_low
+    assert outlier["p_value"] == pytest.approx(1 / (permutations + 1))
+
+    # AAA is drawn from the same distribution as most of the rest (DDD is a third of it)
+    typical = analyzer.analyze_stability("AAA", permutations=permutations, seed=42, workers=1)
+    assert typical["sample_size"] == sum(1 for r in events[1] if r[0] == "AAA")
+    assert typical["similarity_to_rest"] > outlier["similarity_to_rest"]
+    assert 0 < typical["p_value"] <= 1
+    # A different seed draws different splits
+    other = analyzer.analyze_stability("DDD", permutations=permutations, seed=43, workers=1)
+    assert other["stability_ci"] != outlier["stability_ci"]
@@ -0,0 +1,50 @@
+"""
+Backfill windows against the stub server: a window whose article downloads
+fail is recorded as partial, and the next run retries only those articles.
+"""
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+
+from backend.backfill import Backfill, WindowLedger, make_window
+from backend.fetch_news import ExtractionPipeline
+from stub import stub_server, crawler
+
+WINDOW = make_window({"code": "US", "name": "United States"},
+                     datetime(2024, 1, 1, tzinfo=timezone.utc), datetime(2024, 1, 2, tzinfo=timezone.utc))
+
+def run_backfill(base, ledger_path, store_path):
+    async def run():
+        ledger = WindowLedger(str(ledger_path))
+        async with crawler(max_retries=0) as c:
+            extractor = ExtractionPipeline(c, workers=1)
+            try:
+                backfill = Backfill(c, extractor, ledger, str(store_path), api_url=f"{base}/api/v2/doc/doc",
+                                    min_slice=timedelta(days=1))
+                await backfill.run([WINDOW], concurrency=1)
+            finally:
+                extractor.close()
+                ledger.close()
+        return backfill
+    return asyncio.run(run())
+
+def test_failed_downloads_are_retried(tmp_path):
+    ledger_path, store_path = tmp_path / "ledger.jsonl", tmp_path / "raw.jsonl"
+
+    async def serve():
+        # Every article answers 429 to its first request; no crawler retries
+        async with stub_server(articles=4, fail_first=1) as base:
+            first = await asyncio.to_thread(run_backfill, base, ledger_path, store_path)
+            second = await asyncio.to_thread(run_backfill, base, ledger_path, store_path)
+            return first, second
+    first, second = asyncio.run(serve())
+
+    assert (first.windows_done, first.windows_partial, first.articles_stored) == (0, 1, 0)
+    assert (second.windows_done, second.windows_partial, second.articles_stored) == (1, 0, 4)
+    entries = [json.loads(line) for line in ledger_path.read_text().splitlines()]
+    assert [e["status"] for e in entries] == ["partial", "done"]
+    assert len(entries[0]["retry"]) == 4
+    ledger = WindowLedger(str(ledger_path))
+    assert ledger.is_done(WINDOW["key"]) and ledger.pending(WINDOW["key"]) is None
+    ledger.close()
+    assert len(store_path.read_text().splitlines()) == 4
@@ -0,0 +1,72 @@
+"""
+Crawler behaviour against the stub news server (backend/scripts/stub_news_server.py)
+on an ephemeral port: retries on 429 + Retry-After, per-domain rate limiting and
+conditional GETs answered from the HTML cache.
+"""
+import asyncio
+import time
+
+from backend.crawler import TokenBucket
+from backend.fetch_news import download_article
+from backend.html_cache import HtmlCache
+from stub import stub_server, crawler
+
+def test_retries_on_429_until_success():
+    async def run():
+        async with stub_server(fail_first=2) as base, crawler() as c:
+            result = await c.fetch(f"{base}/article/1")
+            return result, c.metrics
+    result, metrics = asyncio.run(run())
+    assert result is not None and result.status == 200
+    assert metrics.retries == 2
+    assert metrics.statuses == {429: 2, 200: 1}
+    assert metrics.failed == 0
+
+def test_gives_up_after_max_retries():
+    async def run():
+        async with stub_server(fail_first=10) as base, crawler(max_retries=3) as c:
+            result = await c.fetch(f"{base}/article/1")
+            return result, c.metrics
+    result, metrics = asyncio.run(run())
+    assert result is None
+    assert metrics.requests == 4
+    assert metrics.retries == 3
+    assert metrics.failed == 1
+
+def test_token_bucket_rate():
+    async def run():
+        bucket = TokenBucket(rate=50, capacity=2)
+        start = time.monotonic()
+        for _ in range(7):
+            await bucket.acquire()
+        return time.monotonic() - start
+    # Burst of 2, then 5 more at 50/s
+    elapsed = asyncio.run(run())
+    assert 0.09 <= elapsed < 0.5
+
+def test_per_domain_rate_limit():
+    async def run():
+        async with stub_server() as base, crawler(per_domain_rate=20, per_domain_burst=1) as c:
+            start = time.monotonic()
+            results = await asyncio.gather(*(c.fetch(f"{base}/article/{i}") for i in range(6)))
+            return results, time.monotonic() - start
+    results, elapsed = asyncio.run(run())
+    assert all(r is not None and r.status == 200 for r in results)
+    # One token up front, then 5 more at 20/s
+    assert elapsed >= 0.24
+
+def test_conditional_get_served_from_cache(tmp_path):
+    cache = HtmlCache(str(tmp_path / "html"))
+
+    async def run():
+        async with stub_server() as base, crawler() as c:
+            article = {"url": f"{base}/article/3", "title": "Stub article 3"}
+            first = await download_article(c, article, cache)
+            second = await download_article(c, article, cache)
+            return first, second, c.metrics
+    first, second, metrics = asyncio.run(run())
+    assert first is not None and second is not None
+    assert second[1] == first[1]
+    assert metrics.statuses == {200: 1, 304: 1}
+    assert cache.stored == 1
+    assert cache.revalidated == 1
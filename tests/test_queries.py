@@ -0,0 +1,27 @@
+"""API row shape and page cursors shared by the DB and NO-DB /api/errors paths."""
+from datetime import datetime
+
+import pytest
+
+from backend.queries import error_row, file_error_row, encode_cursor, decode_cursor
+
+COUNTRIES = {"Finland": {"code": "FIN", "name": "Finland"}}
+
+def test_file_rows_match_db_rows():
+    db = error_row((7, "FIN", "Finland", "t", "teh", None, "ctx", datetime(2024, 1, 16, 4)))
+    article = {"title": "t", "country": "Finland", "scraped_at": "2024-01-16T06:00:00+02:00"}
+    row = file_error_row(7, article, {"word": "Teh", "suggestion": "", "context": "ctx", "tag": "NN"}, COUNTRIES)
+    assert row == db
+
+def test_file_rows_unknown_country_and_basic_dates():
+    row = file_error_row(1, {"country": "Atlantis", "date": "20240101T000000Z"}, {"word": "x"}, COUNTRIES)
+    assert (row["country_code"], row["country"], row["timestamp"]) == ("UNK", "Unknown", "2024-01-01T00:00:00")
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(0, 1234, 5, 99), 4) == [0, 1234, 5, 99]
+    assert decode_cursor(encode_cursor(42), 1) == [42]
+
+@pytest.mark.parametrize("cursor", ["42", "bogus!", encode_cursor(1, 2)])
+def test_invalid_cursor(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, 1)
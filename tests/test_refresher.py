@@ -0,0 +1,42 @@
+"""CacheRefresher: one refresh at a time, later callers join it, on-demand runs are spaced."""
+import asyncio
+import threading
+import time
+
+from backend.refresher import CacheRefresher
+
+class SlowStorage:
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def refresh(self):
+        with self.lock:
+            self.calls += 1
+        time.sleep(self.seconds)
+
+def test_concurrent_refreshes_join_the_running_one():
+    storage = SlowStorage(0.2)
+    refresher = CacheRefresher(storage, interval=0)
+
+    async def run():
+        return await asyncio.gather(*(refresher.refresh_now() for _ in range(5)))
+    assert asyncio.run(run()) == [True] * 5
+    assert storage.calls == 1
+    assert refresher.runs == 1
+
+def test_retry_after_spaces_on_demand_runs():
+    storage = SlowStorage(0.05)
+    refresher = CacheRefresher(storage, interval=0)
+    refresher.min_interval = 60
+    assert refresher.retry_after() == 0
+
+    async def run():
+        task = asyncio.create_task(refresher.refresh_now())
+        await asyncio.sleep(0)
+        busy = refresher.busy(), refresher.retry_after()
+        await task
+        return busy
+    assert asyncio.run(run()) == (True, 0)
+    assert 59 < refresher.retry_after() <= 60